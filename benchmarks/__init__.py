@@ -0,0 +1,3 @@
+"""
+性能基准脚本，既可以直接运行输出报告，也有对应的 pytest 用例在超出预算时失败。
+"""
@@ -0,0 +1,224 @@
+"""
+BoardShim 吞吐与延迟基准：按设定时长持续采集，统计实际送达采样率与标称采样率之比、
+get_board_data / get_current_board_data 调用耗时分位数、相邻样本时间戳间隔抖动，
+并在不同 start_stream 缓冲区大小下检测环形缓冲区溢出。结果写入 JSON，便于做回归比对。
+
+默认使用 brainflow 合成板（board id -1），无需蓝牙即可运行。
+
+用法:
+    python benchmarks/board_throughput.py --duration 10 --json throughput.json
+    python benchmarks/board_throughput.py --board-id 57 --mac C4:64:E3:D8:E6:D2 --buffer-sizes 500 2500 45000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from brainflow.board_shim import BoardIds, BoardShim, BrainFlowInputParams
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+from eeg_common.packet_loss import find_gaps
+
+SYNTHETIC_BOARD = BoardIds.SYNTHETIC_BOARD.value
+
+# 默认检测溢出的缓冲区大小（样本数），最后一项为 brainflow 默认值
+DEFAULT_BUFFER_SIZES = (250, 1000, 450000)
+# 延迟分位数
+PERCENTILES = (50, 90, 99)
+
+
+def percentiles(values):
+    """
+    :return: {'p50', 'p90', 'p99', 'max', 'mean'}，单位与输入相同；没有数据时为空字典
+    """
+    values = np.asarray(values, dtype=float)
+    if values.size == 0:
+        return {}
+    result = {f'p{p}': float(np.percentile(values, p)) for p in PERCENTILES}
+    result.update(max=float(values.max()), mean=float(values.mean()))
+    return result
+
+
+def timestamp_jitter(timestamps, sampling_rate):
+    """
+    相邻样本时间戳间隔相对标称间隔的偏差。BLE 设备按包上报，同一包内的样本时间戳相同，
+    因此同时给出间隔的分位数和包间隔（非零间隔）的统计。
+
+    :return: 抖动统计字典，单位为毫秒
+    """
+    timestamps = np.asarray(timestamps, dtype=float)
+    if timestamps.size < 2:
+        return {}
+    intervals = np.diff(timestamps)
+    deviation = np.abs(intervals - 1.0 / sampling_rate) * 1000
+    packet_intervals = intervals[intervals > 0] * 1000
+    return {
+        'nominal_interval_ms': 1000.0 / sampling_rate,
+        'interval_std_ms': float(intervals.std() * 1000),
+        'deviation_ms': percentiles(deviation),
+        'packet_interval_ms': percentiles(packet_intervals),
+        'backwards': int(np.count_nonzero(intervals < 0)),
+    }
+
+
+class ThroughputBenchmark:
+    """
+    在同一个已连接的会话上依次执行各项测量，每项测量前后都重新 start_stream / stop_stream。
+    """
+
+    def __init__(self, board_id=SYNTHETIC_BOARD, mac_address='', timeout=10):
+        """
+        :param board_id: 板子 ID，默认为合成板
+        :param mac_address: 真实设备的 MAC 地址
+        :param timeout: prepare_session 超时时间（秒）
+        """
+        self.board_id = board_id
+        params = BrainFlowInputParams()
+        params.mac_address = mac_address
+        params.timeout = timeout
+        self.board_shim = BoardShim(board_id, params)
+        self.sampling_rate = BoardShim.get_sampling_rate(board_id)
+        self.timestamp_channel = BoardShim.get_timestamp_channel(board_id)
+        self.package_num_channel = BoardShim.get_package_num_channel(board_id)
+
+    def __enter__(self):
+        self.board_shim.prepare_session()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.board_shim.is_prepared():
+            self.board_shim.release_session()
+
+    def measure_stream(self, duration, poll_interval=0.02, window=None):
+        """
+        持续采集 duration 秒，每 poll_interval 秒交替调用一次 get_current_board_data 和 get_board_data。
+
+        :param window: get_current_board_data 每次读取的样本数，默认 1 秒的数据
+        """
+        window = window or self.sampling_rate
+        board_data_latency = []
+        current_data_latency = []
+        chunks = []
+        self.board_shim.start_stream()
+        start = time.perf_counter()
+        try:
+            while time.perf_counter() - start < duration:
+                time.sleep(poll_interval)
+                tick = time.perf_counter()
+                self.board_shim.get_current_board_data(window)
+                current_data_latency.append(time.perf_counter() - tick)
+                tick = time.perf_counter()
+                chunk = self.board_shim.get_board_data()
+                board_data_latency.append(time.perf_counter() - tick)
+                chunks.append(chunk[[self.timestamp_channel, self.package_num_channel]])
+            elapsed = time.perf_counter() - start
+        finally:
+            self.board_shim.stop_stream()
+        data = np.concatenate(chunks, axis=1) if chunks else np.zeros((2, 0))
+        delivered = data.shape[1]
+        # 以首尾时间戳计算的速率不受 start_stream 启动延迟影响
+        span = data[0, -1] - data[0, 0] if delivered > 1 else 0.0
+        gaps = find_gaps(data[1])
+        return {
+            'duration': elapsed,
+            'nominal_rate': self.sampling_rate,
+            'samples': delivered,
+            'delivered_rate': delivered / elapsed,
+            'timestamp_rate': (delivered - 1) / span if span > 0 else None,
+            'rate_ratio': delivered / elapsed / self.sampling_rate,
+            'lost_samples': gaps.lost,
+            'longest_gap': gaps.longest_gap,
+            'get_board_data_ms': {k: v * 1000 for k, v in percentiles(board_data_latency).items()},
+            'get_current_board_data_ms': {k: v * 1000 for k, v in percentiles(current_data_latency).items()},
+            'jitter': timestamp_jitter(data[0], self.sampling_rate),
+        }
+
+    def measure_overflow(self, buffer_size, hold):
+        """
+        以 buffer_size 启动采集，hold 秒内不取数，检查缓冲区是否写满、最旧的样本是否被覆盖。
+        """
+        self.board_shim.start_stream(buffer_size)
+        start = time.perf_counter()
+        try:
+            time.sleep(hold)
+            count = int(self.board_shim.get_board_data_count())
+            elapsed = time.perf_counter() - start
+            data = self.board_shim.get_board_data()
+        finally:
+            self.board_shim.stop_stream()
+        expected = int(elapsed * self.sampling_rate)
+        return {
+            'buffer_size': buffer_size,
+            'hold': hold,
+            'expected_samples': expected,
+            'buffered_samples': count,
+            'returned_samples': data.shape[1],
+            'overflow': count >= buffer_size,
+            'dropped_samples': max(0, expected - data.shape[1]) if count >= buffer_size else 0,
+        }
+
+
+def run_benchmark(board_id=SYNTHETIC_BOARD, mac_address='', duration=10.0, poll_interval=0.02,
+                  buffer_sizes=DEFAULT_BUFFER_SIZES, hold=None):
+    """
+    :param hold: 溢出检测时不取数的时长（秒），默认为最小缓冲区能容纳时长的两倍
+    :return: 结果字典
+    """
+    with ThroughputBenchmark(board_id, mac_address) as benchmark:
+        if hold is None:
+            hold = 2.0 * min(buffer_sizes) / benchmark.sampling_rate if buffer_sizes else 0
+        return {
+            'board_id': board_id,
+            'board_name': BoardShim.get_board_descr(board_id).get('name', str(board_id)),
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'stream': benchmark.measure_stream(duration, poll_interval),
+            'overflow': [benchmark.measure_overflow(size, hold) for size in buffer_sizes],
+        }
+
+
+def print_report(result):
+    stream = result['stream']
+    print(f"板子 {result['board_name']} ({result['board_id']})，采集 {stream['duration']:.1f}s")
+    print(f"  送达采样率 {stream['delivered_rate']:.1f} Hz / 标称 {stream['nominal_rate']} Hz"
+          f"（{stream['rate_ratio'] * 100:.1f}%），丢失样本 {stream['lost_samples']}，最长缺口 {stream['longest_gap']}")
+    for name in ('get_board_data_ms', 'get_current_board_data_ms'):
+        stats = stream[name]
+        if stats:
+            print(f"  {name[:-3]:<24} p50 {stats['p50']:.3f} ms  p90 {stats['p90']:.3f} ms  "
+                  f"p99 {stats['p99']:.3f} ms  max {stats['max']:.3f} ms")
+    jitter = stream['jitter']
+    if jitter:
+        print(f"  时间戳间隔标准差 {jitter['interval_std_ms']:.3f} ms，偏差 p99 {jitter['deviation_ms']['p99']:.3f} ms，"
+              f"回退 {jitter['backwards']} 次")
+    for entry in result['overflow']:
+        state = f"溢出，丢弃约 {entry['dropped_samples']} 个样本" if entry['overflow'] else '未溢出'
+        print(f"  缓冲区 {entry['buffer_size']:>7} 样本，{entry['hold']:.1f}s 不取数: "
+              f"缓存 {entry['buffered_samples']} / 应到 {entry['expected_samples']}，{state}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='BoardShim 吞吐与延迟基准')
+    parser.add_argument('--board-id', type=int, default=SYNTHETIC_BOARD, help='板子 ID，默认为合成板 -1')
+    parser.add_argument('--mac', default='', help='真实设备的 MAC 地址')
+    parser.add_argument('--duration', type=float, default=10.0, help='吞吐测量时长（秒）')
+    parser.add_argument('--poll-interval', type=float, default=0.02, help='取数间隔（秒）')
+    parser.add_argument('--buffer-sizes', type=int, nargs='*', default=list(DEFAULT_BUFFER_SIZES),
+                        help='溢出检测使用的 start_stream 缓冲区大小（样本数）')
+    parser.add_argument('--hold', type=float, help='溢出检测时不取数的时长（秒）')
+    parser.add_argument('--min-rate-ratio', type=float, default=0.0,
+                        help='送达采样率低于标称值的该比例时返回非零退出码，例如 0.95')
+    parser.add_argument('--json', help='把结果写入该 JSON 文件')
+    args = parser.parse_args()
+
+    result = run_benchmark(args.board_id, args.mac, args.duration, args.poll_interval, args.buffer_sizes, args.hold)
+    print_report(result)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    sys.exit(1 if result['stream']['rate_ratio'] < args.min_rate_ratio else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+"""
+故障恢复基准：在 Synchroni 演示程序（BluetoothDeviceScanner）的数据通路上依次注入各类故障，
+统计每类故障从注入到数据恢复正常送达的时间，以及观察窗口内丢失的样本数。
+
+断连故障按演示程序的重连路径恢复：重新扫描，再对设备列表中的设备执行 connect_device
+（requireSensor、connect、等待 Ready、init、startDataNotification）；setParam 故障按演示程序切换滤波器时的
+setParam 调用重试，直到返回 OK。
+
+默认使用进程内模拟的 sensor 模块，无需蓝牙和显示器即可运行。
+
+用法:
+    python benchmarks/fault_recovery.py --offscreen
+    python benchmarks/fault_recovery.py --offscreen --kinds disconnect drop --observe 5 --json recovery.json
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+SYNCHRONI_DIR = os.path.join(ROOT, 'synchroni_sdk_api')
+sys.path[:0] = [ROOT, SYNCHRONI_DIR]
+from eeg_common.faults import FAULT_KINDS, FaultInjector, FaultySensorController
+
+# 判定恢复：连续 RECOVERED_PACKETS 包的到达间隔不超过标称包间隔的 RECOVERED_INTERVAL_RATIO 倍
+RECOVERED_PACKETS = 3
+RECOVERED_INTERVAL_RATIO = 1.5
+RETRY_INTERVAL = 0.05
+
+
+def pump(app, seconds, until=None):
+    """
+    处理 Qt 事件 seconds 秒，until() 为真时提前返回。
+    """
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        app.processEvents()
+        if until is not None and until():
+            return True
+        time.sleep(0.01)
+    return until is not None and until()
+
+
+class PacketLog:
+    """
+    记录送达演示程序 onDataCallback 的每个数据包的到达时间和样本数。
+    """
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.lock = threading.Lock()
+        self.arrivals = []
+        self.counts = []
+
+    def __call__(self, sensor, data):
+        if data and data.channelSamples:
+            with self.lock:
+                self.arrivals.append(time.monotonic())
+                self.counts.append(len(data.channelSamples[0]))
+        self.callback(sensor, data)
+
+    def since(self, start):
+        with self.lock:
+            arrivals = np.asarray(self.arrivals)
+            counts = np.asarray(self.counts)
+        mask = arrivals > start
+        return arrivals[mask], counts[mask]
+
+
+def recovery_time(arrivals, start, after, packet_interval):
+    """
+    :param arrivals: 故障注入后的到达时间
+    :param start: 故障注入时间
+    :param after: 不早于该时间的包才参与判定（故障窗口结束或重连完成的时间）
+    :return: 从注入到恢复正常送达的秒数，观察窗口内未恢复时为 None
+    """
+    limit = packet_interval * RECOVERED_INTERVAL_RATIO
+    intervals = np.diff(arrivals)
+    for i in range(1, len(arrivals) - RECOVERED_PACKETS + 1):
+        if arrivals[i] < after:
+            continue
+        if np.all(intervals[i - 1:i - 1 + RECOVERED_PACKETS] <= limit):
+            return float(arrivals[i] - start)
+    return None
+
+
+class FaultRecoveryBenchmark:
+    def __init__(self, app, address, duration=0.5, delay=0.2, observe=3.0, scan_timeout=10.0):
+        """
+        :param app: QApplication
+        :param address: 被测设备 MAC 地址
+        :param duration: 窗口型故障的持续时间（秒）
+        :param delay: delay 故障每次回调的延迟（秒）
+        :param observe: 每次注入后的观察时长（秒）
+        """
+        import SynchroniSDKPython_Demo as demo
+
+        self.app = app
+        self.demo = demo
+        self.address = address
+        self.duration = duration
+        self.delay = delay
+        self.observe = observe
+        self.scan_timeout = scan_timeout
+        self.injector = FaultInjector()
+        self.widget = demo.BluetoothDeviceScanner()
+        self.widget.SensorControllerInstance = FaultySensorController(self.widget.SensorControllerInstance,
+                                                                      self.injector)
+        self.packets = PacketLog(self.widget.onDataCallback)
+        # connect_device 中把 self.onDataCallback 注册给设备，这里替换为记录到达时间的包装
+        self.widget.onDataCallback = self.packets
+
+    def _device_item(self):
+        for i in range(self.widget.device_list.count()):
+            item = self.widget.device_list.item(i)
+            if f'Address: {self.address},' in item.text():
+                return item
+        return None
+
+    def connect(self):
+        """
+        走演示程序的扫描、连接流程。
+
+        :return: 数据通知开始时间，失败时为 None
+        """
+        self.widget.device_list.clear()
+        self.widget.discovered_devices.clear()
+        self.widget.start_scan()
+        if not pump(self.app, self.scan_timeout, lambda: self._device_item() is not None):
+            return None
+        self.widget.connect_device(self._device_item())
+        # 连接流程在设备进入 Ready 后由状态回调继续，处理事件直到数据通知开始
+        sensor = self.widget.current_sensor
+        if sensor is None or not pump(self.app, self.demo.CONNECT_TIMEOUT, lambda: sensor.isDataTransfering):
+            return None
+        return time.monotonic()
+
+    @property
+    def packet_interval(self):
+        return self.demo.PACKAGE_COUNT / self.widget.sampling_rate
+
+    def run_fault(self, kind):
+        widget = self.widget
+        DeviceStateEx = self.demo.DeviceStateEx
+        start = time.monotonic()
+        duration = 0.0 if kind == 'disconnect' else self.duration
+        self.injector.schedule(kind, duration=duration, value=self.delay)
+        after = start + duration
+        reconnected = None
+        set_param_failures = 0
+        if kind == 'disconnect':
+            # 断连在下一个数据包到达时触发，等设备断开后按演示程序的路径重连
+            if widget.state_waiter.wait(DeviceStateEx.Disconnected, self.observe):
+                reconnected = self.connect()
+                after = reconnected or after
+        elif kind == 'set_param':
+            # setParam 不依赖 Qt 事件循环，直接重试；处理积压的绘图事件可能耗时数百毫秒，会掩盖真实的恢复时间
+            while widget.current_sensor.setParam('FILTER_HPF', 'ON') != 'OK':
+                set_param_failures += 1
+                time.sleep(RETRY_INTERVAL)
+            after = time.monotonic()
+        pump(self.app, max(0.0, start + self.observe - time.monotonic()))
+        arrivals, counts = self.packets.since(start)
+        elapsed = time.monotonic() - start
+        expected = int(elapsed * widget.sampling_rate)
+        delivered = int(counts.sum())
+        package = self.demo.PACKAGE_COUNT
+        recovered = recovery_time(arrivals, start, after, self.packet_interval)
+        if kind == 'set_param':
+            recovered = after - start
+        return {
+            'kind': kind,
+            'observe': elapsed,
+            'recovery_s': recovered,
+            'expected_samples': expected,
+            'delivered_samples': delivered,
+            # 按包对齐，少于一包的差值视为计时误差
+            'lost_samples': max(0, expected - delivered) // package * package,
+            'reconnect_s': reconnected - start if reconnected else None,
+            'set_param_failures': set_param_failures,
+        }
+
+    def close(self):
+        if self.widget.connected_device is not None:
+            self.widget.disconnect_device()
+        self.widget.close()
+
+
+def run_benchmark(app, address, kinds=FAULT_KINDS, duration=0.5, delay=0.2, observe=3.0, settle=1.0):
+    """
+    :param settle: 每次注入前等待数据稳定的时长（秒）
+    :return: 结果字典
+    """
+    benchmark = FaultRecoveryBenchmark(app, address, duration, delay, observe)
+    try:
+        if benchmark.connect() is None:
+            raise RuntimeError(f'无法连接设备 {address}')
+        faults = []
+        for kind in kinds:
+            pump(app, settle)
+            faults.append(benchmark.run_fault(kind))
+        return {
+            'address': address,
+            'sampling_rate': benchmark.widget.sampling_rate,
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'fault_duration': duration,
+            'faults': faults,
+            'injected': benchmark.injector.injected,
+        }
+    finally:
+        benchmark.close()
+
+
+def print_report(result):
+    print(f"设备 {result['address']}，采样率 {result['sampling_rate']} Hz，窗口型故障持续 {result['fault_duration']}s")
+    for entry in result['faults']:
+        recovery = f"{entry['recovery_s']:.3f}s" if entry['recovery_s'] is not None else '未恢复'
+        print(f"  {entry['kind']:<10} 恢复耗时 {recovery:>8}，丢失样本 {entry['lost_samples']:>5}"
+              f"（应到 {entry['expected_samples']}，送达 {entry['delivered_samples']}）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Synchroni 演示程序故障恢复基准')
+    parser.add_argument('--sensor-mode', choices=('hardware', 'simulated'), default='simulated',
+                        help='simulated 使用模拟器（默认），hardware 连接真实设备')
+    parser.add_argument('--mac', help='被测设备 MAC 地址，默认为模拟设备地址')
+    parser.add_argument('--kinds', nargs='*', choices=FAULT_KINDS, default=list(FAULT_KINDS), help='注入的故障类型')
+    parser.add_argument('--duration', type=float, default=0.5, help='窗口型故障的持续时间（秒）')
+    parser.add_argument('--delay', type=float, default=0.2, help='delay 故障每次回调的延迟（秒）')
+    parser.add_argument('--observe', type=float, default=3.0, help='每次注入后的观察时长（秒）')
+    parser.add_argument('--offscreen', action='store_true', help='不显示窗口（无显示器的 CI 机器）')
+    parser.add_argument('--json', help='把结果写入该 JSON 文件')
+    args = parser.parse_args()
+
+    if args.offscreen:
+        os.environ['QT_QPA_PLATFORM'] = 'offscreen'
+    os.environ['SYNCHRONI_MODE'] = args.sensor_mode
+    import sensor_sim
+    from PyQt5 import QtWidgets
+
+    app = QtWidgets.QApplication(sys.argv)
+    result = run_benchmark(app, args.mac or sensor_sim.DEFAULT_ADDRESS, args.kinds, args.duration, args.delay,
+                           args.observe)
+    print_report(result)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    sys.exit(0 if all(entry['recovery_s'] is not None for entry in result['faults']) else 1)
+
+
+if __name__ == '__main__':
+    main()
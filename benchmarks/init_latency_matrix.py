@@ -0,0 +1,242 @@
+"""
+Synchroni init 参数矩阵基准：对 init 的每包样本数（packageSampleCount）和电量刷新周期（powerRefreshInterval）
+的每种组合重复执行“连接 → init → 开启数据通知 → 接收 → 断开”，测量连接耗时、init 耗时、首包延迟、
+稳定状态下的包速率，以及端到端样本延迟（样本采集到送达回调的时间，包含攒包等待），输出可用于按部署场景
+选择 PACKAGE_COUNT / POWER_REFRESH_PERIOD_IN_MS 的对照表。
+
+端到端延迟以送达最快的包为零点：假设该包的最后一个样本采集后立即送达，其余样本按样本序号和标称采样率推算
+采集时间，因此结果是相对最优情况的延迟，不包含链路的固定延迟。
+
+默认使用进程内模拟的 sensor 模块；--sensor-mode hardware 时连接真实设备。
+
+用法:
+    python benchmarks/init_latency_matrix.py --package-counts 1 5 10 25 50 --power-refresh 1000 60000
+    python benchmarks/init_latency_matrix.py --sensor-mode hardware --mac C4:64:E3:D8:E9:E2 --json matrix.json
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+from benchmarks.sensor_throughput import CONNECT_TIMEOUT, load_sensor
+
+import sensor_sim
+from discovery import DiscoveryCache
+from state_waiter import DeviceStateWaiter
+
+PACKAGE_COUNTS = (1, 5, 10, 25, 50)
+POWER_REFRESH_PERIODS_IN_MS = (1000, 60000)
+# 首包超时（秒）
+FIRST_PACKET_TIMEOUT = 10.0
+# 表格各列：(结果字段, 表头)
+COLUMNS = (
+    ('package_count', 'package'),
+    ('power_refresh_ms', 'power_ms'),
+    ('connect_ms', 'connect_ms'),
+    ('init_ms', 'init_ms'),
+    ('first_packet_ms', 'first_pkt_ms'),
+    ('packets_per_s', 'pkt/s'),
+    ('sample_latency_p50_ms', 'lat_p50_ms'),
+    ('sample_latency_p95_ms', 'lat_p95_ms'),
+    ('lost_samples', 'lost'),
+    ('power_updates', 'power_cb'),
+)
+
+
+def sample_latency(arrivals, first_indices, counts, sampling_rate):
+    """
+    :param arrivals: 每包到达时间（秒）
+    :param first_indices: 每包第一个样本的序号
+    :param counts: 每包样本数
+    :return: 每个样本的端到端延迟（秒），以送达最快的包为零点
+    """
+    arrivals = np.asarray(arrivals, dtype=float)
+    first_indices = np.asarray(first_indices, dtype=np.int64)
+    counts = np.asarray(counts, dtype=np.int64)
+    if counts.size == 0:
+        return np.empty(0)
+    # 每包最后一个样本的理论采集时间与到达时间之差，最小值对应送达最快的包
+    offset = arrivals - (first_indices + counts - 1) / sampling_rate
+    anchor = offset.min()
+    # 展开到样本：包内第 k 个样本的序号为 first + k
+    packet_of_sample = np.repeat(np.arange(counts.size), counts)
+    within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    indices = first_indices[packet_of_sample] + within
+    return arrivals[packet_of_sample] - (anchor + indices / sampling_rate)
+
+
+class InitLatencyMatrix:
+    def __init__(self, address=sensor_sim.DEFAULT_ADDRESS, mode='simulated', duration=5.0,
+                 connect_timeout=CONNECT_TIMEOUT):
+        """
+        :param address: 被测设备 MAC 地址
+        :param mode: hardware 或 simulated
+        :param duration: 每次接收数据的时长（秒）
+        """
+        self.sensor = load_sensor(mode)
+        self.address = address
+        self.duration = duration
+        self.connect_timeout = connect_timeout
+        self.controller = self.sensor.SensorController()
+        self.discovery = DiscoveryCache()
+
+    def measure_once(self, package_count, power_refresh_ms):
+        """
+        一次完整的连接、init、接收、断开。
+
+        :return: 本次的测量结果（毫秒、包/秒）
+        """
+        DeviceStateEx = self.sensor.DeviceStateEx
+        device = self.discovery.find(self.controller, self.address)
+        if device is None:
+            raise RuntimeError(f'未扫描到设备 {self.address}')
+        profile = self.controller.requireSensor(device)
+        waiter = DeviceStateWaiter(profile)
+        arrivals = []
+        first_indices = []
+        counts = []
+        power_updates = []
+        first_packet = threading.Event()
+        lock = threading.Lock()
+
+        def on_data(sensor, data):
+            if data.dataType != self.sensor.DataType.NTF_EEG or not data.channelSamples:
+                return
+            samples = data.channelSamples[0]
+            with lock:
+                arrivals.append(time.perf_counter())
+                first_indices.append(samples[0].sampleIndex)
+                counts.append(len(samples))
+            first_packet.set()
+
+        try:
+            start = time.perf_counter()
+            if not profile.connect() or not waiter.wait(DeviceStateEx.Ready, self.connect_timeout):
+                raise RuntimeError(f'连接设备 {self.address} 失败')
+            connected = time.perf_counter()
+            if not profile.init(package_count, power_refresh_ms):
+                raise RuntimeError(f'init({package_count}, {power_refresh_ms}) 失败')
+            inited = time.perf_counter()
+            sampling_rate = profile.getDeviceInfo().EegSampleRate
+            profile.onPowerChanged = lambda sensor, power: power_updates.append(power)
+            profile.onDataCallback = on_data
+            notify = time.perf_counter()
+            if not profile.startDataNotification():
+                raise RuntimeError('开启数据通知失败')
+            if not first_packet.wait(FIRST_PACKET_TIMEOUT):
+                raise RuntimeError(f'{FIRST_PACKET_TIMEOUT}s 内未收到数据')
+            time.sleep(self.duration)
+            profile.stopDataNotification()
+        finally:
+            profile.onDataCallback = None
+            profile.onPowerChanged = None
+            if profile.deviceState != DeviceStateEx.Disconnected:
+                profile.disconnect()
+                waiter.wait(DeviceStateEx.Disconnected, self.connect_timeout)
+            waiter.close()
+
+        with lock:
+            arrivals = np.asarray(arrivals)
+            first_indices = np.asarray(first_indices, dtype=np.int64)
+            counts = np.asarray(counts, dtype=np.int64)
+        expected_first = first_indices[:-1] + counts[:-1]
+        latency = sample_latency(arrivals, first_indices, counts, sampling_rate) * 1000
+        span = arrivals[-1] - arrivals[0]
+        return {
+            'connect_ms': (connected - start) * 1000,
+            'init_ms': (inited - connected) * 1000,
+            'first_packet_ms': (arrivals[0] - notify) * 1000,
+            # 稳定状态：首包之后的包数除以首包到末包的时间
+            'packets_per_s': (counts.size - 1) / span if span > 0 else 0.0,
+            'samples_per_s': counts[1:].sum() / span if span > 0 else 0.0,
+            'sample_latency_p50_ms': float(np.percentile(latency, 50)),
+            'sample_latency_p95_ms': float(np.percentile(latency, 95)),
+            'sample_latency_max_ms': float(latency.max()),
+            'lost_samples': int(np.clip(first_indices[1:] - expected_first, 0, None).sum()),
+            'power_updates': len(power_updates),
+            'sampling_rate': sampling_rate,
+        }
+
+    def measure(self, package_count, power_refresh_ms, repeats=3):
+        """
+        :return: 各指标在 repeats 次测量中的中位数，lost_samples 和 power_updates 为总和
+        """
+        runs = [self.measure_once(package_count, power_refresh_ms) for _ in range(repeats)]
+        result = {'package_count': package_count, 'power_refresh_ms': power_refresh_ms, 'repeats': repeats}
+        for key in runs[0]:
+            values = [run[key] for run in runs]
+            if key in ('lost_samples', 'power_updates'):
+                result[key] = int(sum(values))
+            else:
+                result[key] = float(np.median(values))
+        return result
+
+
+def run_benchmark(address=sensor_sim.DEFAULT_ADDRESS, mode='simulated', package_counts=PACKAGE_COUNTS,
+                  power_refresh_periods=POWER_REFRESH_PERIODS_IN_MS, repeats=3, duration=5.0):
+    matrix = InitLatencyMatrix(address, mode, duration)
+    return {
+        'address': address,
+        'mode': mode,
+        'repeats': repeats,
+        'duration': duration,
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'results': [matrix.measure(package_count, power_refresh_ms, repeats)
+                    for package_count, power_refresh_ms in itertools.product(package_counts,
+                                                                             power_refresh_periods)],
+    }
+
+
+def print_report(result):
+    print(f"设备 {result['address']}（{result['mode']}），每种组合 {result['repeats']} 次，"
+          f"每次接收 {result['duration']}s，各列为中位数")
+    print('  '.join(f'{title:>12}' for _, title in COLUMNS))
+    for entry in result['results']:
+        cells = []
+        for key, _ in COLUMNS:
+            value = entry[key]
+            cells.append(f'{value:>12.1f}' if isinstance(value, float) else f'{value:>12}')
+        print('  '.join(cells))
+
+
+def write_csv(path, result):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(result['results'][0]))
+        writer.writeheader()
+        writer.writerows(result['results'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Synchroni init 参数（每包样本数 × 电量刷新周期）延迟矩阵')
+    parser.add_argument('--sensor-mode', choices=sensor_sim.SENSOR_MODES, default='simulated',
+                        help='simulated 使用模拟器（默认），hardware 连接真实设备')
+    parser.add_argument('--mac', default=sensor_sim.DEFAULT_ADDRESS, help='被测设备 MAC 地址')
+    parser.add_argument('--package-counts', type=int, nargs='+', default=list(PACKAGE_COUNTS),
+                        help='init 的每包样本数')
+    parser.add_argument('--power-refresh', type=int, nargs='+', default=list(POWER_REFRESH_PERIODS_IN_MS),
+                        help='init 的电量刷新周期（毫秒）')
+    parser.add_argument('--repeats', type=int, default=3, help='每种组合重复连接的次数')
+    parser.add_argument('--duration', type=float, default=5.0, help='每次接收数据的时长（秒）')
+    parser.add_argument('--json', help='把结果写入该 JSON 文件')
+    parser.add_argument('--csv', help='把结果表写入该 CSV 文件')
+    args = parser.parse_args()
+
+    result = run_benchmark(args.mac, args.sensor_mode, args.package_counts, args.power_refresh, args.repeats,
+                           args.duration)
+    print_report(result)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    if args.csv:
+        write_csv(args.csv, result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""
+回放驱动的显示链路基准：把一段合成会话录制到磁盘，用 demo_brain_test2 的确定性回放（--speed max）逐帧驱动
+取数 → 合并 → 环形缓冲区 → 滤波 → 绘制的完整链路，统计每帧各阶段耗时的分位数。
+不需要蓝牙和设备，同样的输入每次得到同样的显示数据，帧耗时 p99 超出刷新间隔预算时以非零退出码结束，可直接放进 CI。
+
+用法:
+    python benchmarks/playback_pipeline.py --offscreen
+    python benchmarks/playback_pipeline.py --offscreen --seconds 60 --channels 32 --period 30 --json pipeline.json
+"""
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+BRAINFLOW_DIR = os.path.join(ROOT, 'test_brain_sdk_api')
+sys.path[:0] = [ROOT, BRAINFLOW_DIR]
+from benchmarks.board_throughput import percentiles
+from eeg_common.recorder import SessionRecorder
+
+# 显示周期下拉框中的选项
+PERIODS = ('1s', '2s', '5s', '10s', '30s', '60s')
+# 每帧总耗时 p99 的预算（秒），不超过界面刷新间隔才能跟上实时数据
+FRAME_BUDGET = 0.1
+
+
+def make_session(directory, seconds=20, channels=8, sampling_rate=250, seed=0):
+    """
+    录制一段合成会话：每个通道为不同频率的正弦加噪声，每秒一个标记。
+    """
+    rng = np.random.default_rng(seed)
+    count = int(seconds * sampling_rate)
+    t = np.arange(count) / sampling_rate
+    frequencies = 2.0 + np.arange(channels)[:, None] * 1.5
+    samples = 50 * np.sin(2 * np.pi * frequencies * t) + rng.normal(0, 5, (channels, count))
+    markers = np.zeros(count)
+    markers[::int(sampling_rate)] = 1
+    recorder = SessionRecorder(directory, channels, sampling_rate)
+    recorder.start()
+    package = int(sampling_rate) // 10
+    for start in range(0, count, package):
+        stop = start + package
+        recorder.append(samples[:, start:stop], 1.7e9 + t[start:stop], markers[start:stop])
+    recorder.stop()
+    return count
+
+
+@contextlib.contextmanager
+def no_message_boxes():
+    # connect_device 成功后弹出模态提示框，无人值守时直接跳过
+    from PyQt5 import QtWidgets
+    information = QtWidgets.QMessageBox.information
+    QtWidgets.QMessageBox.information = lambda *args, **kwargs: QtWidgets.QMessageBox.Ok
+    try:
+        yield
+    finally:
+        QtWidgets.QMessageBox.information = information
+
+
+def timed(stages, name, func):
+    """
+    包装 func，把每次调用的耗时累加到 stages[name]。
+    """
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stages[name] += time.perf_counter() - start
+    return wrapper
+
+
+def run_benchmark(app, session_dir, period='10s', band=(8.0, 13.0)):
+    """
+    逐帧调用 timerEvent 直到会话放完，不经过 QTimer，每帧处理的数据量固定。
+
+    :param app: QApplication
+    :param period: 显示周期，取值见 PERIODS
+    :param band: 带通滤波的 (低截止, 高截止) 频率，为 None 时不滤波
+    :return: 结果字典，各阶段耗时单位为毫秒，display_digest 为最后一帧显示数据的摘要
+    """
+    import demo_brain_test2 as demo
+
+    window = demo.EEGDataVisualizer(playback_dir=session_dir, playback_speed=None)
+    window.show()
+    app.processEvents()
+    with no_message_boxes():
+        window.connect_device()
+    window.period_combo_box.setCurrentText(period)
+    window.handle_period_selection()
+    window.start_real_time_collection()
+    window.timer.stop()
+    if band is not None:
+        window.current_filter = window.alpha_band_pass_filter
+        window.current_low_cutoff_freq, window.current_high_cutoff_freq = band
+
+    stages = {'filter': 0.0, 'render': 0.0}
+    window.check_filter = timed(stages, 'filter', window.check_filter)
+    window.update_plot = timed(stages, 'render', window.update_plot)
+    board = window.board_shims[0]
+    frames = {'total': [], 'ingest': [], 'filter': [], 'render': []}
+    try:
+        while not board.is_finished():
+            stages.update(filter=0.0, render=0.0)
+            start = time.perf_counter()
+            window.timerEvent()
+            total = time.perf_counter() - start
+            frames['total'].append(total * 1000)
+            frames['filter'].append(stages['filter'] * 1000)
+            frames['render'].append(stages['render'] * 1000)
+            frames['ingest'].append((total - stages['filter'] - stages['render']) * 1000)
+            app.processEvents()
+        result = {
+            'period': period,
+            'filter': band,
+            'frames': len(frames['total']),
+            'samples': int(window.ring_buffer.head),
+            'display_digest': hashlib.sha1(window.data_buffer[:, :window.buffer_index].tobytes()).hexdigest(),
+        }
+        result.update({f'{stage}_ms': percentiles(values) for stage, values in frames.items()})
+    finally:
+        window.stop_real_time_collection()
+        window.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='回放录制的会话，测量取数到绘制的每帧耗时')
+    parser.add_argument('--seconds', type=float, default=20, help='合成会话时长（秒）')
+    parser.add_argument('--channels', type=int, default=8, help='通道数')
+    parser.add_argument('--sampling-rate', type=int, default=250, help='采样率')
+    parser.add_argument('--period', choices=PERIODS, default='10s', help='显示周期')
+    parser.add_argument('--no-filter', action='store_true', help='不滤波')
+    parser.add_argument('--session', help='回放已有的会话目录，不生成合成会话')
+    parser.add_argument('--offscreen', action='store_true', help='不显示窗口（无显示器的 CI 机器）')
+    parser.add_argument('--budget-scale', type=float, default=1.0, help='预算放大倍数')
+    parser.add_argument('--json', help='把结果写入该 JSON 文件')
+    args = parser.parse_args()
+
+    if args.offscreen:
+        os.environ['QT_QPA_PLATFORM'] = 'offscreen'
+    from PyQt5 import QtWidgets
+    app = QtWidgets.QApplication(sys.argv)
+
+    with tempfile.TemporaryDirectory() as temp:
+        session_dir = args.session
+        if session_dir is None:
+            session_dir = os.path.join(temp, 'session')
+            make_session(session_dir, args.seconds, args.channels, args.sampling_rate)
+        result = run_benchmark(app, session_dir, args.period, None if args.no_filter else (8.0, 13.0))
+
+    budget = FRAME_BUDGET * args.budget_scale
+    result['budget_ms'] = budget * 1000
+    result['ok'] = result['total_ms']['p99'] <= budget * 1000
+    print(f"{result['frames']} 帧，{result['samples']} 个样本，显示周期 {result['period']}")
+    for stage in ('ingest', 'filter', 'render', 'total'):
+        stats = result[f'{stage}_ms']
+        print(f"{stage:<8} p50 {stats['p50']:7.2f} ms  p90 {stats['p90']:7.2f} ms  p99 {stats['p99']:7.2f} ms  "
+              f"max {stats['max']:7.2f} ms")
+    print(f"每帧 p99 预算 {budget * 1000:.0f} ms: {'ok' if result['ok'] else 'over_budget'}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    sys.exit(0 if result['ok'] else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+"""
+Synchroni 设备吞吐基准：连接设备后按设定时长持续接收数据通知，统计实际送达采样率与标称采样率之比、
+数据回调间隔分位数、包到达延迟相对最早一包的偏移（送达抖动），以及按样本序号检测到的丢失样本数。
+
+默认使用进程内模拟的 sensor 模块（synchroni_sdk_api/sensor_sim.py），无需蓝牙即可运行；
+--sensor-mode hardware 时连接真实设备。
+
+用法:
+    python benchmarks/sensor_throughput.py --duration 10 --json sensor_throughput.json
+    python benchmarks/sensor_throughput.py --sensor-mode hardware --mac C4:64:E3:D8:E9:E2
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+from benchmarks.board_throughput import percentiles
+
+SYNCHRONI_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, 'synchroni_sdk_api'))
+sys.path.insert(0, SYNCHRONI_DIR)
+import sensor_sim
+from discovery import DiscoveryCache
+from state_waiter import DeviceStateWaiter
+
+PACKAGE_COUNT = 10
+POWER_REFRESH_PERIOD_IN_MS = 60000
+CONNECT_TIMEOUT = 30
+
+
+def load_sensor(mode):
+    """
+    :param mode: hardware 使用真实 SDK，simulated 使用模拟器
+    :return: sensor 模块
+    """
+    if mode == 'simulated':
+        sensor_sim.install()
+    import sensor
+    return sensor
+
+
+class SensorThroughputBenchmark:
+    """
+    进入时扫描、连接并初始化设备，退出时断开连接；measure_stream 可以在同一连接上重复执行。
+    """
+
+    def __init__(self, address=sensor_sim.DEFAULT_ADDRESS, mode='simulated', package_count=PACKAGE_COUNT,
+                 power_refresh_ms=POWER_REFRESH_PERIOD_IN_MS, connect_timeout=CONNECT_TIMEOUT):
+        """
+        :param address: 被测设备 MAC 地址
+        :param mode: hardware 或 simulated
+        :param package_count: init 的每包样本数
+        """
+        self.sensor = load_sensor(mode)
+        self.address = address
+        self.package_count = package_count
+        self.power_refresh_ms = power_refresh_ms
+        self.connect_timeout = connect_timeout
+        self.controller = self.sensor.SensorController()
+        self.discovery = DiscoveryCache()
+        self.profile = None
+        self.waiter = None
+        self.sampling_rate = None
+        self.channel_count = None
+
+    def __enter__(self):
+        DeviceStateEx = self.sensor.DeviceStateEx
+        device = self.discovery.find(self.controller, self.address)
+        if device is None:
+            raise RuntimeError(f'未扫描到设备 {self.address}')
+        self.profile = self.controller.requireSensor(device)
+        self.waiter = DeviceStateWaiter(self.profile)
+        if self.profile.deviceState != DeviceStateEx.Ready:
+            if not self.profile.connect() or not self.waiter.wait(DeviceStateEx.Ready, self.connect_timeout):
+                self.__exit__(None, None, None)
+                raise RuntimeError(f'连接设备 {self.address} 失败')
+        if not self.profile.hasInited and not self.profile.init(self.package_count, self.power_refresh_ms):
+            self.__exit__(None, None, None)
+            raise RuntimeError(f'初始化设备 {self.address} 失败')
+        info = self.profile.getDeviceInfo()
+        self.sampling_rate = info.EegSampleRate
+        self.channel_count = info.EegChannelCount
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.profile is not None and self.profile.deviceState != self.sensor.DeviceStateEx.Disconnected:
+            self.profile.disconnect()
+            self.waiter.wait(self.sensor.DeviceStateEx.Disconnected, self.connect_timeout)
+        if self.waiter is not None:
+            self.waiter.close()
+
+    def measure_stream(self, duration):
+        """
+        接收 duration 秒的 EEG 数据通知。
+        """
+        arrivals = []
+        first_indices = []
+        counts = []
+        lock = threading.Lock()
+
+        def on_data(sensor, data):
+            if data.dataType != self.sensor.DataType.NTF_EEG or not data.channelSamples:
+                return
+            samples = data.channelSamples[0]
+            with lock:
+                arrivals.append(time.perf_counter())
+                first_indices.append(samples[0].sampleIndex)
+                counts.append(len(samples))
+
+        self.profile.onDataCallback = on_data
+        if not self.profile.startDataNotification():
+            raise RuntimeError('开启数据通知失败')
+        start = time.perf_counter()
+        try:
+            time.sleep(duration)
+        finally:
+            self.profile.stopDataNotification()
+            self.profile.onDataCallback = None
+        elapsed = time.perf_counter() - start
+        with lock:
+            arrivals = np.asarray(arrivals)
+            first_indices = np.asarray(first_indices, dtype=np.int64)
+            counts = np.asarray(counts, dtype=np.int64)
+        delivered = int(counts.sum())
+        # 每包第一个样本的序号应紧接上一包最后一个样本
+        expected_first = first_indices[:-1] + counts[:-1]
+        lost = int(np.clip(first_indices[1:] - expected_first, 0, None).sum()) if counts.size > 1 else 0
+        # 包到达时间减去其最后一个样本的理论采集时间，相对最小值的偏移即为送达抖动
+        last_sample_time = (first_indices + counts) / self.sampling_rate
+        delay = arrivals - last_sample_time
+        return {
+            'duration': elapsed,
+            'nominal_rate': self.sampling_rate,
+            'channels': self.channel_count,
+            'packets': int(counts.size),
+            'samples': delivered,
+            'delivered_rate': delivered / elapsed,
+            'rate_ratio': delivered / elapsed / self.sampling_rate,
+            'lost_samples': lost,
+            'callback_interval_ms': {k: v * 1000 for k, v in percentiles(np.diff(arrivals)).items()},
+            'delivery_jitter_ms': {k: v * 1000 for k, v in percentiles(delay - delay.min()).items()}
+            if delay.size else {},
+        }
+
+
+def run_benchmark(address=sensor_sim.DEFAULT_ADDRESS, mode='simulated', duration=10.0, package_count=PACKAGE_COUNT):
+    with SensorThroughputBenchmark(address, mode, package_count) as benchmark:
+        return {
+            'address': address,
+            'mode': mode,
+            'package_count': package_count,
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'stream': benchmark.measure_stream(duration),
+        }
+
+
+def print_report(result):
+    stream = result['stream']
+    print(f"设备 {result['address']}（{result['mode']}），{stream['channels']} 通道，每包 {result['package_count']} 个样本，"
+          f"采集 {stream['duration']:.1f}s")
+    print(f"  送达采样率 {stream['delivered_rate']:.1f} Hz / 标称 {stream['nominal_rate']} Hz"
+          f"（{stream['rate_ratio'] * 100:.1f}%），{stream['packets']} 包，丢失样本 {stream['lost_samples']}")
+    for name in ('callback_interval_ms', 'delivery_jitter_ms'):
+        stats = stream[name]
+        if stats:
+            print(f"  {name[:-3]:<20} p50 {stats['p50']:.2f} ms  p90 {stats['p90']:.2f} ms  "
+                  f"p99 {stats['p99']:.2f} ms  max {stats['max']:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Synchroni 设备吞吐基准')
+    parser.add_argument('--sensor-mode', choices=sensor_sim.SENSOR_MODES, default='simulated',
+                        help='simulated 使用模拟器（默认），hardware 连接真实设备')
+    parser.add_argument('--mac', default=sensor_sim.DEFAULT_ADDRESS, help='被测设备 MAC 地址')
+    parser.add_argument('--duration', type=float, default=10.0, help='测量时长（秒）')
+    parser.add_argument('--package-count', type=int, default=PACKAGE_COUNT, help='init 的每包样本数')
+    parser.add_argument('--min-rate-ratio', type=float, default=0.0,
+                        help='送达采样率低于标称值的该比例时返回非零退出码，例如 0.95')
+    parser.add_argument('--json', help='把结果写入该 JSON 文件')
+    args = parser.parse_args()
+
+    result = run_benchmark(args.mac, args.sensor_mode, args.duration, args.package_count)
+    print_report(result)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    sys.exit(1 if result['stream']['rate_ratio'] < args.min_rate_ratio else 0)
+
+
+if __name__ == '__main__':
+    main()
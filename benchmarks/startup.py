@@ -0,0 +1,168 @@
+"""
+启动耗时基准：每次测量都在全新的解释器中进行，统计各模块的导入耗时和演示程序从进程启动到画布首次绘制的耗时，
+任一指标的中位数超出预算时以非零退出码结束，可直接放进 CI。
+
+用法:
+    python benchmarks/startup.py
+    python benchmarks/startup.py --repeat 5 --json startup.json --offscreen
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+BRAINFLOW_DIR = os.path.join(ROOT, 'test_brain_sdk_api')
+SYNCHRONI_DIR = os.path.join(ROOT, 'synchroni_sdk_api')
+
+# 导入耗时预算（秒）：模块名 -> (模块所在目录, 预算)
+IMPORT_BUDGETS = {
+    'eeg_common.ring_buffer': (ROOT, 0.5),
+    'eeg_common.aggregator': (ROOT, 0.5),
+    'test_brain_sdk_api': (BRAINFLOW_DIR, 1.0),
+    'demo_brain_test2': (BRAINFLOW_DIR, 2.0),
+    'test_synchroni_sdk_api': (SYNCHRONI_DIR, 1.5),
+    'SynchroniSDKPython_Demo': (SYNCHRONI_DIR, 2.0),
+}
+
+# 首帧耗时预算（秒）：模块名 -> (模块所在目录, 主窗口类名, 预算)
+FIRST_FRAME_BUDGETS = {
+    'demo_brain_test2': (BRAINFLOW_DIR, 'EEGDataVisualizer', 2.5),
+    'SynchroniSDKPython_Demo': (SYNCHRONI_DIR, 'BluetoothDeviceScanner', 2.5),
+}
+
+# 子进程中执行：记录画布第一次 paintEvent（像素真正交给窗口系统）的时间
+FIRST_FRAME_SCRIPT = '''
+import sys, time
+sys.path[:0] = {paths!r}
+from PyQt5 import QtWidgets
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
+painted = []
+paint_event = FigureCanvasQTAgg.paintEvent
+def record_paint(self, event):
+    paint_event(self, event)
+    if not painted:
+        painted.append(time.time())
+FigureCanvasQTAgg.paintEvent = record_paint
+app = QtWidgets.QApplication(sys.argv)
+import {module} as demo
+window = demo.{widget}()
+window.show()
+deadline = time.time() + {timeout}
+while not painted and time.time() < deadline:
+    app.processEvents()
+    time.sleep(0.002)
+print('FIRST_FRAME', painted[0] if painted else -1)
+'''
+
+
+class MissingDependency(Exception):
+    """
+    被测模块依赖的第三方库未安装，该项记为跳过而不是失败。
+    """
+
+
+def run_child(args, env=None, timeout=60):
+    result = subprocess.run([sys.executable] + args, capture_output=True, text=True, env=env, timeout=timeout)
+    if result.returncode != 0:
+        last_line = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else ''
+        if 'ModuleNotFoundError' in last_line or 'ImportError' in last_line:
+            raise MissingDependency(last_line)
+        raise RuntimeError(f"子进程退出码 {result.returncode}: {last_line}")
+    return result
+
+
+def measure_import(module, directory):
+    """
+    在全新的解释器中导入 module，返回 -X importtime 报告的累计耗时（秒）。
+    """
+    code = f"import sys; sys.path[:0] = [{directory!r}, {ROOT!r}]; import {module}"
+    result = run_child(['-X', 'importtime', '-c', code])
+    for line in result.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1e6
+    raise RuntimeError(f"importtime 输出中没有找到 {module}")
+
+
+def measure_first_frame(module, directory, widget, offscreen=False, timeout=30):
+    """
+    从启动解释器到主窗口画布首次绘制的耗时（秒），包含解释器启动和全部导入。
+    """
+    env = dict(os.environ)
+    if offscreen:
+        env['QT_QPA_PLATFORM'] = 'offscreen'
+    code = FIRST_FRAME_SCRIPT.format(paths=[directory, ROOT], module=module, widget=widget, timeout=timeout)
+    start = time.time()
+    result = run_child(['-c', code], env=env, timeout=timeout + 30)
+    for line in result.stdout.splitlines():
+        if line.startswith('FIRST_FRAME'):
+            painted = float(line.split()[1])
+            if painted < 0:
+                raise RuntimeError(f"{timeout} 秒内画布没有绘制")
+            return painted - start
+    raise RuntimeError("子进程没有输出首帧时间")
+
+
+def run_benchmark(name, measure, budget, repeat):
+    """
+    重复测量取中位数并与预算比较。
+
+    :return: 结果字典，status 为 ok / over_budget / skipped / error
+    """
+    entry = {'name': name, 'budget': budget, 'samples': []}
+    try:
+        for _ in range(repeat):
+            entry['samples'].append(measure())
+    except MissingDependency as e:
+        entry.update(status='skipped', reason=str(e))
+        return entry
+    except Exception as e:
+        entry.update(status='error', reason=str(e))
+        return entry
+    entry['median'] = statistics.median(entry['samples'])
+    entry['status'] = 'ok' if entry['median'] <= budget else 'over_budget'
+    return entry
+
+
+def run_all(repeat=3, offscreen=False, scale=1.0):
+    """
+    :param scale: 预算放大倍数，用于比开发机慢的 CI 机器
+    """
+    results = []
+    for module, (directory, budget) in IMPORT_BUDGETS.items():
+        results.append(run_benchmark(f'import {module}', lambda: measure_import(module, directory),
+                                     budget * scale, repeat))
+    for module, (directory, widget, budget) in FIRST_FRAME_BUDGETS.items():
+        results.append(run_benchmark(f'first frame {module}',
+                                     lambda: measure_first_frame(module, directory, widget, offscreen),
+                                     budget * scale, repeat))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='测量导入耗时和首帧耗时，超出预算时返回非零退出码')
+    parser.add_argument('--repeat', type=int, default=3, help='每项测量次数，取中位数')
+    parser.add_argument('--json', help='把结果写入该 JSON 文件')
+    parser.add_argument('--offscreen', action='store_true', help='使用 Qt offscreen 平台，无显示器的机器上测量首帧')
+    parser.add_argument('--budget-scale', type=float, default=1.0, help='预算放大倍数')
+    args = parser.parse_args()
+
+    results = run_all(args.repeat, args.offscreen, args.budget_scale)
+    for entry in results:
+        if 'median' in entry:
+            print(f"{entry['name']:<40} {entry['median'] * 1000:8.0f} ms  预算 {entry['budget'] * 1000:6.0f} ms  {entry['status']}")
+        else:
+            print(f"{entry['name']:<40} {entry['status']}: {entry['reason']}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    failed = [entry for entry in results if entry['status'] in ('over_budget', 'error')]
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+from benchmarks.board_throughput import run_benchmark, timestamp_jitter
+
+
+def test_timestamp_jitter_of_regular_stream():
+    timestamps = 1.7e9 + np.arange(500) / 250.0
+    jitter = timestamp_jitter(timestamps, 250)
+    assert jitter['deviation_ms']['max'] < 1e-3
+    assert jitter['backwards'] == 0
+
+
+def test_synthetic_board_throughput():
+    result = run_benchmark(duration=2.0, buffer_sizes=(100, 10000), hold=1.0)
+    stream = result['stream']
+    assert stream['rate_ratio'] == pytest.approx(1.0, abs=0.1)
+    assert stream['lost_samples'] == 0
+    assert stream['get_board_data_ms']['p50'] > 0
+    small, large = result['overflow']
+    assert small['overflow'] and small['buffered_samples'] == 100
+    assert not large['overflow']
@@ -0,0 +1,24 @@
+import os
+
+import pytest
+
+
+def test_simulated_demo_recovers_from_faults():
+    pytest.importorskip('PyQt5')
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    os.environ['SYNCHRONI_MODE'] = 'simulated'
+    from PyQt5 import QtWidgets
+
+    from benchmarks.fault_recovery import run_benchmark
+    import sensor_sim
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    result = run_benchmark(app, sensor_sim.DEFAULT_ADDRESS, kinds=('disconnect', 'drop', 'set_param'),
+                           duration=0.3, observe=2.0, settle=0.5)
+    faults = {entry['kind']: entry for entry in result['faults']}
+    assert all(entry['recovery_s'] is not None for entry in faults.values())
+    assert faults['disconnect']['reconnect_s'] is not None
+    assert faults['disconnect']['lost_samples'] > 0
+    assert faults['drop']['lost_samples'] > 0
+    assert faults['set_param']['set_param_failures'] > 0
+    assert faults['set_param']['lost_samples'] == 0
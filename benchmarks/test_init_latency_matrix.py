@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from benchmarks.init_latency_matrix import run_benchmark, sample_latency
+import sensor_sim
+
+
+def test_sample_latency_includes_packetization_wait():
+    # 250 Hz，每包 5 个样本，第二包晚到 10ms
+    arrivals = np.array([0.020, 0.050, 0.060])
+    latency = sample_latency(arrivals, [0, 5, 10], [5, 5, 5], 250)
+    assert latency.shape == (15,)
+    np.testing.assert_allclose(latency[:5], [0.016, 0.012, 0.008, 0.004, 0.0], atol=1e-9)
+    np.testing.assert_allclose(latency[5:10], latency[:5] + 0.010, atol=1e-9)
+    assert sample_latency([], [], [], 250).size == 0
+
+
+@pytest.fixture
+def simulated_device():
+    device = sensor_sim.SimulatedDevice(sample_rate=500, connect_delay=0.02)
+    sensor_sim.configure(device)
+    yield device
+    sensor_sim.configure(*sensor_sim.parse_options(None))
+
+
+def test_matrix_on_simulated_sensor(simulated_device):
+    result = run_benchmark(simulated_device.address, package_counts=(2, 50), power_refresh_periods=(200,),
+                           repeats=1, duration=1.0)
+    small, large = result['results']
+    assert (small['package_count'], large['package_count']) == (2, 50)
+    assert small['packets_per_s'] == pytest.approx(250, rel=0.1)
+    assert large['packets_per_s'] == pytest.approx(10, rel=0.2)
+    # 每包样本越多，首包越晚、攒包等待越长
+    assert large['first_packet_ms'] > small['first_packet_ms']
+    assert large['sample_latency_p50_ms'] > small['sample_latency_p50_ms'] + 20
+    assert small['power_updates'] >= 3
@@ -0,0 +1,26 @@
+import os
+
+import pytest
+
+# 比开发机慢的 CI 机器可以通过环境变量放大预算
+BUDGET_SCALE = float(os.environ.get('PIPELINE_BUDGET_SCALE', '1.0'))
+
+
+def test_playback_pipeline_is_deterministic_and_within_budget(tmp_path):
+    pytest.importorskip('PyQt5')
+    pytest.importorskip('brainflow')
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5 import QtWidgets
+
+    from benchmarks.playback_pipeline import FRAME_BUDGET, make_session, run_benchmark
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    session_dir = str(tmp_path / 'session')
+    count = make_session(session_dir, seconds=12, channels=4)
+    first = run_benchmark(app, session_dir, period='5s')
+    second = run_benchmark(app, session_dir, period='5s')
+    # 每帧推进固定的 0.1 秒数据，两次回放的帧数和显示内容完全相同
+    assert first['samples'] == count and first['frames'] == count // 25
+    assert (second['frames'], second['display_digest']) == (first['frames'], first['display_digest'])
+    assert first['filter_ms']['p50'] > 0 and first['render_ms']['p50'] > 0
+    assert first['total_ms']['p50'] <= FRAME_BUDGET * 1000 * BUDGET_SCALE
@@ -0,0 +1,22 @@
+import pytest
+
+from benchmarks.sensor_throughput import run_benchmark
+import sensor_sim
+
+
+@pytest.fixture
+def simulated_device():
+    device = sensor_sim.SimulatedDevice(channels=4, sample_rate=500, loss=0.05, jitter=0.01, seed=3)
+    sensor_sim.configure(device)
+    yield device
+    sensor_sim.configure(*sensor_sim.parse_options(None))
+
+
+def test_simulated_sensor_throughput(simulated_device):
+    result = run_benchmark(simulated_device.address, duration=2.0)
+    stream = result['stream']
+    assert stream['channels'] == 4 and stream['nominal_rate'] == 500
+    # 丢包的样本按序号计入 lost_samples，送达的加上丢失的应接近标称速率
+    assert (stream['samples'] + stream['lost_samples']) / stream['duration'] == pytest.approx(500, rel=0.1)
+    assert stream['lost_samples'] > 0
+    assert stream['delivery_jitter_ms']['max'] <= 20 + 5
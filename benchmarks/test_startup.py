@@ -0,0 +1,30 @@
+import os
+
+import pytest
+
+from benchmarks.startup import (FIRST_FRAME_BUDGETS, IMPORT_BUDGETS, MissingDependency,
+                                measure_first_frame, measure_import)
+
+# 比开发机慢的 CI 机器可以通过环境变量放大预算
+BUDGET_SCALE = float(os.environ.get('STARTUP_BUDGET_SCALE', '1.0'))
+
+
+@pytest.mark.parametrize('module', list(IMPORT_BUDGETS))
+def test_import_time_within_budget(module):
+    directory, budget = IMPORT_BUDGETS[module]
+    try:
+        elapsed = measure_import(module, directory)
+    except MissingDependency as e:
+        pytest.skip(str(e))
+    assert elapsed <= budget * BUDGET_SCALE, f"导入 {module} 耗时 {elapsed:.3f}s，超出预算 {budget * BUDGET_SCALE:.3f}s"
+
+
+@pytest.mark.parametrize('module', list(FIRST_FRAME_BUDGETS))
+def test_first_frame_within_budget(module):
+    pytest.importorskip('PyQt5')
+    directory, widget, budget = FIRST_FRAME_BUDGETS[module]
+    try:
+        elapsed = measure_first_frame(module, directory, widget, offscreen=True)
+    except MissingDependency as e:
+        pytest.skip(str(e))
+    assert elapsed <= budget * BUDGET_SCALE, f"{module} 首帧耗时 {elapsed:.3f}s，超出预算 {budget * BUDGET_SCALE:.3f}s"
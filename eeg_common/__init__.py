@@ -0,0 +1,4 @@
+"""
+两个 demo（brainflow 的 EEGDataVisualizer 与 Synchroni 的 BluetoothDeviceScanner）及测试脚本共用的
+数据处理模块，均不依赖界面库，按需从子模块导入。
+"""
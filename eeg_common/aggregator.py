@@ -0,0 +1,239 @@
+import logging
+import threading
+
+import numpy as np
+
+from eeg_common.clock_sync import ClockDriftEstimator
+from eeg_common.packet_loss import PacketLossTracker, package_steps
+from eeg_common.ring_buffer import RingBuffer
+
+logger = logging.getLogger(__name__)
+
+
+class BoardStream:
+    """
+    单块板子的采集线程：按固定间隔取走 BoardShim 中的全部新数据，写入本板的环形缓冲区。
+
+    缓冲区每一行依次为脑电通道、时间戳、标记，按同一绝对样本序号对齐；
+    读写都在 lock 下进行，消费端只需保存自己的绝对序号。
+    启用时钟校正时，时间戳一行存放按漂移拟合校正后的主机时间，而不是板子上报的原始时间戳。
+    """
+
+    def __init__(self, board_shim, board_id, capacity_seconds=10.0, poll_interval=0.02, name=None,
+                 clock_sync=True):
+        """
+        :param board_shim: 已 prepare_session 的 BoardShim（或接口兼容的 PlaybackBoard）
+        :param board_id: 板子 ID，用于查询通道信息
+        :param capacity_seconds: 本板环形缓冲区容量（秒），消费端落后超过该时长时最旧的数据被覆盖
+        :param poll_interval: 取数间隔（秒）
+        :param name: 日志中显示的名称，默认为 board_id
+        :param clock_sync: 是否用 ClockDriftEstimator 校正时间戳
+        """
+        self.board_shim = board_shim
+        self.board_id = board_id
+        self.name = name or str(board_id)
+        self.eeg_channels = board_shim.get_eeg_channels(board_id)
+        self.sampling_rate = board_shim.get_sampling_rate(board_id)
+        self.timestamp_channel = board_shim.get_timestamp_channel(board_id)
+        self.marker_channel = board_shim.get_marker_channel(board_id)
+        self.rows = list(self.eeg_channels) + [self.timestamp_channel, self.marker_channel]
+        self.buffer = RingBuffer(len(self.rows), max(1, int(capacity_seconds * self.sampling_rate)))
+        self.clock = ClockDriftEstimator(self.sampling_rate) if clock_sync else None
+        # 按包序号统计丢包；回放板等没有包序号通道的数据源不统计
+        get_package_num_channel = getattr(board_shim, 'get_package_num_channel', None)
+        self.package_num_channel = get_package_num_channel(board_id) if get_package_num_channel else None
+        self.loss = (PacketLossTracker(sampling_rate=self.sampling_rate)
+                     if self.package_num_channel is not None else None)
+        self.poll_interval = poll_interval
+        # 最近一个样本按包序号展开的设备端样本序号及其包序号，时钟校正按它拟合
+        self._sample_index = -1
+        self._last_package = None
+        self.lock = threading.Lock()
+        # 采集线程中最近一次出错的异常，正常时为None
+        self.error = None
+        self._last_timestamp = -np.inf
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def channel_count(self):
+        return len(self.eeg_channels)
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=f'board-{self.name}', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self.loss is not None and self.loss.lost:
+            logger.info(f"板子 {self.name} 共丢失 {self.loss.lost} 个包（{self.loss.loss_rate * 100:.3f}%），"
+                        f"最长缺口 {self.loss.longest_gap}")
+        if self.clock is not None and self.clock.ready:
+            logger.info(f"板子 {self.name} 时钟漂移 {self.clock.drift_ppm:.1f} ppm，"
+                        f"实际采样率 {self.clock.effective_rate:.3f} Hz，剔除异常时间戳 {self.clock.rejected} 个")
+
+    def poll(self):
+        """
+        取走板子上的全部新数据写入缓冲区，返回新样本数。
+        """
+        data = self.board_shim.get_board_data()
+        if data.shape[1] == 0:
+            return 0
+        if self.loss is not None:
+            report = self.loss.update_board_data(data, self.package_num_channel, self.timestamp_channel)
+            if report.gap_count:
+                logger.debug(f"板子 {self.name} 丢失 {report.lost} 个包，位置 {report.positions.tolist()}")
+        block = data[self.rows]
+        if self.package_num_channel is not None:
+            # 丢包后的样本按设备实际的采样序号拟合，而不是按收到的样本数；
+            # 长于一圈的中断在这里看不出，由 ClockDriftEstimator 连续剔除后重新拟合
+            package_nums = data[self.package_num_channel]
+            indices = self._sample_index + np.cumsum(package_steps(package_nums, self._last_package))
+            self._sample_index = int(indices[-1])
+            self._last_package = int(np.rint(package_nums[-1]))
+        else:
+            indices = self.buffer.head + np.arange(block.shape[1])
+        if self.clock is not None:
+            self.clock.update(indices, block[-2])
+            block[-2] = self.clock.corrected(indices)
+        # 时间戳偶有回退（主机时钟调整、BLE 批量到达），强制单调不减，便于按时间二分查找
+        timestamps = np.maximum.accumulate(np.maximum(block[-2], self._last_timestamp))
+        block[-2] = timestamps
+        self._last_timestamp = timestamps[-1]
+        with self.lock:
+            self.buffer.write(block)
+        return data.shape[1]
+
+    def read_from(self, start):
+        """
+        读取从绝对序号 start（早于 tail 时从 tail 开始）到最新的数据。
+
+        :return: (实际起始序号, 脑电数据, 时间戳, 标记)
+        """
+        with self.lock:
+            start = max(start, self.buffer.tail)
+            block = self.buffer.read(start, max(start, self.buffer.head))
+        return start, block[:-2], block[-2], block[-1]
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.poll()
+                self.error = None
+            except Exception as e:
+                if self.error is None:
+                    logger.error(f"板子 {self.name} 取数出错: {str(e)}")
+                self.error = e
+            self._stop_event.wait(self.poll_interval)
+
+
+class BoardAggregator:
+    """
+    把多块板子的数据按各自的时间戳对齐到同一条时间轴上。
+
+    公共时间轴的采样率默认取各板最高采样率，起点为所有板子都有数据后最晚的首样本时间；
+    每次只输出所有板子都已覆盖到的时间段，各板在网格时刻上线性插值，标记对齐到最近的网格点。
+    只有一块板子时直接透传原始样本和时间戳，不做插值。
+    """
+
+    def __init__(self, streams, sampling_rate=None):
+        """
+        :param streams: BoardStream 列表，合并后的通道按列表顺序拼接
+        :param sampling_rate: 公共时间轴的采样率，默认取各板最高采样率
+        """
+        self.streams = list(streams)
+        if not self.streams:
+            raise ValueError("至少需要一块板子")
+        self.sampling_rate = sampling_rate or max(stream.sampling_rate for stream in self.streams)
+        self.channel_count = sum(stream.channel_count for stream in self.streams)
+        # 公共时间轴起点（秒），所有板子都有数据后确定
+        self.start_time = None
+        # 已输出的网格点数
+        self.samples_emitted = 0
+        # 每块板子下一次插值用到的左邻样本序号，以及尚未处理标记的第一个样本序号
+        self._cursors = [0] * len(self.streams)
+        self._marker_cursors = [0] * len(self.streams)
+
+    @property
+    def lost_packets(self):
+        """
+        各板累计丢失的包数之和。
+        """
+        return sum(stream.loss.lost for stream in self.streams if stream.loss is not None)
+
+    def start(self):
+        for stream in self.streams:
+            stream.start()
+
+    def stop(self):
+        for stream in self.streams:
+            stream.stop()
+
+    def poll_streams(self):
+        """
+        不启动采集线程时，在调用方线程中让各板同步取一次数。确定性回放由界面刷新调用，
+        每次刷新推进固定的样本数，结果不受线程调度影响。
+        """
+        for stream in self.streams:
+            stream.poll()
+
+    def _empty(self):
+        return np.zeros((self.channel_count, 0)), np.zeros(0), np.zeros(0)
+
+    def poll(self):
+        """
+        取出自上次调用以来可以输出的合并数据。
+
+        :return: (samples, timestamps, markers)，samples 形状为 (channel_count, n)
+        """
+        if len(self.streams) == 1:
+            start, samples, timestamps, markers = self.streams[0].read_from(self._cursors[0])
+            self._cursors[0] = start + samples.shape[1]
+            self.samples_emitted += samples.shape[1]
+            return samples, timestamps, markers
+
+        views = []
+        for index, stream in enumerate(self.streams):
+            view = stream.read_from(self._cursors[index])
+            if view[1].shape[1] == 0:
+                return self._empty()
+            views.append(view)
+        if self.start_time is None:
+            self.start_time = max(view[2][0] for view in views)
+            logger.info(f"{len(self.streams)} 块板子均已有数据，公共时间轴起点 {self.start_time:.3f}")
+        end_time = min(view[2][-1] for view in views)
+        first = self.samples_emitted
+        last = int(np.floor((end_time - self.start_time) * self.sampling_rate)) + 1
+        if last <= first:
+            return self._empty()
+        grid = self.start_time + np.arange(first, last) / self.sampling_rate
+
+        merged = np.empty((self.channel_count, grid.size))
+        merged_markers = np.zeros(grid.size)
+        row = 0
+        for index, (start, samples, timestamps, markers) in enumerate(views):
+            count = timestamps.size
+            consumed = int(np.searchsorted(timestamps, grid[-1], side='right'))
+            right = np.searchsorted(timestamps, grid, side='right')
+            left = np.clip(right - 1, 0, count - 1)
+            right = np.minimum(right, count - 1)
+            span = timestamps[right] - timestamps[left]
+            weight = np.divide(grid - timestamps[left], span, out=np.zeros_like(grid), where=span > 0)
+            np.clip(weight, 0.0, 1.0, out=weight)
+            channels = samples.shape[0]
+            merged[row:row + channels] = samples[:, left] * (1.0 - weight) + samples[:, right] * weight
+            row += channels
+
+            offset = max(0, self._marker_cursors[index] - start)
+            marked = np.flatnonzero(markers[offset:consumed]) + offset
+            if marked.size:
+                positions = np.rint((timestamps[marked] - self.start_time) * self.sampling_rate).astype(np.int64)
+                merged_markers[np.clip(positions - first, 0, grid.size - 1)] = markers[marked]
+            self._cursors[index] = start + int(left[-1])
+            self._marker_cursors[index] = start + consumed
+        self.samples_emitted = last
+        return merged, grid, merged_markers
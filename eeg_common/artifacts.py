@@ -0,0 +1,129 @@
+import numpy as np
+
+from eeg_common.ring_buffer import RingBuffer
+
+# 伪迹类型，按位组合存放在掩码缓冲区中，0 表示正常
+AMPLITUDE = 1     # 幅值超限（眨眼、运动等）
+FLATLINE = 2      # 平直线（电极脱落、通道失效）
+CLIPPING = 4      # 削顶/贴轨（放大器饱和）
+LINE_NOISE = 8    # 50/60 Hz 工频干扰占比过高
+GRADIENT = 16     # 相邻样本跳变过大（接触不良、瞬态干扰）
+
+
+def find_segments(mask):
+    """
+    找出一维布尔掩码中连续为 True 的片段。
+
+    :return: [(start, stop), ...]，stop 不含
+    """
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    stops = np.flatnonzero(edges == -1)
+    return list(zip(starts.tolist(), stops.tolist()))
+
+
+class ArtifactDetector:
+    """
+    流式伪迹检测：新数据按固定长度的窗口切分，所有完整窗口、所有通道一次性向量化计算各项指标，
+    每次更新的开销只与新样本数成正比。
+
+    检测结果按样本展开写入与数据环形缓冲区对齐的掩码环形缓冲区 mask（同一绝对样本序号），
+    不足一个窗口的尾部数据留到下次更新，因此 mask.head 最多比数据落后一个窗口。
+    坏通道按各通道被标记窗口比例的指数滑动平均判定。
+    """
+
+    def __init__(self, channel_count, sampling_rate, capacity, window_seconds=1.0,
+                 amplitude_threshold=150.0, flat_threshold=0.5, clip_fraction=0.1,
+                 line_frequencies=(50.0, 60.0), line_ratio_threshold=0.5,
+                 gradient_threshold=100.0, bad_channel_fraction=0.5, channel_smoothing=0.1):
+        """
+        :param channel_count: 通道数
+        :param sampling_rate: 采样率
+        :param capacity: 掩码缓冲区容量，与数据环形缓冲区一致
+        :param window_seconds: 检测窗口长度（秒），1 秒时频率分辨率为 1 Hz
+        :param amplitude_threshold: 去均值后的最大绝对幅值阈值（uV）
+        :param flat_threshold: 标准差低于该值判为平直线（uV）
+        :param clip_fraction: 窗口内停在最大/最小值上的样本比例超过该值判为削顶
+        :param line_frequencies: 工频频率
+        :param line_ratio_threshold: 工频附近功率占总功率（不含直流）比例的阈值
+        :param gradient_threshold: 相邻样本差值的绝对值阈值（uV）
+        :param bad_channel_fraction: 被标记窗口比例的滑动平均超过该值判为坏通道
+        :param channel_smoothing: 滑动平均系数，越大对近期窗口越敏感
+        """
+        self.channel_count = channel_count
+        self.sampling_rate = sampling_rate
+        self.window_samples = max(2, int(window_seconds * sampling_rate))
+        self.amplitude_threshold = amplitude_threshold
+        self.flat_threshold = flat_threshold
+        self.clip_fraction = clip_fraction
+        self.line_ratio_threshold = line_ratio_threshold
+        self.gradient_threshold = gradient_threshold
+        self.bad_channel_fraction = bad_channel_fraction
+        self.channel_smoothing = channel_smoothing
+        self.mask = RingBuffer(channel_count, capacity, dtype=np.uint8)
+        self.channel_score = np.zeros(channel_count)
+        self._pending = np.zeros((channel_count, 0))
+        self._last_sample = None
+        freqs = np.fft.rfftfreq(self.window_samples, 1.0 / sampling_rate)
+        resolution = max(1.0, sampling_rate / self.window_samples)
+        self._line_bins = np.zeros(freqs.shape, dtype=bool)
+        for frequency in line_frequencies:
+            self._line_bins |= np.abs(freqs - frequency) <= resolution
+        self._power_bins = freqs > 0
+
+    @property
+    def bad_channels(self):
+        """
+        布尔数组，True 表示该通道近期大部分窗口都有伪迹。
+        """
+        return self.channel_score > self.bad_channel_fraction
+
+    def update(self, block):
+        """
+        送入新数据，返回本次检测完成的窗口标记，形状为 (channel_count, 窗口数)。
+
+        :param block: 形状为 (channel_count, n) 的新数据
+        """
+        data = np.concatenate((self._pending, block), axis=1) if self._pending.shape[1] else block
+        count = data.shape[1] // self.window_samples
+        self._pending = data[:, count * self.window_samples:].copy()
+        if count == 0:
+            return np.zeros((self.channel_count, 0), dtype=np.uint8)
+        windows = data[:, :count * self.window_samples].reshape(self.channel_count, count, self.window_samples)
+        flags = self.evaluate(windows)
+        self.mask.write(np.repeat(flags, self.window_samples, axis=1))
+        decay = (1.0 - self.channel_smoothing) ** np.arange(count - 1, -1, -1)
+        self.channel_score = (self.channel_score * (1.0 - self.channel_smoothing) ** count
+                              + self.channel_smoothing * ((flags != 0) * decay).sum(axis=1))
+        return flags
+
+    def evaluate(self, windows):
+        """
+        对形状为 (通道, 窗口, 样本) 的数据逐窗口计算伪迹标记。
+        """
+        flags = np.zeros(windows.shape[:2], dtype=np.uint8)
+        centered = windows - windows.mean(axis=2, keepdims=True)
+        flags[np.abs(centered).max(axis=2) > self.amplitude_threshold] |= AMPLITUDE
+
+        std = windows.std(axis=2)
+        flat = std < self.flat_threshold
+        flags[flat] |= FLATLINE
+
+        pinned = ((windows == windows.max(axis=2, keepdims=True))
+                  | (windows == windows.min(axis=2, keepdims=True))).mean(axis=2)
+        flags[(pinned > self.clip_fraction) & ~flat] |= CLIPPING
+
+        power = np.abs(np.fft.rfft(centered, axis=2)) ** 2
+        line = power[..., self._line_bins].sum(axis=2)
+        total = power[..., self._power_bins].sum(axis=2)
+        ratio = np.divide(line, total, out=np.zeros_like(line), where=total > 0)
+        flags[ratio > self.line_ratio_threshold] |= LINE_NOISE
+
+        # 每个窗口的第一个差分接上前一个窗口的最后一个样本，跨窗口的跳变也能检出
+        previous = np.empty(windows.shape[:2])
+        previous[:, 1:] = windows[:, :-1, -1]
+        previous[:, 0] = windows[:, 0, 0] if self._last_sample is None else self._last_sample
+        self._last_sample = windows[:, -1, -1].copy()
+        steps = np.abs(np.diff(np.concatenate((previous[:, :, None], windows), axis=2), axis=2)).max(axis=2)
+        flags[steps > self.gradient_threshold] |= GRADIENT
+        return flags
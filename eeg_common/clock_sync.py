@@ -0,0 +1,137 @@
+import numpy as np
+
+
+class ClockDriftEstimator:
+    """
+    在线估计设备采样时钟相对主机时钟的漂移，并把样本序号换算为主机时间。
+
+    对 (样本序号, 主机到达时间) 做带遗忘因子的流式线性拟合：斜率为每个样本实际占用的主机时间，
+    截距吸收平均传输延迟。权重按样本序号指数衰减（半衰期 half_life 秒），长时间运行时拟合跟随
+    缓慢变化的漂移，内存和每次更新的开销与运行时长无关。
+
+    残差超过 outlier_factor 倍平均绝对残差的观测（蓝牙重传、系统卡顿造成的迟到包）不参与拟合；
+    连续被拒的观测过多说明发生了时钟跳变（重连、主机校时），此时丢弃旧拟合重新开始。
+    """
+
+    def __init__(self, nominal_rate, half_life=600.0, min_points=20, outlier_factor=4.0,
+                 min_tolerance=0.005, max_rejections=200, smoothing=0.05):
+        """
+        :param nominal_rate: 标称采样率（Hz）
+        :param half_life: 拟合权重的半衰期（秒，按标称采样率换算为样本数）
+        :param min_points: 开始剔除异常值、使用拟合斜率前至少需要的观测数
+        :param outlier_factor: 残差超过该倍数的平均绝对残差时判为异常
+        :param min_tolerance: 判为异常的残差下限（秒），避免抖动很小时过度剔除
+        :param max_rejections: 连续被拒的观测数超过该值时重新开始拟合
+        :param smoothing: 平均绝对残差的滑动平均系数
+        """
+        self.nominal_rate = nominal_rate
+        self.half_life_samples = half_life * nominal_rate
+        self.min_points = min_points
+        self.outlier_factor = outlier_factor
+        self.min_tolerance = min_tolerance
+        self.max_rejections = max_rejections
+        self.smoothing = smoothing
+        # 累计被剔除的观测数和重新开始拟合的次数
+        self.rejected = 0
+        self.resets = 0
+        self.reset()
+
+    def reset(self):
+        # 拟合在以首个观测为原点的坐标系中进行，避免 unix 时间戳的大数值损失精度
+        self._origin = None
+        self._latest = 0.0
+        self._sums = np.zeros(5)  # 加权的 w, x, y, xx, xy
+        self._slope = 1.0 / self.nominal_rate
+        self._intercept = 0.0
+        self._scale = 0.0
+        self._consecutive_rejections = 0
+        self.count = 0
+
+    @property
+    def ready(self):
+        return self.count >= self.min_points
+
+    @property
+    def slope(self):
+        """
+        每个样本占用的主机时间（秒）。
+        """
+        return self._slope
+
+    @property
+    def effective_rate(self):
+        """
+        按主机时钟计量的实际采样率（Hz）。
+        """
+        return 1.0 / self._slope
+
+    @property
+    def drift_ppm(self):
+        """
+        设备时钟相对标称值的偏差（ppm），正值表示设备偏慢，即实际采样率低于标称值。
+        """
+        return (self._slope * self.nominal_rate - 1.0) * 1e6
+
+    def update(self, indices, arrival_times):
+        """
+        加入一批观测。
+
+        :param indices: 样本的绝对序号，标量或一维数组，需单调不减
+        :param arrival_times: 对应样本的主机时间（秒）
+        :return: 布尔数组，表示每个观测是否参与了拟合
+        """
+        indices = np.atleast_1d(np.asarray(indices, dtype=np.float64))
+        arrival_times = np.atleast_1d(np.asarray(arrival_times, dtype=np.float64))
+        if indices.size == 0:
+            return np.zeros(0, dtype=bool)
+        if self._origin is None:
+            self._origin = (indices[0], arrival_times[0])
+        x = indices - self._origin[0]
+        y = arrival_times - self._origin[1]
+
+        accepted = np.ones(x.size, dtype=bool)
+        if self.ready:
+            residual = np.abs(y - (self._intercept + self._slope * x))
+            accepted = residual <= max(self.outlier_factor * self._scale, self.min_tolerance)
+            rejected = x.size - int(accepted.sum())
+            self.rejected += rejected
+            if accepted.any():
+                self._consecutive_rejections = 0
+                self._scale += self.smoothing * (residual[accepted].mean() - self._scale)
+            else:
+                self._consecutive_rejections += rejected
+                if self._consecutive_rejections > self.max_rejections:
+                    self.resets += 1
+                    self.reset()
+                    return self.update(indices, arrival_times)
+                return accepted
+
+        latest = max(self._latest, x[-1])
+        x, y = x[accepted], y[accepted]
+        weights = 0.5 ** ((latest - x) / self.half_life_samples)
+        self._sums *= 0.5 ** ((latest - self._latest) / self.half_life_samples)
+        self._sums += (weights.sum(), weights @ x, weights @ y, weights @ (x * x), weights @ (x * y))
+        self._latest = latest
+        was_ready = self.ready
+        self.count += x.size
+        self._fit()
+        if self.ready and not was_ready:
+            # 首次拟合完成，用拟合残差初始化异常判定的尺度
+            self._scale = float(np.mean(np.abs(y - (self._intercept + self._slope * x))))
+        return accepted
+
+    def _fit(self):
+        w, sx, sy, sxx, sxy = self._sums
+        denominator = w * sxx - sx * sx
+        if self.ready and denominator > 1e-12 * w * sxx:
+            self._slope = (w * sxy - sx * sy) / denominator
+        self._intercept = (sy - self._slope * sx) / w
+
+    def corrected(self, indices):
+        """
+        按当前拟合把样本序号换算为主机时间（秒）。拟合就绪前按标称采样率外推。
+        """
+        indices = np.asarray(indices, dtype=np.float64)
+        if self._origin is None:
+            raise ValueError("尚无观测，无法换算时间戳")
+        return self._origin[1] + self._intercept + self._slope * (indices - self._origin[0])
@@ -0,0 +1,246 @@
+"""
+设备矩阵测试：对一组被测设备分别运行同一套 SDK 测试用例，每台设备在独立的 pytest 子进程中执行，
+互不共享 BoardShim / SensorController 状态，一台设备卡死或崩溃不影响其他设备，结果汇总成一份报告。
+
+被测设备通过环境变量传给测试脚本：brainflow 用例读取 BRAINFLOW_BOARD_ID / BRAINFLOW_MAC，
+双板用例的第二块板子读取 BRAINFLOW_BOARD_ID2 / BRAINFLOW_MAC2（未指定时为空，双板用例跳过）；
+Synchroni 用例读取 SYNCHRONI_MAC。每块板子只能出现在一个被测设备中，避免并行的子进程争用同一块板子。
+
+用法:
+    python -m eeg_common.device_matrix --suite brainflow --target 57/C4:64:E3:D8:E6:D2 --target 58/C4:64:E3:D8:E9:E2
+    python -m eeg_common.device_matrix --suite brainflow --target 57/C4:64:E3:D8:E6:D2,58/C4:64:E3:D8:E3:EE
+    python -m eeg_common.device_matrix --suite synchroni --targets-file devices.txt --report matrix.json -- -k scan
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+# 测试套件：名称 -> (所在目录, 测试文件)
+SUITES = {
+    'brainflow': (os.path.join(ROOT, 'test_brain_sdk_api'), 'test_brain_sdk_api.py'),
+    'synchroni': (os.path.join(ROOT, 'synchroni_sdk_api'), 'test_synchroni_sdk_api.py'),
+}
+
+OUTCOMES = ('passed', 'failed', 'error', 'skipped')
+# 同一用例出现多条记录时按严重程度取结果
+SEVERITY = {'passed': 0, 'skipped': 1, 'failed': 2, 'error': 3}
+
+
+def parse_target(text, suite='brainflow'):
+    """
+    解析一个被测设备：brainflow 为 "board_id/mac[,board_id2/mac2]"（合成板等无需 MAC 的板子可只写 board_id，
+    逗号后为双板用例使用的第二块板子），synchroni 为 MAC 地址。
+
+    :return: {'name', 'board_id', 'mac', 'board_id2', 'mac2'}，synchroni 的 board_id 为 None，
+        未指定第二块板子时 board_id2 为 None
+    """
+    text = text.strip()
+    if not text:
+        raise ValueError("被测设备不能为空")
+    if suite == 'synchroni':
+        return {'name': text, 'board_id': None, 'mac': text}
+    first, _, second = text.partition(',')
+    board_id, mac = _parse_board(first, text)
+    board_id2, mac2 = _parse_board(second, text) if second.strip() else (None, '')
+    return {'name': text, 'board_id': board_id, 'mac': mac, 'board_id2': board_id2, 'mac2': mac2}
+
+
+def _parse_board(text, target):
+    board_id, _, mac = text.partition('/')
+    try:
+        board_id = int(board_id)
+    except ValueError:
+        raise ValueError(f"无效的被测设备 {target!r}，格式应为 board_id/mac[,board_id2/mac2]")
+    return board_id, mac.strip()
+
+
+def target_devices(target):
+    """
+    :return: 该被测设备占用的板子列表，brainflow 为 (board_id, mac)，synchroni 为 MAC
+    """
+    if target['board_id'] is None:
+        return [target['mac']]
+    devices = [(target['board_id'], target['mac'])]
+    if target.get('board_id2') is not None:
+        devices.append((target['board_id2'], target['mac2']))
+    return devices
+
+
+def read_targets_file(path, suite='brainflow'):
+    """
+    每行一个被测设备，忽略空行和 # 开头的注释行。
+    """
+    targets = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                targets.append(parse_target(line, suite))
+    return targets
+
+
+def target_env(target, suite):
+    env = dict(os.environ)
+    if suite == 'synchroni':
+        env['SYNCHRONI_MAC'] = target['mac']
+    else:
+        env['BRAINFLOW_BOARD_ID'] = str(target['board_id'])
+        env['BRAINFLOW_MAC'] = target['mac']
+        # 空值表示没有第二块板子，不能落回测试脚本里的默认板子
+        board_id2 = target.get('board_id2')
+        env['BRAINFLOW_BOARD_ID2'] = '' if board_id2 is None else str(board_id2)
+        env['BRAINFLOW_MAC2'] = target.get('mac2', '')
+    return env
+
+
+def parse_junit(path):
+    """
+    解析 pytest --junitxml 生成的报告。
+
+    :return: {用例名: {'outcome', 'duration', 'message'}}
+    """
+    results = {}
+    for case in ET.parse(path).getroot().iter('testcase'):
+        name = f"{case.get('classname', '')}::{case.get('name')}".lstrip(':')
+        outcome, message = 'passed', ''
+        for child in case:
+            if child.tag in ('failure', 'error', 'skipped'):
+                outcome = 'failed' if child.tag == 'failure' else child.tag
+                message = child.get('message', '') or ''
+                break
+        # 同一用例在 teardown 出错时会重复出现，保留更严重的结果
+        previous = results.get(name)
+        if previous is None or SEVERITY[outcome] > SEVERITY[previous['outcome']]:
+            results[name] = {'outcome': outcome, 'duration': float(case.get('time', 0) or 0), 'message': message}
+    return results
+
+
+def run_target(target, suite, output_dir, pytest_args=(), timeout=None):
+    """
+    在独立子进程中对一台设备运行测试套件。
+
+    :param timeout: 单台设备的总超时（秒），超时后子进程被杀掉，该设备记为 timeout
+    :return: 该设备的结果字典
+    """
+    directory, test_file = SUITES[suite]
+    safe_name = ''.join(c if c.isalnum() else '_' for c in target['name'])
+    junit_path = os.path.join(output_dir, f'{suite}_{safe_name}.xml')
+    log_path = os.path.join(output_dir, f'{suite}_{safe_name}.log')
+    if os.path.exists(junit_path):
+        os.remove(junit_path)
+    command = [sys.executable, '-m', 'pytest', test_file, f'--junitxml={junit_path}',
+               '-p', 'no:cacheprovider', '-q'] + list(pytest_args)
+    entry = dict(target, log=log_path)
+    start = time.time()
+    with open(log_path, 'w', encoding='utf-8') as log:
+        try:
+            result = subprocess.run(command, cwd=directory, env=target_env(target, suite),
+                                    stdout=log, stderr=subprocess.STDOUT, timeout=timeout)
+            entry['returncode'] = result.returncode
+            entry['status'] = 'ok' if result.returncode == 0 else 'failed'
+        except subprocess.TimeoutExpired:
+            entry['returncode'] = None
+            entry['status'] = 'timeout'
+    entry['duration'] = time.time() - start
+    entry['tests'] = parse_junit(junit_path) if os.path.exists(junit_path) else {}
+    if not entry['tests'] and entry['status'] == 'ok':
+        entry['status'] = 'failed'
+    entry['summary'] = {outcome: sum(1 for test in entry['tests'].values() if test['outcome'] == outcome)
+                        for outcome in OUTCOMES}
+    return entry
+
+
+def build_report(suite, entries):
+    """
+    汇总各设备结果，生成 用例 × 设备 的结果矩阵。
+    """
+    names = []
+    for entry in entries:
+        for name in entry['tests']:
+            if name not in names:
+                names.append(name)
+    matrix = {name: {entry['name']: entry['tests'].get(name, {}).get('outcome', 'missing') for entry in entries}
+              for name in names}
+    totals = {outcome: sum(entry['summary'][outcome] for entry in entries) for outcome in OUTCOMES}
+    return {
+        'suite': suite,
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'ok': all(entry['status'] == 'ok' for entry in entries),
+        'totals': totals,
+        'targets': entries,
+        'matrix': matrix,
+    }
+
+
+def run_matrix(targets, suite='brainflow', output_dir='device_matrix', workers=None, pytest_args=(), timeout=None):
+    """
+    并行对所有设备运行测试套件，每台设备一个子进程。
+
+    :param workers: 同时运行的子进程数，默认每台设备一个
+    """
+    if suite not in SUITES:
+        raise ValueError(f"未知的测试套件 {suite}，可选 {', '.join(SUITES)}")
+    if not targets:
+        raise ValueError("至少需要一台被测设备")
+    devices = [device for target in targets for device in target_devices(target)]
+    if len(set(devices)) != len(devices):
+        raise ValueError("被测设备重复，每块板子只能出现在一个被测设备中")
+    output_dir = os.path.abspath(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=workers or len(targets)) as executor:
+        entries = list(executor.map(lambda target: run_target(target, suite, output_dir, pytest_args, timeout),
+                                    targets))
+    return build_report(suite, entries)
+
+
+def print_report(report):
+    print(f"{'设备':<32} {'状态':<8} {'通过':>4} {'失败':>4} {'错误':>4} {'跳过':>4} {'耗时':>8}")
+    for entry in report['targets']:
+        summary = entry['summary']
+        print(f"{entry['name']:<32} {entry['status']:<8} {summary['passed']:>4} {summary['failed']:>4} "
+              f"{summary['error']:>4} {summary['skipped']:>4} {entry['duration']:>7.1f}s")
+    # 只列出在部分设备上未通过的用例，所有设备都通过的用例不再逐条显示
+    for name, outcomes in report['matrix'].items():
+        bad = {target: outcome for target, outcome in outcomes.items() if outcome not in ('passed', 'skipped')}
+        if bad:
+            print(f"  {name}: " + ', '.join(f'{target}={outcome}' for target, outcome in bad.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='对多台设备分别运行 SDK 测试用例并汇总结果')
+    parser.add_argument('--suite', choices=sorted(SUITES), default='brainflow', help='测试套件')
+    parser.add_argument('--target', action='append', default=[],
+                        help='被测设备，brainflow 为 board_id/mac[,board_id2/mac2]，synchroni 为 MAC，可重复指定')
+    parser.add_argument('--targets-file', help='被测设备列表文件，每行一个')
+    parser.add_argument('--workers', type=int, help='同时运行的子进程数，默认每台设备一个')
+    parser.add_argument('--timeout', type=float, help='单台设备的总超时（秒）')
+    parser.add_argument('--output-dir', default='device_matrix', help='各设备的 junit 报告和日志目录')
+    parser.add_argument('--report', help='汇总报告 JSON 路径，默认写入 output-dir/report.json')
+    parser.add_argument('pytest_args', nargs=argparse.REMAINDER, help='透传给 pytest 的参数，放在 -- 之后')
+    args = parser.parse_args()
+
+    targets = [parse_target(text, args.suite) for text in args.target]
+    if args.targets_file:
+        targets += read_targets_file(args.targets_file, args.suite)
+    if not targets:
+        parser.error('请用 --target 或 --targets-file 指定被测设备')
+    pytest_args = [arg for arg in args.pytest_args if arg != '--']
+
+    report = run_matrix(targets, args.suite, args.output_dir, args.workers, pytest_args, args.timeout)
+    print_report(report)
+    report_path = args.report or os.path.join(args.output_dir, 'report.json')
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"汇总报告已写入 {report_path}")
+    sys.exit(0 if report['ok'] else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+import logging
+import random
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from eeg_common.playback import _brainflow_error
+
+logger = logging.getLogger(__name__)
+
+# disconnect: 强制断开链路；delay: 窗口内每次回调/取数额外延迟 value 秒；burst: 窗口内扣住数据，结束后一次性送达；
+# drop: 窗口内的数据直接丢弃（duration 为 0 时只丢一包）；set_param: 窗口内 setParam / config_board 失败
+FAULT_KINDS = ('disconnect', 'delay', 'burst', 'drop', 'set_param')
+
+# at 为相对 FaultInjector.start() 的秒数
+FaultEvent = namedtuple('FaultEvent', ['at', 'kind', 'duration', 'value'], defaults=(0.0, 0.0))
+
+
+class FaultInjector:
+    """
+    故障注入计划：脚本化的 FaultEvent 列表，加上按概率随机触发的故障。
+
+    各包装类在每次数据到达、取数或调用 setParam 时询问 active(kind)，得到当前生效的故障事件；
+    每个故障第一次生效时记录到 injected，供基准脚本对照恢复时间。
+    """
+
+    def __init__(self, events=(), rates=None, seed=None, duration=0.5, delay=0.2):
+        """
+        :param events: 脚本化的 FaultEvent 列表
+        :param rates: 故障类型 -> 每次检查时随机触发的概率，例如 {'drop': 0.01, 'disconnect': 0.001}
+        :param seed: 随机数种子
+        :param duration: 随机触发的窗口型故障的持续时间（秒）
+        :param delay: 随机触发的 delay 故障每次延迟的秒数
+        """
+        for event in events:
+            if event.kind not in FAULT_KINDS:
+                raise ValueError(f'未知的故障类型: {event.kind}')
+        self.rates = dict(rates or {})
+        self.duration = duration
+        self.delay = delay
+        self.injected = []
+        self._pending = sorted(events, key=lambda event: event.at)
+        self._active = []
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+
+    def start(self):
+        self._start = time.monotonic()
+
+    def elapsed(self):
+        return time.monotonic() - self._start
+
+    def schedule(self, kind, after=0.0, duration=0.0, value=0.0):
+        """
+        追加一个从现在起 after 秒后生效的故障。
+        """
+        if kind not in FAULT_KINDS:
+            raise ValueError(f'未知的故障类型: {kind}')
+        event = FaultEvent(self.elapsed() + after, kind, duration, value)
+        with self._lock:
+            self._pending.append(event)
+            self._pending.sort(key=lambda item: item.at)
+        return event
+
+    def _activate(self, event, now):
+        self.injected.append({'kind': event.kind, 'at': event.at, 'time': now,
+                              'duration': event.duration, 'value': event.value})
+        logger.info(f"注入故障 {event.kind}（{now:.3f}s，持续 {event.duration}s）")
+        # disconnect 和持续时间为 0 的事件只生效一次
+        if event.kind != 'disconnect' and event.duration > 0:
+            self._active.append(event)
+
+    def active(self, kind):
+        """
+        :return: 当前生效的 kind 类型故障事件，没有时为 None
+        """
+        now = self.elapsed()
+        with self._lock:
+            self._active = [event for event in self._active if now < event.at + event.duration]
+            for event in self._active:
+                if event.kind == kind:
+                    return event
+            for event in self._pending:
+                if event.at > now:
+                    break
+                if event.kind == kind:
+                    self._pending.remove(event)
+                    self._activate(event, now)
+                    return event
+            rate = self.rates.get(kind)
+            if rate and self._rng.random() < rate:
+                duration = 0.0 if kind in ('disconnect', 'drop') else self.duration
+                event = FaultEvent(now, kind, duration, self.delay if kind == 'delay' else 0.0)
+                self._activate(event, now)
+                return event
+        return None
+
+
+class FaultySensorProfile:
+    """
+    包装 SensorProfile（真实 SDK 或 sensor_sim），在数据回调路径上注入断连、延迟、突发、丢包，
+    并让 setParam 按计划失败；其余属性和方法原样转发。
+    """
+    _OWN = ('_profile', '_injector', '_data_callback', '_held', 'dropped_samples')
+
+    def __init__(self, profile, injector):
+        object.__setattr__(self, '_profile', profile)
+        object.__setattr__(self, '_injector', injector)
+        object.__setattr__(self, '_data_callback', None)
+        object.__setattr__(self, '_held', [])
+        object.__setattr__(self, 'dropped_samples', 0)
+
+    def __getattr__(self, name):
+        return getattr(self._profile, name)
+
+    def __setattr__(self, name, value):
+        if name == 'onDataCallback':
+            object.__setattr__(self, '_data_callback', value)
+            self._profile.onDataCallback = self._on_data if value is not None else None
+        elif name in self._OWN:
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._profile, name, value)
+
+    @property
+    def onDataCallback(self):
+        return self._data_callback
+
+    def _deliver(self, sensor, data):
+        callback = self._data_callback
+        if callback is not None:
+            callback(sensor, data)
+
+    def _on_data(self, sensor, data):
+        injector = self._injector
+        if injector.active('disconnect') is not None:
+            self._held.clear()
+            self._profile.disconnect()
+            on_error = self._profile.onErrorCallback
+            if on_error is not None:
+                on_error(sensor, 'fault injection: link lost')
+            return
+        if injector.active('drop') is not None:
+            if data.channelSamples:
+                object.__setattr__(self, 'dropped_samples', self.dropped_samples + len(data.channelSamples[0]))
+            return
+        if injector.active('burst') is not None:
+            self._held.append(data)
+            return
+        while self._held:
+            self._deliver(sensor, self._held.pop(0))
+        event = injector.active('delay')
+        if event is not None:
+            time.sleep(event.value)
+        self._deliver(sensor, data)
+
+    def setParam(self, key, value):
+        if self._injector.active('set_param') is not None:
+            return 'Error: fault injection'
+        return self._profile.setParam(key, value)
+
+    async def asyncSetParam(self, key, value):
+        if self._injector.active('set_param') is not None:
+            return 'Error: fault injection'
+        return await self._profile.asyncSetParam(key, value)
+
+
+class FaultySensorController:
+    """
+    包装 SensorController：requireSensor / getSensor 返回 FaultySensorProfile，同一设备总是同一个包装对象。
+    """
+
+    def __init__(self, controller, injector):
+        object.__setattr__(self, '_controller', controller)
+        object.__setattr__(self, '_injector', injector)
+        object.__setattr__(self, '_profiles', {})
+
+    def __getattr__(self, name):
+        return getattr(self._controller, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._controller, name, value)
+
+    def _wrap(self, profile):
+        if profile is None:
+            return None
+        address = profile.BLEDevice.Address
+        if address not in self._profiles:
+            self._profiles[address] = FaultySensorProfile(profile, self._injector)
+        return self._profiles[address]
+
+    def requireSensor(self, device):
+        return self._wrap(self._controller.requireSensor(device))
+
+    def getSensor(self, deviceMac):
+        return self._wrap(self._controller.getSensor(deviceMac))
+
+
+class FaultyBoardShim:
+    """
+    包装 BoardShim（或 PlaybackBoard），在 get_board_data 上注入故障：
+    disconnect 之后取数抛出 BOARD_NOT_READY_ERROR，直到重新 prepare_session 或 start_stream，期间的数据全部丢弃；
+    drop 删除样本（包序号出现缺口），burst 扣住数据结束后一次性返回，delay 让取数调用变慢；
+    set_param 窗口内 config_board 抛出 GENERAL_ERROR。
+    """
+
+    def __init__(self, board_shim, injector):
+        self.board_shim = board_shim
+        self.injector = injector
+        self.disconnected = False
+        self.dropped_samples = 0
+        self._held = []
+
+    def __getattr__(self, name):
+        return getattr(self.board_shim, name)
+
+    def _recover(self):
+        if self.disconnected:
+            self.disconnected = False
+            # 链路断开期间采集到的数据视为丢失
+            discarded = self.board_shim.get_board_data()
+            self.dropped_samples += discarded.shape[1]
+
+    def prepare_session(self):
+        self.disconnected = False
+        self.board_shim.prepare_session()
+
+    def start_stream(self, *args, **kwargs):
+        self.board_shim.start_stream(*args, **kwargs)
+        self._recover()
+
+    def config_board(self, config):
+        if self.injector.active('set_param') is not None:
+            raise _brainflow_error('fault injection: config_board failed', 'GENERAL_ERROR')
+        return self.board_shim.config_board(config)
+
+    def get_board_data(self, *args, **kwargs):
+        if not self.disconnected and self.injector.active('disconnect') is not None:
+            self.disconnected = True
+            self._held.clear()
+        if self.disconnected:
+            raise _brainflow_error('fault injection: board disconnected', 'BOARD_NOT_READY_ERROR')
+        data = self.board_shim.get_board_data(*args, **kwargs)
+        if self.injector.active('drop') is not None:
+            self.dropped_samples += data.shape[1]
+            return data[:, :0]
+        if self.injector.active('burst') is not None:
+            self._held.append(data)
+            return data[:, :0]
+        if self._held:
+            data = np.concatenate(self._held + [data], axis=1)
+            self._held = []
+        event = self.injector.active('delay')
+        if event is not None:
+            time.sleep(event.value)
+        return data
@@ -0,0 +1,251 @@
+import numpy as np
+
+# brainflow 各板子的包序号均为 0~255 回绕
+PACKAGE_NUM_MODULUS = 256
+# 按时间戳补回整圈丢失时的余量（圈）：按圈数向下取整，只有跳变超过 (1 - WRAP_MARGIN) 圈时才考虑补一圈
+WRAP_MARGIN = 0.25
+# 时间戳跳变只有在之后的样本按正常节奏到达时才算丢包：停滞但没有丢包时，积压的样本随后批量送达，
+# 时间戳挤在一起；真正丢包时后续样本的时间跨度与样本数相符。跳变后需要 CADENCE_SAMPLES 个样本作为依据，
+# 它们的时间跨度至少为名义时长的 CADENCE_TOLERANCE 倍，依据不足时只按包序号计数
+CADENCE_SAMPLES = 128
+CADENCE_TOLERANCE = 0.8
+
+class GapReport:
+    """
+    一段数据的丢包分析结果。
+
+    positions 为每个缺口之后第一个样本的序号（增量分析时为自开始以来的绝对序号），
+    lengths 为对应缺口丢失的包序号个数。
+    """
+
+    def __init__(self, received, positions, lengths):
+        self.received = received
+        self.positions = positions
+        self.lengths = lengths
+
+    @property
+    def lost(self):
+        return int(self.lengths.sum())
+
+    @property
+    def gap_count(self):
+        return int(self.lengths.size)
+
+    @property
+    def longest_gap(self):
+        return int(self.lengths.max()) if self.lengths.size else 0
+
+    @property
+    def loss_rate(self):
+        total = self.received + self.lost
+        return self.lost / total if total else 0.0
+
+    def __repr__(self):
+        return f'GapReport(received={self.received}, lost={self.lost}, gaps={self.gap_count})'
+
+
+def find_gaps(package_nums, previous=None, modulus=PACKAGE_NUM_MODULUS, timestamps=None, previous_timestamp=None,
+              sampling_rate=None):
+    """
+    向量化地查找包序号缺口，考虑回绕；相邻包序号相同（重复包）不算丢包。
+
+    包序号只能看出丢失个数对 modulus 取模的结果，长于一圈的中断会被少算（正好整圈时完全看不出）。
+    给出时间戳和采样率时，按相邻样本的时间间隔补回整圈：圈数为 (间隔 × 采样率 - 序号差) / modulus 向下取整，
+    留 WRAP_MARGIN 圈余量，并且跳变后的 CADENCE_SAMPLES 个样本必须按正常节奏到达（见 CADENCE_TOLERANCE），
+    否则视为停滞后批量送达，不补。每个样本一个包序号（brainflow 的数据布局）。
+
+    :param package_nums: 包序号序列（get_board_data 中的浮点数行亦可）
+    :param previous: 上一块数据的最后一个包序号，用于跨块检查；为 None 时只检查本块内部
+    :param timestamps: 与 package_nums 对应的时间戳（秒），为 None 时不补回整圈
+    :param previous_timestamp: 上一块数据最后一个样本的时间戳，与 previous 一起使用
+    :param sampling_rate: 采样率，给出 timestamps 时必须指定
+    :return: GapReport，positions 为本块内的序号
+    """
+    steps, wraps, timestamps, shift = _gap_steps(package_nums, previous, modulus, timestamps, previous_timestamp,
+                                                 sampling_rate)
+    if wraps is not None:
+        candidates = np.flatnonzero(wraps)
+        last = candidates + CADENCE_SAMPLES
+        evident = last < timestamps.size
+        evident[evident] = _at_cadence(timestamps[candidates[evident] + 1], timestamps[last[evident]],
+                                       sampling_rate)
+        steps[candidates[evident]] += modulus * wraps[candidates[evident]]
+    gaps = np.flatnonzero(steps > 1)
+    return GapReport(int(np.asarray(package_nums).size), gaps + shift, steps[gaps] - 1)
+
+
+def _gap_steps(package_nums, previous, modulus, timestamps, previous_timestamp, sampling_rate):
+    """
+    :return: (相邻包序号差, 按时间戳估计的整圈数（未给出时间戳时为 None）, 对应的时间戳, 本块第一个差值对应的样本序号)
+    """
+    nums = np.rint(np.asarray(package_nums, dtype=float)).astype(np.int64)
+    if timestamps is not None:
+        timestamps = np.asarray(timestamps, dtype=float)
+    if previous is not None and nums.size:
+        nums = np.concatenate(([int(previous)], nums))
+        if timestamps is not None:
+            timestamps = np.concatenate(([np.nan if previous_timestamp is None else previous_timestamp], timestamps))
+        shift = 0
+    else:
+        shift = 1
+    steps = np.mod(np.diff(nums), modulus)
+    wraps = None
+    if timestamps is not None:
+        expected = np.diff(timestamps) * sampling_rate
+        wraps = np.floor((expected - steps) / modulus + WRAP_MARGIN)
+        # 缺少上一块时间戳时不补
+        wraps = np.nan_to_num(np.maximum(wraps, 0), nan=0).astype(np.int64)
+    return steps, wraps, timestamps, shift
+
+
+def _at_cadence(first, last, sampling_rate):
+    """
+    跳变后第一个样本到第 CADENCE_SAMPLES 个样本的时间跨度是否与样本数相符。
+    """
+    return last - first >= CADENCE_TOLERANCE * (CADENCE_SAMPLES - 1) / sampling_rate
+
+
+def package_steps(package_nums, previous=None, modulus=PACKAGE_NUM_MODULUS):
+    """
+    每个样本相对前一个样本前进的包序号数（对 modulus 取模）：丢包处跳过丢失的个数，重复包为 0。
+    累加即为按包序号展开的设备端样本序号。
+
+    :param previous: 上一块数据的最后一个包序号，为 None 时第一个样本记为 1
+    """
+    nums = np.rint(np.asarray(package_nums, dtype=float)).astype(np.int64)
+    if not nums.size:
+        return nums
+    first = 1 if previous is None else (nums[0] - int(previous)) % modulus
+    return np.concatenate(([first], np.mod(np.diff(nums), modulus)))
+
+def package_num_channel(board_id):
+    from brainflow.board_shim import BoardShim
+
+    return BoardShim.get_package_num_channel(board_id)
+
+
+def analyze_board_data(data, board_id, modulus=PACKAGE_NUM_MODULUS):
+    """
+    批量分析一次 get_board_data 返回的数据（或录制文件读出的完整数组），按时间戳补回长于一圈的中断。
+    """
+    from brainflow.board_shim import BoardShim
+
+    return find_gaps(data[package_num_channel(board_id)], modulus=modulus,
+                     timestamps=data[BoardShim.get_timestamp_channel(board_id)],
+                     sampling_rate=BoardShim.get_sampling_rate(board_id))
+
+
+def analyze_file(path, board_id, modulus=PACKAGE_NUM_MODULUS):
+    """
+    分析 DataFilter.write_file 或 brainflow 文件流保存的录制文件。
+    """
+    from brainflow.data_filter import DataFilter
+
+    return analyze_board_data(DataFilter.read_file(path), board_id, modulus)
+
+
+class PacketLossTracker:
+    """
+    流式增量分析：依次传入每次取到的数据，包序号跨块连续检查，累计丢包统计。
+    每块的分析是一次向量化计算，界面定时器和采集线程中调用的开销可以忽略。
+    指定采样率并传入时间戳时，长于一圈包序号的中断按时间戳补回，见 find_gaps：时间戳跳变处的缺口
+    要等到之后的 CADENCE_SAMPLES 个样本到达才能确定，确定后才出现在当时那一块的报告中（位置仍为原位置），
+    采集结束时用 flush 结算尚未确定的缺口。
+    """
+
+    def __init__(self, modulus=PACKAGE_NUM_MODULUS, sampling_rate=None):
+        self.modulus = modulus
+        self.sampling_rate = sampling_rate
+        self.reset()
+
+    def reset(self):
+        self.received = 0
+        self.lost = 0
+        self.gaps = 0
+        self.longest_gap = 0
+        self._last = None
+        self._last_timestamp = None
+        # 等待后续样本确定的缺口：[跳变后第一个样本的绝对序号, 按包序号计的丢失数, 整圈数, 跳变后第一个样本的时间戳]
+        self._pending = []
+
+    @property
+    def loss_rate(self):
+        total = self.received + self.lost
+        return self.lost / total if total else 0.0
+
+    def update(self, package_nums, timestamps=None):
+        """
+        :param package_nums: 本块的包序号
+        :param timestamps: 本块的时间戳（秒），未指定采样率时忽略
+        :return: 本块的 GapReport，positions 为自开始以来的绝对样本序号
+        """
+        if self.sampling_rate is None:
+            timestamps = None
+        steps, wraps, concatenated, shift = _gap_steps(package_nums, self._last, self.modulus, timestamps,
+                                                       self._last_timestamp, self.sampling_rate)
+        count = int(np.asarray(package_nums).size)
+        if count == 0:
+            return GapReport(0, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+        if wraps is None:
+            wraps = np.zeros_like(steps)
+        gaps = np.flatnonzero((steps > 1) & (wraps == 0))
+        positions = [gaps + shift + self.received]
+        lengths = [steps[gaps] - 1]
+        for i in np.flatnonzero(wraps):
+            self._pending.append([self.received + i + shift, int(steps[i]) - 1, int(wraps[i]), concatenated[i + 1]])
+        resolved = self._resolve(None if timestamps is None else np.asarray(timestamps, dtype=float), count)
+        positions.append(resolved[0])
+        lengths.append(resolved[1])
+        self._last = int(np.rint(package_nums[-1]))
+        self._last_timestamp = None if timestamps is None else float(timestamps[-1])
+        self.received += count
+        return self._account(count, np.concatenate(positions), np.concatenate(lengths))
+
+    def flush(self):
+        """
+        采集结束时调用：后续样本不足、无法按时间戳确定的缺口只按包序号计数。
+
+        :return: 这些缺口的 GapReport（received 为 0）
+        """
+        positions, lengths = self._resolve(final=True)
+        return self._account(0, positions, lengths)
+
+    def _resolve(self, timestamps=None, count=0, final=False):
+        """
+        结算后续样本已经到齐的待定缺口：按正常节奏到达时补回整圈，否则只按包序号计数。
+
+        :param timestamps: 本块的时间戳，count 为本块样本数
+        :param final: 为 True 时结算全部待定缺口
+        :return: 已确定缺口的 (绝对序号, 丢失数)
+        """
+        positions, lengths, pending = [], [], []
+        for entry in self._pending:
+            position, length, wraps, first = entry
+            index = position + CADENCE_SAMPLES - 1 - self.received
+            if index >= count and not final:
+                pending.append(entry)
+                continue
+            if timestamps is not None and 0 <= index < count and _at_cadence(first, timestamps[index],
+                                                                             self.sampling_rate):
+                length += self.modulus * wraps
+            if length > 0:
+                positions.append(position)
+                lengths.append(length)
+        self._pending = pending
+        return np.array(positions, dtype=np.int64), np.array(lengths, dtype=np.int64)
+
+    def _account(self, received, positions, lengths):
+        order = np.argsort(positions, kind='stable')
+        report = GapReport(received, positions[order], lengths[order])
+        self.lost += report.lost
+        self.gaps += report.gap_count
+        self.longest_gap = max(self.longest_gap, report.longest_gap)
+        return report
+
+    def update_board_data(self, data, channel, timestamp_channel=None):
+        """
+        :param data: get_board_data 返回的数组
+        :param channel: 包序号所在行
+        :param timestamp_channel: 时间戳所在行，用于补回长于一圈的中断
+        """
+        return self.update(data[channel], None if timestamp_channel is None else data[timestamp_channel])
@@ -0,0 +1,184 @@
+import logging
+import threading
+import time
+
+import numpy as np
+
+from eeg_common.recorder import RecordedSession
+
+logger = logging.getLogger(__name__)
+
+
+def _brainflow_error(message, exit_code_name):
+    # 只在出错时才导入 brainflow，Synchroni 侧使用 SessionPlayer 时不需要安装 brainflow
+    import brainflow
+    return brainflow.BrainFlowError(message, getattr(brainflow.BrainFlowExitCodes, exit_code_name).value)
+
+
+class PlaybackBoard:
+    """
+    回放 SessionRecorder 录制的会话，接口与 EEGDataVisualizer 用到的 BoardShim 方法一致，
+    不需要蓝牙和设备即可走完整的取数、滤波、绘图流程。
+
+    行布局: [脑电通道..., 时间戳, 标记]。
+    speed 为回放倍速（1 为实时，4 为 4 倍速）；为 None 时不看时钟，每次 get_board_data 固定前进
+    chunk_samples 个样本，尽可能快且结果可复现，适合在 CI 上做基准测试。此时应由消费端（如界面刷新）
+    同步调用 get_board_data 推进回放时钟，不能交给按自身节奏轮询的采集线程，否则每次刷新拿到的数据量取决于线程调度。
+    """
+
+    def __init__(self, directory, speed=1.0, chunk_samples=None):
+        self.session = RecordedSession(directory)
+        self.speed = speed
+        self.sampling_rate = self.session.sampling_rate
+        self.chunk_samples = chunk_samples or max(1, int(self.sampling_rate) // 10)
+        channel_count = self.session.channel_count
+        self.eeg_channels = list(range(channel_count))
+        self.timestamp_channel = channel_count
+        self.marker_channel = channel_count + 1
+        self.num_rows = channel_count + 2
+        # position 为已取走的样本数，available 为按回放时钟已“到达”的样本数
+        self.position = 0
+        self.available = 0
+        self.prepared = False
+        self.streaming = False
+        self._start_time = 0.0
+        self._start_available = 0
+
+    def prepare_session(self):
+        self.prepared = True
+
+    def is_prepared(self):
+        return self.prepared
+
+    def release_session(self):
+        self.streaming = False
+        self.prepared = False
+
+    def start_stream(self, num_samples=450000, streamer_params=None):
+        if not self.prepared:
+            raise _brainflow_error('playback session is not prepared', 'BOARD_NOT_CREATED_ERROR')
+        self.streaming = True
+        self._start_time = time.monotonic()
+        self._start_available = self.available
+
+    def stop_stream(self):
+        self._update_available()
+        self.streaming = False
+
+    def get_sampling_rate(self, board_id=None):
+        return self.sampling_rate
+
+    def get_eeg_channels(self, board_id=None):
+        return self.eeg_channels
+
+    def get_timestamp_channel(self, board_id=None):
+        return self.timestamp_channel
+
+    def get_marker_channel(self, board_id=None):
+        return self.marker_channel
+
+    def get_num_rows(self, board_id=None):
+        return self.num_rows
+
+    def is_finished(self):
+        return self.position >= len(self.session)
+
+    def get_board_data_count(self):
+        self._update_available()
+        return self.available - self.position
+
+    def get_board_data(self, num_samples=None):
+        """
+        取走最早的未读数据，与 BoardShim.get_board_data 一致。
+        """
+        if not self.prepared:
+            raise _brainflow_error('playback session is not prepared', 'BOARD_NOT_CREATED_ERROR')
+        if self.speed is None and self.streaming:
+            self.available = min(len(self.session), self.available + self.chunk_samples)
+        else:
+            self._update_available()
+        stop = self.available if num_samples is None else min(self.available, self.position + num_samples)
+        data = self._rows(self.position, stop)
+        self.position = stop
+        return data
+
+    def get_current_board_data(self, num_samples):
+        """
+        返回最新的 num_samples 个样本但不取走，与 BoardShim.get_current_board_data 一致。
+        """
+        self._update_available()
+        return self._rows(max(self.position, self.available - num_samples), self.available)
+
+    def _update_available(self):
+        if self.streaming and self.speed is not None:
+            elapsed = time.monotonic() - self._start_time
+            arrived = self._start_available + int(elapsed * self.sampling_rate * self.speed)
+            self.available = min(len(self.session), arrived)
+
+    def _rows(self, start, stop):
+        data = np.zeros((self.num_rows, stop - start))
+        if stop <= start:
+            return data
+        samples, timestamps = self.session.read(start, stop)
+        data[self.eeg_channels, :] = samples
+        data[self.timestamp_channel, :] = timestamps
+        markers = self.session.markers
+        if len(markers):
+            lo, hi = np.searchsorted(markers[:, 0], [start, stop])
+            data[self.marker_channel, markers[lo:hi, 0].astype(np.int64) - start] = markers[lo:hi, 2]
+        return data
+
+
+class SessionPlayer:
+    """
+    在后台线程中把录制的会话切成固定大小的数据包，按录制时的节奏（或倍速、或不限速）推给回调，
+    用于驱动 Synchroni demo 中 onDataCallback 之后的处理路径。
+    """
+
+    def __init__(self, directory, callback, package_samples=10, speed=1.0):
+        """
+        :param directory: 会话目录
+        :param callback: callback(samples, timestamps)，samples 形状为 (通道数, package_samples)
+        :param package_samples: 每个数据包的样本数
+        :param speed: 回放倍速，None 表示不限速
+        """
+        self.session = RecordedSession(directory)
+        self.callback = callback
+        self.package_samples = package_samples
+        self.speed = speed
+        self.packets_sent = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='SessionPlayer', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def wait(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        start_time = time.monotonic()
+        sampling_rate = self.session.sampling_rate
+        for start in range(0, len(self.session), self.package_samples):
+            if self._stop_event.is_set():
+                break
+            if self.speed is not None:
+                delay = start_time + start / sampling_rate / self.speed - time.monotonic()
+                if delay > 0 and self._stop_event.wait(delay):
+                    break
+            samples, timestamps = self.session.read(start, start + self.package_samples)
+            try:
+                self.callback(samples, timestamps)
+            except Exception as e:
+                logger.error(f"回放回调出错: {e}")
+            self.packets_sent += 1
+        logger.info(f"回放结束，共发送 {self.packets_sent} 个数据包")
@@ -0,0 +1,118 @@
+import logging
+import threading
+import time
+from collections import namedtuple
+from statistics import NormalDist
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCHES = 10
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_TOLERANCE = 0.05
+
+
+def t_quantile(confidence, df):
+    """
+    双侧 t 分布分位数，用正态分位数的 Cornish-Fisher 展开近似（df >= 3 时误差小于 0.5%），不依赖 scipy。
+    """
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    return (z + (z ** 3 + z) / (4 * df) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * df ** 3))
+
+
+class RateEstimate(namedtuple('RateEstimate', ['rate', 'low', 'high', 'samples', 'duration', 'batches',
+                                               'confidence'])):
+    """
+    实际送达采样率及其置信区间（Hz）。
+    """
+
+    def within(self, nominal, tolerance=DEFAULT_TOLERANCE):
+        """
+        :return: 置信区间是否整体落在标称采样率 ±tolerance 的范围内
+        """
+        return nominal * (1 - tolerance) <= self.low and self.high <= nominal * (1 + tolerance)
+
+    def __str__(self):
+        return (f'{self.rate:.2f} Hz（{self.confidence * 100:.0f}% 置信区间 {self.low:.2f}~{self.high:.2f}，'
+                f'{self.samples} 个样本，{self.duration:.2f}s）')
+
+
+def estimate_rate(timestamps, counts=None, batches=DEFAULT_BATCHES, confidence=DEFAULT_CONFIDENCE):
+    """
+    由时间戳和样本数估计实际采样率，置信区间用批均值法：把数据按包均分为 batches 段，
+    各段速率的标准误乘以 t 分位数。相邻包的到达间隔相互关联（晚到之后往往紧跟早到），
+    分段后再估计方差可以避免把单包抖动误当成独立噪声。
+
+    第一个包只作为计时起点，其样本不计入。
+
+    :param timestamps: 每个样本（counts 为 None 时）或每个包的时间戳（秒），按时间顺序
+    :param counts: 每个包的样本数
+    :return: RateEstimate；样本不足以分成两段时 low / high 为 nan
+    """
+    timestamps = np.asarray(timestamps, dtype=float)
+    counts = np.ones(timestamps.size, dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+    if timestamps.size < 2:
+        return RateEstimate(float('nan'), float('nan'), float('nan'), int(counts.sum()), 0.0, 0, confidence)
+    cumulative = np.cumsum(counts)
+    duration = timestamps[-1] - timestamps[0]
+    samples = int(cumulative[-1] - cumulative[0])
+    rate = samples / duration if duration > 0 else float('nan')
+    batches = min(batches, timestamps.size - 1)
+    edges = np.unique(np.rint(np.linspace(0, timestamps.size - 1, batches + 1)).astype(np.int64))
+    spans = np.diff(timestamps[edges])
+    valid = spans > 0
+    rates = np.diff(cumulative[edges])[valid] / spans[valid]
+    if rates.size < 2:
+        return RateEstimate(rate, float('nan'), float('nan'), samples, duration, int(rates.size), confidence)
+    half_width = t_quantile(confidence, rates.size - 1) * rates.std(ddof=1) / np.sqrt(rates.size)
+    return RateEstimate(rate, rate - half_width, rate + half_width, samples, duration, int(rates.size), confidence)
+
+
+def measure_board_rate(board_shim, board_id, duration, batches=DEFAULT_BATCHES, confidence=DEFAULT_CONFIDENCE):
+    """
+    brainflow 板子：清空缓冲区后采集 duration 秒，按时间戳通道估计采样率。调用方负责 start_stream / stop_stream。
+    """
+    from brainflow.board_shim import BoardShim
+
+    board_shim.get_board_data()
+    time.sleep(duration)
+    data = board_shim.get_board_data()
+    timestamps = data[BoardShim.get_timestamp_channel(board_id)]
+    estimate = estimate_rate(timestamps, batches=batches, confidence=confidence)
+    logger.info(f"板子 {board_id} 实际采样率 {estimate}")
+    return estimate
+
+
+def measure_sensor_rate(profile, duration, data_type=None, batches=DEFAULT_BATCHES, confidence=DEFAULT_CONFIDENCE):
+    """
+    Synchroni 设备：开启数据通知接收 duration 秒，按各包的到达时间和样本数估计送达采样率。
+    设备需已连接并 init，结束后关闭数据通知并恢复原有的 onDataCallback。
+
+    :param data_type: 只统计该类型的数据（如 DataType.NTF_EEG），为 None 时统计全部
+    """
+    arrivals = []
+    counts = []
+    lock = threading.Lock()
+
+    def on_data(sensor, data):
+        if (data_type is not None and data.dataType != data_type) or not data.channelSamples:
+            return
+        with lock:
+            arrivals.append(time.perf_counter())
+            counts.append(len(data.channelSamples[0]))
+
+    previous = profile.onDataCallback
+    profile.onDataCallback = on_data
+    try:
+        if not profile.startDataNotification():
+            raise RuntimeError('开启数据通知失败')
+        time.sleep(duration)
+        profile.stopDataNotification()
+    finally:
+        profile.onDataCallback = previous
+    with lock:
+        estimate = estimate_rate(arrivals, counts, batches, confidence)
+    logger.info(f"设备 {profile.BLEDevice.Address} 送达采样率 {estimate}")
+    return estimate
@@ -0,0 +1,252 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SESSION_FILE = 'session.json'
+MARKER_FILE = 'markers.bin'
+# 标记文件每行: 绝对样本序号、时间戳、标记值
+MARKER_COLUMNS = 3
+# 写队列中最多积压的数据段数，按每段 10 个样本约相当于 250 Hz 下 40 秒的数据
+DEFAULT_MAX_PENDING = 1024
+
+_STOP = object()
+
+
+class SessionRecorder:
+    """
+    连续录制到磁盘的接收端：界面线程只把数据放入队列，后台写线程攒批后顺序追加到分块二进制文件。
+
+    目录结构:
+        session.json         元数据（通道数、采样率、分块列表等），每次分块切换和停止时更新
+        chunk_00000.bin ...  按样本为行的 float64 数组，每行为 [时间戳, 通道0, 通道1, ...]
+        markers.bin          非零标记，每行为 [绝对样本序号, 时间戳, 标记值]
+    所有文件都是无表头的原始数组，可直接用 np.memmap 映射，见 RecordedSession。
+    """
+
+    def __init__(self, directory, channel_count, sampling_rate, chunk_samples=None,
+                 flush_interval=0.5, batch_samples=4096, max_pending=DEFAULT_MAX_PENDING):
+        """
+        :param directory: 会话目录，不存在时自动创建
+        :param channel_count: 通道数
+        :param sampling_rate: 采样率，仅记录在元数据中
+        :param chunk_samples: 每个分块文件的最大样本数，默认相当于 1 小时的数据
+        :param flush_interval: 攒批的最长等待时间（秒）
+        :param batch_samples: 攒够这么多样本时立即写入
+        :param max_pending: 写队列的最大长度，磁盘跟不上时超出的数据段直接丢弃并计入 dropped_chunks
+        """
+        self.directory = directory
+        self.channel_count = channel_count
+        self.sampling_rate = sampling_rate
+        self.chunk_samples = chunk_samples or int(sampling_rate * 3600)
+        self.flush_interval = flush_interval
+        self.batch_samples = batch_samples
+        self.samples_written = 0
+        self.markers_written = 0
+        self.dropped_chunks = 0
+        self.dropped_samples = 0
+        self.error = None
+        self._chunks = []
+        self._chunk_file = None
+        self._marker_file = None
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._marker_file = open(os.path.join(self.directory, MARKER_FILE), 'ab')
+        self._thread = threading.Thread(target=self._run, name='SessionRecorder', daemon=True)
+        self._thread.start()
+        logger.info(f"开始录制到 {self.directory}")
+
+    def append(self, samples, timestamps, markers=None):
+        """
+        追加一段数据，只入队不做任何拷贝或 I/O，也从不阻塞，可在界面线程中调用。调用方之后不能再修改传入的数组。
+        队列已满时丢弃这段数据并计入 dropped_chunks / dropped_samples。
+
+        :param samples: 形状为 (channel_count, n) 的数据
+        :param timestamps: 长度为 n 的时间戳（秒）
+        :param markers: 可选，长度为 n 的标记通道，只保存非零值
+        :raises RuntimeError: 写线程已因出错退出，录制不再继续
+        """
+        if self.error is not None:
+            raise RuntimeError(f"录制已中止: {self.error}") from self.error
+        count = samples.shape[1]
+        if count == 0:
+            return
+        try:
+            self._queue.put_nowait((samples, timestamps, markers))
+        except queue.Full:
+            if self.dropped_chunks == 0:
+                logger.warning(f"录制写队列已满（{self._queue.maxsize} 段），开始丢弃数据")
+            self.dropped_chunks += 1
+            self.dropped_samples += count
+
+    def stop(self):
+        """
+        写完队列中剩余的数据后停止写线程，写线程出错时在这里抛出。
+        """
+        if self._thread is None:
+            return
+        # 写线程出错退出后不再取队列，队列满时不能无限等待
+        while self._thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+        self._thread.join()
+        self._thread = None
+        logger.info(f"录制结束，共 {self.samples_written} 个样本，{self.markers_written} 个标记，"
+                    f"丢弃 {self.dropped_chunks} 段 {self.dropped_samples} 个样本")
+        if self.error is not None:
+            raise self.error
+
+    def _run(self):
+        pending = []
+        pending_samples = 0
+        deadline = 0.0
+        try:
+            while True:
+                timeout = max(0.0, deadline - time.monotonic()) if pending else None
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+                if item is _STOP:
+                    break
+                if item is not None:
+                    if not pending:
+                        deadline = time.monotonic() + self.flush_interval
+                    pending.append(item)
+                    pending_samples += item[0].shape[1]
+                    if pending_samples < self.batch_samples and time.monotonic() < deadline:
+                        continue
+                self._write_batch(pending, pending_samples)
+                pending = []
+                pending_samples = 0
+            self._write_batch(pending, pending_samples)
+        except Exception as e:
+            self.error = e
+            logger.error(f"录制写线程出错: {e}")
+        finally:
+            self._close()
+
+    def _write_batch(self, pending, total):
+        if not pending:
+            return
+        # 一批数据拼成一个按样本为行的连续数组，每个分块文件只需一次 write
+        block = np.empty((total, self.channel_count + 1), dtype=np.float64)
+        marker_rows = []
+        row = 0
+        for samples, timestamps, markers in pending:
+            count = samples.shape[1]
+            block[row:row + count, 0] = timestamps
+            block[row:row + count, 1:] = samples.T
+            if markers is not None:
+                hits = np.flatnonzero(markers)
+                if hits.size:
+                    marker_rows.append(np.column_stack((hits + self.samples_written + row,
+                                                        np.asarray(timestamps)[hits],
+                                                        np.asarray(markers)[hits])))
+            row += count
+        offset = 0
+        while offset < total:
+            if self._chunk_file is None or self._chunks[-1]['samples'] >= self.chunk_samples:
+                self._open_chunk()
+            count = min(total - offset, self.chunk_samples - self._chunks[-1]['samples'])
+            self._chunk_file.write(block[offset:offset + count].tobytes())
+            self._chunks[-1]['samples'] += count
+            offset += count
+        self._chunk_file.flush()
+        if marker_rows:
+            markers = np.concatenate(marker_rows).astype(np.float64)
+            self._marker_file.write(markers.tobytes())
+            self._marker_file.flush()
+            self.markers_written += markers.shape[0]
+        self.samples_written += total
+
+    def _open_chunk(self):
+        if self._chunk_file is not None:
+            self._chunk_file.close()
+        name = f'chunk_{len(self._chunks):05d}.bin'
+        self._chunk_file = open(os.path.join(self.directory, name), 'wb')
+        self._chunks.append({'file': name, 'samples': 0})
+        self._write_session_file()
+
+    def _close(self):
+        if self._chunk_file is not None:
+            self._chunk_file.close()
+            self._chunk_file = None
+        if self._marker_file is not None:
+            self._marker_file.close()
+            self._marker_file = None
+        self._write_session_file()
+
+    def _write_session_file(self):
+        session = {
+            'channel_count': self.channel_count,
+            'sampling_rate': self.sampling_rate,
+            'dtype': 'float64',
+            'columns': ['timestamp'] + [f'channel_{i}' for i in range(self.channel_count)],
+            'chunk_samples': self.chunk_samples,
+            'chunks': self._chunks,
+        }
+        path = os.path.join(self.directory, SESSION_FILE)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(session, f, indent=2)
+        os.replace(path + '.tmp', path)
+
+
+class RecordedSession:
+    """
+    以内存映射方式读取 SessionRecorder 录制的会话，不把整个文件读入内存。
+    分块的样本数按文件实际大小计算，录制中途异常退出时也能读取已落盘的部分。
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, SESSION_FILE), encoding='utf-8') as f:
+            session = json.load(f)
+        self.channel_count = session['channel_count']
+        self.sampling_rate = session['sampling_rate']
+        row_bytes = (self.channel_count + 1) * np.dtype(np.float64).itemsize
+        self.chunks = []
+        for chunk in session['chunks']:
+            path = os.path.join(directory, chunk['file'])
+            rows = os.path.getsize(path) // row_bytes
+            if rows:
+                self.chunks.append(np.memmap(path, dtype=np.float64, mode='r',
+                                             shape=(rows, self.channel_count + 1)))
+        self._offsets = np.cumsum([0] + [c.shape[0] for c in self.chunks])
+        marker_path = os.path.join(directory, MARKER_FILE)
+        marker_rows = os.path.getsize(marker_path) // (MARKER_COLUMNS * 8) if os.path.exists(marker_path) else 0
+        if marker_rows:
+            self.markers = np.memmap(marker_path, dtype=np.float64, mode='r', shape=(marker_rows, MARKER_COLUMNS))
+        else:
+            self.markers = np.empty((0, MARKER_COLUMNS))
+
+    def __len__(self):
+        return int(self._offsets[-1])
+
+    def read(self, start=0, stop=None):
+        """
+        读取绝对样本序号区间 [start, stop) 的数据。
+
+        :return: (samples, timestamps)，samples 形状为 (channel_count, n)
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        parts = []
+        for index, chunk in enumerate(self.chunks):
+            lo = max(start, self._offsets[index])
+            hi = min(stop, self._offsets[index + 1])
+            if lo < hi:
+                parts.append(chunk[lo - self._offsets[index]:hi - self._offsets[index]])
+        rows = np.concatenate(parts) if parts else np.empty((0, self.channel_count + 1))
+        return rows[:, 1:].T, rows[:, 0]
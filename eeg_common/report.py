@@ -0,0 +1,335 @@
+"""
+增量测试报告：读取新增的测试结果文件，合并进报告目录中的索引，输出静态 HTML 和 JSON 汇总，不需要 Java / Allure。
+
+每次更新只解析上次之后新出现的结果文件（以及老化 JSONL 中新追加的行）。结果目录的处理进度用水位线记录
+（已处理文件中最大的 (修改时间, 文件名)），不逐个记录已处理的文件；索引只保存水位线、各老化 JSONL 的读取位置、
+各用例的累计统计和最近 MAX_RECENT_ROUNDS 轮的摘要，全部轮次的摘要追加写入 rounds.jsonl，
+因此索引大小只与用例数有关，不随老化历史变长而变大。指定归档目录时，处理过的结果文件移入归档目录，
+结果目录中只剩未处理的文件，扫描耗时也只与新增结果的数量有关。
+
+支持的结果文件:
+    pytest --junitxml 生成的 XML（每次执行一个文件，算作一轮）
+    allure-pytest 生成的 *-result.json（一次更新中新出现的文件合为一轮）
+    brain_sdk_api_test2 老化测试的 JSONL（每条 round 记录算作一轮）
+
+用法:
+    python -m eeg_common.report --results results --report report
+    python -m eeg_common.report --results results --archive results/archive --report report
+    python -m eeg_common.report --soak aging.jsonl --report aging-report
+"""
+import argparse
+import html
+import json
+import os
+import time
+
+from eeg_common.device_matrix import OUTCOMES, parse_junit
+
+INDEX_FILE = 'index.json'
+ROUNDS_FILE = 'rounds.jsonl'
+SUMMARY_FILE = 'summary.json'
+HTML_FILE = 'index.html'
+# 索引和页面中保留的最近轮次数、每个用例保留的最近结果数
+MAX_RECENT_ROUNDS = 200
+MAX_TEST_HISTORY = 50
+# allure 的 broken 对应 pytest 的 error
+ALLURE_OUTCOMES = {'passed': 'passed', 'failed': 'failed', 'broken': 'error', 'skipped': 'skipped'}
+
+
+def parse_allure_result(path):
+    """
+    :return: (用例名, {'outcome', 'duration', 'message'})
+    """
+    with open(path, encoding='utf-8') as f:
+        result = json.load(f)
+    name = result.get('fullName') or result.get('name', os.path.basename(path))
+    duration = (result.get('stop', 0) - result.get('start', 0)) / 1000.0
+    message = (result.get('statusDetails') or {}).get('message', '') or ''
+    return name, {'outcome': ALLURE_OUTCOMES.get(result.get('status'), 'error'), 'duration': duration,
+                  'message': message}
+
+
+class ReportBuilder:
+    """
+    报告目录中的索引。update / add_* 之后调用 write 输出页面。
+    """
+
+    def __init__(self, report_dir):
+        self.report_dir = report_dir
+        os.makedirs(report_dir, exist_ok=True)
+        self.index = {'watermarks': {}, 'soak_offsets': {}, 'round_count': 0, 'totals': dict.fromkeys(OUTCOMES, 0),
+                      'tests': {}, 'recent_rounds': []}
+        path = os.path.join(report_dir, INDEX_FILE)
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.index = json.load(f)
+            self._migrate_sources()
+        self._new_rounds = []
+
+    def _migrate_sources(self):
+        """
+        旧版索引逐个记录已处理的文件（sources），换算成各结果目录的水位线和老化 JSONL 的读取位置。
+        """
+        sources = self.index.pop('sources', None)
+        watermarks = self.index.setdefault('watermarks', {})
+        offsets = self.index.setdefault('soak_offsets', {})
+        for path, info in (sources or {}).items():
+            if 'offset' in info:
+                offsets[path] = info['offset']
+            elif os.path.exists(path):
+                directory = os.path.dirname(path)
+                stamp = [os.stat(path).st_mtime_ns, os.path.basename(path)]
+                watermarks[directory] = max(watermarks.get(directory, stamp), stamp)
+
+    def _add_round(self, source, tests, label=None, started=None):
+        """
+        :param tests: {用例名: {'outcome', 'duration', 'message'}}
+        """
+        if not tests:
+            return None
+        self.index['round_count'] += 1
+        counts = dict.fromkeys(OUTCOMES, 0)
+        for name, result in tests.items():
+            outcome = result['outcome']
+            counts[outcome] += 1
+            stats = self.index['tests'].setdefault(name, dict(dict.fromkeys(OUTCOMES, 0), runs=0, duration=0.0,
+                                                              history=[], last_failure=None, message=''))
+            stats['runs'] += 1
+            stats[outcome] += 1
+            stats['duration'] += result['duration']
+            stats['history'] = (stats['history'] + [outcome[0]])[-MAX_TEST_HISTORY:]
+            if outcome in ('failed', 'error'):
+                stats['last_failure'] = self.index['round_count']
+                stats['message'] = result.get('message', '')[:500]
+        for outcome in OUTCOMES:
+            self.index['totals'][outcome] += counts[outcome]
+        record = {
+            'round': self.index['round_count'],
+            'label': label or os.path.basename(source),
+            'source': source,
+            'time': started or time.time(),
+            'duration': sum(result['duration'] for result in tests.values()),
+            'counts': counts,
+            'failures': sorted(name for name, result in tests.items() if result['outcome'] in ('failed', 'error')),
+        }
+        self.index['recent_rounds'] = (self.index['recent_rounds'] + [record])[-MAX_RECENT_ROUNDS:]
+        self._new_rounds.append(record)
+        return record
+
+    def add_junit(self, path, label=None):
+        """
+        把一个 junit XML 算作一轮。不做去重，结果目录中的新文件由 update 按水位线筛选。
+        """
+        return self._add_round(path, parse_junit(path), label, os.path.getmtime(path))
+
+    def add_allure_results(self, paths, label=None):
+        """
+        把一批 allure 结果文件合为一轮；同一用例出现多次（重跑）时保留最后一次。
+        """
+        tests = {}
+        for path in sorted(paths, key=os.path.getmtime):
+            name, result = parse_allure_result(path)
+            tests[name] = result
+        return self._add_round(os.path.dirname(paths[0]) if paths else '', tests, label)
+
+    def add_soak_jsonl(self, path):
+        """
+        从上次读到的位置继续读取老化 JSONL，只处理完整的行。
+        """
+        key = os.path.abspath(path)
+        offset = self.index['soak_offsets'].get(key, 0)
+        if os.path.getsize(path) < offset:
+            # 文件被重新开始的老化测试覆盖
+            offset = 0
+        records = []
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                offset += len(line)
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get('type') != 'round':
+                    continue
+                tests = {test['test']: test for test in record['tests']}
+                records.append(self._add_round(path, tests, f"{os.path.basename(path)}#{record['round']}",
+                                               record['time']))
+        self.index['soak_offsets'][key] = offset
+        return records
+
+    def update(self, results_dir=None, soak_paths=(), archive_dir=None):
+        """
+        扫描结果目录中水位线之后的新文件和老化 JSONL 中的新记录。
+
+        :param archive_dir: 处理过的结果文件移入该目录，为 None 时留在原处
+        :return: 本次新增的轮次摘要
+        """
+        if results_dir and os.path.isdir(results_dir):
+            key = os.path.abspath(results_dir)
+            watermark = tuple(self.index['watermarks'].get(key, (0, '')))
+            allure = []
+            junit = []
+            with os.scandir(results_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith('-result.json'):
+                        found = allure
+                    elif entry.name.endswith('.xml'):
+                        found = junit
+                    else:
+                        continue
+                    stamp = (entry.stat().st_mtime_ns, entry.name)
+                    if stamp > watermark:
+                        found.append((stamp, entry.path))
+            for _, path in sorted(junit):
+                self.add_junit(path)
+            if allure:
+                self.add_allure_results([path for _, path in allure])
+            if junit or allure:
+                self.index['watermarks'][key] = list(max(junit + allure)[0])
+            if archive_dir:
+                os.makedirs(archive_dir, exist_ok=True)
+                for _, path in junit + allure:
+                    os.replace(path, os.path.join(archive_dir, os.path.basename(path)))
+        for path in soak_paths:
+            if os.path.exists(path):
+                self.add_soak_jsonl(path)
+        return list(self._new_rounds)
+
+    def summary(self):
+        tests = self.index['tests']
+        failing = sorted((name for name, stats in tests.items() if stats['history'][-1:] in (['f'], ['e'])))
+        # 最近的结果中既有通过又有失败的用例视为不稳定
+        flaky = sorted(name for name, stats in tests.items()
+                       if 'p' in stats['history'] and ({'f', 'e'} & set(stats['history'])))
+        return {
+            'updated': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'rounds': self.index['round_count'],
+            'totals': self.index['totals'],
+            'failing': failing,
+            'flaky': flaky,
+            'last_round': self.index['recent_rounds'][-1] if self.index['recent_rounds'] else None,
+        }
+
+    def _write_json(self, name, data):
+        path = os.path.join(self.report_dir, name)
+        temp = path + '.tmp'
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp, path)
+
+    def write(self, refresh=None):
+        """
+        追加新轮次到 rounds.jsonl，写入索引、summary.json 和 index.html。
+
+        :param refresh: 页面自动刷新间隔（秒），用于长时间老化测试时挂在看板上
+        :return: index.html 路径
+        """
+        if self._new_rounds:
+            with open(os.path.join(self.report_dir, ROUNDS_FILE), 'a', encoding='utf-8') as f:
+                for record in self._new_rounds:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self._new_rounds = []
+        self._write_json(INDEX_FILE, self.index)
+        summary = self.summary()
+        self._write_json(SUMMARY_FILE, summary)
+        path = os.path.join(self.report_dir, HTML_FILE)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(render_html(self.index, summary, refresh))
+        os.replace(path + '.tmp', path)
+        return path
+
+
+def _pass_rate_svg(rounds, width=600, height=60):
+    if not rounds:
+        return ''
+    step = width / len(rounds)
+    bars = []
+    for i, record in enumerate(rounds):
+        total = sum(record['counts'][outcome] for outcome in ('passed', 'failed', 'error'))
+        rate = record['counts']['passed'] / total if total else 1.0
+        color = '#2e7d32' if rate == 1.0 else '#c62828'
+        bar_height = max(2.0, rate * height)
+        bars.append(f'<rect x="{i * step:.1f}" y="{height - bar_height:.1f}" width="{max(step - 1, 1):.1f}" '
+                    f'height="{bar_height:.1f}" fill="{color}"><title>第 {record["round"]} 轮 '
+                    f'{rate * 100:.1f}%</title></rect>')
+    return f'<svg width="{width}" height="{height}">{"".join(bars)}</svg>'
+
+
+def render_html(index, summary, refresh=None):
+    escape = html.escape
+    totals = summary['totals']
+    rows = []
+    for name, stats in sorted(index['tests'].items(), key=lambda item: (-(item[1]['failed'] + item[1]['error']),
+                                                                         item[0])):
+        history = ''.join(stats['history'][-20:])
+        mean = stats['duration'] / stats['runs'] if stats['runs'] else 0.0
+        css = ' class="bad"' if stats['history'][-1:] in (['f'], ['e']) else ''
+        rows.append(f'<tr{css}><td>{escape(name)}</td><td>{stats["runs"]}</td><td>{stats["passed"]}</td>'
+                    f'<td>{stats["failed"]}</td><td>{stats["error"]}</td><td>{stats["skipped"]}</td>'
+                    f'<td>{mean:.2f}s</td><td><code>{history}</code></td><td>{escape(stats["message"])}</td></tr>')
+    round_rows = []
+    for record in reversed(index['recent_rounds'][-50:]):
+        counts = record['counts']
+        started = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record['time']))
+        css = ' class="bad"' if record['failures'] else ''
+        round_rows.append(f'<tr{css}><td>{record["round"]}</td><td>{escape(record["label"])}</td><td>{started}</td>'
+                          f'<td>{counts["passed"]}</td><td>{counts["failed"]}</td><td>{counts["error"]}</td>'
+                          f'<td>{counts["skipped"]}</td><td>{escape(", ".join(record["failures"][:5]))}</td></tr>')
+    meta = f'<meta http-equiv="refresh" content="{int(refresh)}">' if refresh else ''
+    return f'''<!DOCTYPE html>
+<html><head><meta charset="utf-8">{meta}<title>测试报告</title>
+<style>
+body {{ font-family: sans-serif; margin: 20px; }}
+table {{ border-collapse: collapse; margin-bottom: 24px; }}
+td, th {{ border: 1px solid #ccc; padding: 3px 8px; font-size: 13px; text-align: left; }}
+tr.bad td {{ background: #fdecea; }}
+</style></head><body>
+<h2>测试报告</h2>
+<p>更新于 {summary["updated"]}，共 {summary["rounds"]} 轮；通过 {totals["passed"]}，失败 {totals["failed"]}，
+错误 {totals["error"]}，跳过 {totals["skipped"]}；当前失败 {len(summary["failing"])} 个用例，
+不稳定 {len(summary["flaky"])} 个用例</p>
+<h3>最近 {len(index["recent_rounds"])} 轮通过率</h3>
+{_pass_rate_svg(index["recent_rounds"])}
+<h3>用例（历史：p 通过 / f 失败 / e 错误 / s 跳过，最近在右）</h3>
+<table><tr><th>用例</th><th>执行</th><th>通过</th><th>失败</th><th>错误</th><th>跳过</th><th>平均耗时</th>
+<th>最近结果</th><th>最近失败信息</th></tr>
+{"".join(rows)}
+</table>
+<h3>最近轮次</h3>
+<table><tr><th>轮次</th><th>来源</th><th>时间</th><th>通过</th><th>失败</th><th>错误</th><th>跳过</th><th>失败用例</th></tr>
+{"".join(round_rows)}
+</table>
+</body></html>
+'''
+
+
+def build_report(report_dir, results_dir=None, soak_paths=(), refresh=None, archive_dir=None):
+    """
+    增量更新报告并写出页面。
+
+    :return: (index.html 路径, 本次新增的轮次摘要)
+    """
+    builder = ReportBuilder(report_dir)
+    new_rounds = builder.update(results_dir, soak_paths, archive_dir)
+    return builder.write(refresh), new_rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description='增量生成静态 HTML / JSON 测试报告')
+    parser.add_argument('--results', help='结果目录（junit XML 或 allure 结果文件）')
+    parser.add_argument('--soak', nargs='*', default=[], help='老化测试 JSONL 文件')
+    parser.add_argument('--archive', help='处理过的结果文件移入该目录，结果目录只保留未处理的文件')
+    parser.add_argument('--report', default='report', help='报告目录')
+    parser.add_argument('--refresh', type=int, help='页面自动刷新间隔（秒）')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    path, new_rounds = build_report(args.report, args.results, args.soak, args.refresh, args.archive)
+    print(f"新增 {len(new_rounds)} 轮，耗时 {time.perf_counter() - start:.2f}s，报告: {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+import functools
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+@functools.lru_cache(maxsize=None)
+def design_decimation_taps(factor, taps_per_phase=16, cutoff_ratio=0.9):
+    """
+    设计抽取用的抗混叠低通 FIR（加 Blackman 窗的 sinc），结果按参数缓存，同一配置只设计一次。
+
+    :param factor: 抽取倍数
+    :param taps_per_phase: 每一相的抽头数，总长度为 factor * taps_per_phase
+    :param cutoff_ratio: 截止频率占输出奈奎斯特频率的比例
+    :return: 只读的抽头数组，直流增益为 1
+    """
+    length = factor * taps_per_phase
+    cutoff = 0.5 / factor * cutoff_ratio  # 以输入采样率归一化的截止频率（周期/样本）
+    n = np.arange(length) - (length - 1) / 2.0
+    taps = 2 * cutoff * np.sinc(2 * cutoff * n) * np.blackman(length)
+    taps /= taps.sum()
+    taps.flags.writeable = False
+    return taps
+
+
+class PolyphaseDecimator:
+    """
+    流式多通道整数倍抽取：先抗混叠低通再每 factor 个样本保留一个。
+
+    只计算保留下来的输出点（等价于多相结构，每个输出点 taps_per_phase * factor 次乘加，
+    即每个输入样本 taps_per_phase 次），滤波器历史和抽取相位在调用之间保持，
+    任意切分输入得到的输出完全一致。第 k 个输出对应第 k * factor 个输入样本，
+    群延迟为 delay 个输入样本。
+    """
+
+    def __init__(self, channel_count, factor, taps_per_phase=16, cutoff_ratio=0.9):
+        if factor < 1:
+            raise ValueError(f"抽取倍数必须为正整数: {factor}")
+        self.channel_count = channel_count
+        self.factor = factor
+        self.taps = design_decimation_taps(factor, taps_per_phase, cutoff_ratio)
+        self._reversed_taps = self.taps[::-1].copy()
+        self.delay = (len(self.taps) - 1) / 2.0
+        self._history = np.zeros((channel_count, len(self.taps) - 1))
+        # 下一个输出点在本次输入中的位置（跨调用保持抽取相位）
+        self._skip = 0
+
+    @classmethod
+    def from_rates(cls, channel_count, input_rate, output_rate, **kwargs):
+        """
+        按输入、输出采样率创建，要求两者为整数倍关系，例如 1000 Hz -> 125 Hz。
+        """
+        factor = int(round(input_rate / output_rate))
+        if factor < 1 or abs(input_rate - factor * output_rate) > 1e-6:
+            raise ValueError(f"输入采样率 {input_rate} 不是输出采样率 {output_rate} 的整数倍")
+        return cls(channel_count, factor, **kwargs)
+
+    def process(self, block):
+        """
+        :param block: 形状为 (channel_count, n) 的新数据
+        :return: 形状为 (channel_count, m) 的抽取结果，m 约为 n / factor
+        """
+        count = block.shape[1]
+        if self.factor == 1:
+            return block
+        if count == 0:
+            return np.zeros((self.channel_count, 0))
+        data = np.concatenate((self._history, block), axis=1)
+        windows = sliding_window_view(data, len(self.taps), axis=1)[:, self._skip::self.factor]
+        output = windows @ self._reversed_taps
+        produced = output.shape[1]
+        self._skip = self._skip + produced * self.factor - count
+        self._history = data[:, data.shape[1] - self._history.shape[1]:]
+        return output
+
+    def reset(self):
+        self._history[:] = 0
+        self._skip = 0
@@ -0,0 +1,76 @@
+import numpy as np
+
+
+class RingBuffer:
+    """
+    定长多通道环形缓冲区，按 (通道 × 样本) 存储数据，写入时不搬移已有数据。
+
+    写入位置用单调递增的绝对样本序号 head 表示，读端（显示游标等）各自保存绝对序号，
+    互不影响；容量固定，长时间运行内存不增长，超出容量时最旧的数据被覆盖。
+    """
+
+    def __init__(self, channel_count: int, capacity: int, dtype=np.float64):
+        if channel_count <= 0 or capacity <= 0:
+            raise ValueError(f"通道数和容量必须为正数: channel_count={channel_count}, capacity={capacity}")
+        self.channel_count = channel_count
+        self.capacity = capacity
+        self.buffer = np.zeros((channel_count, capacity), dtype=dtype)
+        # 累计写入的样本总数，即下一个样本的绝对序号
+        self.head = 0
+
+    @property
+    def tail(self):
+        """
+        缓冲区中仍然可读的最早样本的绝对序号。
+        """
+        return max(0, self.head - self.capacity)
+
+    def __len__(self):
+        return self.head - self.tail
+
+    def write(self, block):
+        """
+        追加一段数据，最多两次切片赋值，不分配新数组。
+
+        :param block: 形状为 (channel_count, n) 的数据
+        :return: 写入的样本数 n
+        """
+        n = block.shape[1]
+        if n == 0:
+            return 0
+        if n > self.capacity:
+            # 一次写入超过容量时只保留最新的部分，序号照常推进
+            self.head += n - self.capacity
+            block = block[:, -self.capacity:]
+        count = block.shape[1]
+        start = self.head % self.capacity
+        first = min(count, self.capacity - start)
+        self.buffer[:, start:start + first] = block[:, :first]
+        if first < count:
+            self.buffer[:, :count - first] = block[:, first:]
+        self.head += count
+        return n
+
+    def read(self, start, stop, out=None):
+        """
+        读取绝对序号区间 [start, stop) 的数据。
+
+        :param start: 起始绝对序号，不能早于 tail
+        :param stop: 结束绝对序号（不含），不能晚于 head
+        :param out: 可选的预分配输出数组，形状为 (channel_count, stop - start)
+        :return: 输出数组
+        """
+        if start < self.tail or stop > self.head or start > stop:
+            raise ValueError(f"读取区间 [{start}, {stop}) 超出可读范围 [{self.tail}, {self.head})")
+        count = stop - start
+        if out is None:
+            out = np.empty((self.channel_count, count), dtype=self.buffer.dtype)
+        begin = start % self.capacity
+        first = min(count, self.capacity - begin)
+        out[:, :first] = self.buffer[:, begin:begin + first]
+        if first < count:
+            out[:, first:count] = self.buffer[:, :count - first]
+        return out
+
+    def clear(self):
+        self.head = 0
@@ -0,0 +1,102 @@
+import numpy as np
+
+from eeg_common.aggregator import BoardAggregator, BoardStream
+
+
+class FakeBoard:
+    """
+    行布局为 [eeg0, eeg1, timestamp, marker]，每次 get_board_data 返回预先排好的一块。
+    """
+
+    def __init__(self, sampling_rate, start_time, count, value_offset=0.0):
+        self.sampling_rate = sampling_rate
+        timestamps = start_time + np.arange(count) / sampling_rate
+        self.data = np.vstack([timestamps * 100 + value_offset, -timestamps, timestamps, np.zeros(count)])
+        self.position = 0
+        # 每次 get_board_data 返回的样本数，None 表示全部
+        self.chunk = None
+
+    def get_eeg_channels(self, board_id):
+        return [0, 1]
+
+    def get_sampling_rate(self, board_id):
+        return self.sampling_rate
+
+    def get_timestamp_channel(self, board_id):
+        return 2
+
+    def get_marker_channel(self, board_id):
+        return 3
+
+    def get_board_data(self, count=None):
+        count = count or self.chunk or self.data.shape[1] - self.position
+        block = self.data[:, self.position:self.position + count]
+        self.position += block.shape[1]
+        return block
+
+
+class PackagedBoard(FakeBoard):
+    """
+    在 FakeBoard 的行布局后增加包序号行（0~255 回绕）。
+    """
+
+    def __init__(self, sampling_rate, start_time, count):
+        super().__init__(sampling_rate, start_time, count)
+        self.data = np.vstack([self.data, np.arange(count) % 256])
+
+    def get_package_num_channel(self, board_id):
+        return 4
+
+
+def test_single_board_passes_samples_through():
+    board = FakeBoard(250, 1000.0, 100)
+    board.data[3, 42] = 5
+    stream = BoardStream(board, 0)
+    aggregator = BoardAggregator([stream])
+    stream.poll()
+    samples, timestamps, markers = aggregator.poll()
+    assert np.array_equal(samples, board.data[:2])
+    assert np.array_equal(timestamps, board.data[2])
+    assert np.flatnonzero(markers).tolist() == [42]
+    assert aggregator.poll()[0].shape == (2, 0)
+
+
+def test_boards_are_aligned_on_common_timeline():
+    first = FakeBoard(250, 1000.0, 1000)
+    second = FakeBoard(125, 1000.5, 400, value_offset=7.0)
+    second.data[3, 100] = 3  # t = 1001.3
+    streams = [BoardStream(first, 0), BoardStream(second, 1)]
+    aggregator = BoardAggregator(streams)
+    chunks = []
+    for size in (90, 300, 1000):
+        first.chunk, second.chunk = size, size // 2
+        for stream in streams:
+            stream.poll()
+        chunks.append(aggregator.poll())
+    samples = np.hstack([chunk[0] for chunk in chunks])
+    timestamps = np.concatenate([chunk[1] for chunk in chunks])
+    markers = np.concatenate([chunk[2] for chunk in chunks])
+
+    assert aggregator.sampling_rate == 250
+    assert timestamps[0] == 1000.5
+    assert np.allclose(np.diff(timestamps), 1 / 250)
+    assert timestamps[-1] <= 1000.5 + 399 / 125
+    # 两块板子的信号都是时间的线性函数，插值结果应与网格时刻完全一致
+    assert np.allclose(samples[0], timestamps * 100)
+    assert np.allclose(samples[2], timestamps * 100 + 7.0)
+    assert np.allclose(samples[3], -timestamps)
+    assert np.flatnonzero(markers).tolist() == [200]
+
+
+def test_clock_sync_uses_package_numbers_after_dropped_packets():
+    board = PackagedBoard(250, 1000.0, 2000)
+    # 中途丢失 50 个样本
+    board.data = np.delete(board.data, range(700, 750), axis=1)
+    board.chunk = 25
+    stream = BoardStream(board, 0)
+    while stream.poll():
+        pass
+    assert stream.loss.lost == 50
+    _, _, timestamps, _ = stream.read_from(0)
+    # 校正后的时间戳与原始采样时刻一致，丢包之后不会整体偏移缺口的长度
+    assert np.allclose(timestamps, board.data[2], atol=1e-6)
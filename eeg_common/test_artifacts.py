@@ -0,0 +1,57 @@
+import numpy as np
+
+from eeg_common.artifacts import (AMPLITUDE, CLIPPING, FLATLINE, GRADIENT, LINE_NOISE,
+                                  ArtifactDetector, find_segments)
+
+SAMPLING_RATE = 250
+
+
+def make_detector(channel_count):
+    return ArtifactDetector(channel_count, SAMPLING_RATE, capacity=SAMPLING_RATE * 10)
+
+
+class TestArtifactDetector:
+    def test_flags_each_artifact_type(self):
+        rng = np.random.default_rng(0)
+        t = np.arange(SAMPLING_RATE) / SAMPLING_RATE
+        clean = rng.normal(0, 10, SAMPLING_RATE)
+        data = np.vstack([
+            clean,
+            clean + 300 * np.exp(-((t - 0.5) / 0.05) ** 2),   # 眨眼
+            np.full(SAMPLING_RATE, 3.0),                      # 平直线
+            np.clip(clean * 20, -100, 100),                   # 削顶
+            clean + 80 * np.sin(2 * np.pi * 50 * t),          # 工频干扰
+            np.where(t < 0.5, 0.0, 120.0) + clean,           # 跳变
+        ])
+        flags = make_detector(data.shape[0]).update(data)[:, 0]
+        assert flags[0] == 0
+        assert flags[1] & AMPLITUDE
+        assert flags[2] & FLATLINE
+        assert flags[3] & CLIPPING
+        assert flags[4] & LINE_NOISE
+        assert flags[5] & GRADIENT
+
+    def test_streaming_updates_match_window_boundaries(self):
+        detector = make_detector(2)
+        data = np.random.default_rng(1).normal(0, 10, (2, 600))
+        data[1, SAMPLING_RATE:2 * SAMPLING_RATE] = 0.0
+        produced = 0
+        for start in range(0, 600, 40):
+            produced += detector.update(data[:, start:start + 40]).shape[1]
+        assert produced == 2
+        assert detector.mask.head == 2 * SAMPLING_RATE
+        mask = detector.mask.read(0, detector.mask.head)
+        assert not mask[0].any()
+        assert (mask[1, SAMPLING_RATE:] & FLATLINE).all()
+
+    def test_bad_channel_score(self):
+        detector = make_detector(2)
+        data = np.random.default_rng(2).normal(0, 10, (2, SAMPLING_RATE * 20))
+        data[1] = 0.0
+        detector.update(data)
+        assert detector.bad_channels.tolist() == [False, True]
+
+
+def test_find_segments():
+    mask = np.array([False, True, True, False, True])
+    assert find_segments(mask) == [(1, 3), (4, 5)]
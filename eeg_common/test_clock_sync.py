@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from eeg_common.clock_sync import ClockDriftEstimator
+
+SAMPLING_RATE = 250
+PACKAGE_SAMPLES = 10
+
+
+def simulate_packets(seconds, drift_ppm, seed=0, start_time=1.7e9):
+    """
+    按包生成 (包内最后一个样本的序号, 主机到达时间)，到达时间带 2 ms 抖动，约 2% 的包迟到 200 ms。
+    """
+    rng = np.random.default_rng(seed)
+    last_indices = np.arange(PACKAGE_SAMPLES - 1, seconds * SAMPLING_RATE, PACKAGE_SAMPLES)
+    true_times = start_time + last_indices * (1 + drift_ppm * 1e-6) / SAMPLING_RATE
+    arrivals = true_times + 0.02 + rng.normal(0, 0.002, last_indices.size)
+    arrivals[rng.random(last_indices.size) < 0.02] += 0.2
+    return last_indices, arrivals, true_times
+
+
+class TestClockDriftEstimator:
+    def test_estimates_drift_and_rejects_late_packets(self):
+        estimator = ClockDriftEstimator(SAMPLING_RATE)
+        indices, arrivals, true_times = simulate_packets(900, drift_ppm=80)
+        for index, arrival in zip(indices, arrivals):
+            estimator.update(index, arrival)
+        assert estimator.drift_ppm == pytest.approx(80, abs=5)
+        assert estimator.rejected > 0.015 * indices.size
+        # 校正后的时间戳与真实时间只差固定的传输延迟
+        error = estimator.corrected(indices[-100:]) - true_times[-100:]
+        assert np.abs(error - 0.02).max() < 0.002
+
+    def test_batch_update_matches_per_packet(self):
+        indices, arrivals, _ = simulate_packets(300, drift_ppm=-40, seed=1)
+        single = ClockDriftEstimator(SAMPLING_RATE)
+        for index, arrival in zip(indices, arrivals):
+            single.update(index, arrival)
+        batched = ClockDriftEstimator(SAMPLING_RATE)
+        for start in range(0, indices.size, 8):
+            batched.update(indices[start:start + 8], arrivals[start:start + 8])
+        assert batched.drift_ppm == pytest.approx(single.drift_ppm, abs=2)
+
+    def test_clock_step_restarts_fit(self):
+        estimator = ClockDriftEstimator(SAMPLING_RATE, max_rejections=20)
+        indices, arrivals, _ = simulate_packets(120, drift_ppm=0, seed=2)
+        half = indices.size // 2
+        arrivals[half:] += 3600.0
+        for index, arrival in zip(indices, arrivals):
+            estimator.update(index, arrival)
+        assert estimator.resets == 1
+        assert estimator.corrected(indices[-1]) == pytest.approx(arrivals[-1], abs=0.05)
+
+    def test_corrected_requires_observation(self):
+        with pytest.raises(ValueError):
+            ClockDriftEstimator(SAMPLING_RATE).corrected([0])
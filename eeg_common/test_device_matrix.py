@@ -0,0 +1,63 @@
+import pytest
+
+from eeg_common.device_matrix import build_report, parse_junit, parse_target, run_matrix, target_env
+
+JUNIT = '''<?xml version="1.0" encoding="utf-8"?>
+<testsuites><testsuite name="pytest" tests="4">
+<testcase classname="test_brain_sdk_api.TestSDKApi" name="test_prepare_session" time="1.5"/>
+<testcase classname="test_brain_sdk_api.TestSDKApi" name="test_stop_stream" time="0.2">
+<failure message="assert 0 &gt; 0">trace</failure></testcase>
+<testcase classname="test_brain_sdk_api.TestSDKApi" name="test_stop_stream" time="0.0">
+<error message="teardown failed">trace</error></testcase>
+<testcase classname="test_brain_sdk_api.TestSDKApi" name="test_concurrent" time="0.0">
+<skipped message="no second board"/></testcase>
+</testsuite></testsuites>
+'''
+
+
+def make_entry(name, tests):
+    summary = {outcome: sum(1 for test in tests.values() if test['outcome'] == outcome)
+               for outcome in ('passed', 'failed', 'error', 'skipped')}
+    return {'name': name, 'status': 'ok' if not summary['failed'] + summary['error'] else 'failed',
+            'tests': tests, 'summary': summary}
+
+
+class TestDeviceMatrix:
+    def test_parse_target(self):
+        assert parse_target('57/C4:64:E3:D8:E6:D2') == {'name': '57/C4:64:E3:D8:E6:D2', 'board_id': 57,
+                                                        'mac': 'C4:64:E3:D8:E6:D2', 'board_id2': None, 'mac2': ''}
+        dual = parse_target('57/C4:64:E3:D8:E6:D2, 58/C4:64:E3:D8:E3:EE')
+        assert (dual['board_id'], dual['board_id2'], dual['mac2']) == (57, 58, 'C4:64:E3:D8:E3:EE')
+        assert parse_target('-1')['board_id'] == -1
+        assert parse_target('C4:64:E3:D8:E9:E2', 'synchroni')['mac'] == 'C4:64:E3:D8:E9:E2'
+        with pytest.raises(ValueError):
+            parse_target('C4:64:E3:D8:E6:D2')
+        with pytest.raises(ValueError):
+            parse_target('57/a,b')
+
+    def test_second_board_env_and_conflicts(self, tmp_path, monkeypatch):
+        # 未指定第二块板子的设备显式传空值，测试脚本不会落回默认的第二块板子
+        monkeypatch.setenv('BRAINFLOW_BOARD_ID2', '58')
+        env = target_env(parse_target('57/a'), 'brainflow')
+        assert env['BRAINFLOW_BOARD_ID2'] == '' and env['BRAINFLOW_MAC2'] == ''
+        env = target_env(parse_target('57/a,58/b'), 'brainflow')
+        assert (env['BRAINFLOW_BOARD_ID2'], env['BRAINFLOW_MAC2']) == ('58', 'b')
+        # 同一块板子不能既是一个设备的第二块板子又是另一个设备的主板子
+        with pytest.raises(ValueError):
+            run_matrix([parse_target('57/a,58/b'), parse_target('58/b')], output_dir=str(tmp_path))
+
+    def test_parse_junit_keeps_most_severe_outcome(self, tmp_path):
+        path = tmp_path / 'report.xml'
+        path.write_text(JUNIT, encoding='utf-8')
+        results = parse_junit(str(path))
+        assert results['test_brain_sdk_api.TestSDKApi::test_prepare_session']['outcome'] == 'passed'
+        assert results['test_brain_sdk_api.TestSDKApi::test_stop_stream']['outcome'] == 'error'
+        assert results['test_brain_sdk_api.TestSDKApi::test_concurrent']['outcome'] == 'skipped'
+
+    def test_build_report_matrix(self):
+        first = make_entry('57/a', {'t1': {'outcome': 'passed'}, 't2': {'outcome': 'failed'}})
+        second = make_entry('58/b', {'t1': {'outcome': 'passed'}})
+        report = build_report('brainflow', [first, second])
+        assert not report['ok']
+        assert report['matrix']['t2'] == {'57/a': 'failed', '58/b': 'missing'}
+        assert report['totals']['passed'] == 2
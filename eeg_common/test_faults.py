@@ -0,0 +1,136 @@
+import time
+
+import numpy as np
+import pytest
+
+from eeg_common.faults import FaultEvent, FaultInjector, FaultyBoardShim, FaultySensorProfile
+
+
+class Channel(list):
+    pass
+
+
+class Packet:
+    def __init__(self, index, count=10):
+        self.index = index
+        self.channelSamples = [Channel(range(count))]
+
+
+class FakeProfile:
+    def __init__(self):
+        self.onDataCallback = None
+        self.onErrorCallback = None
+        self.disconnected = False
+        self.params = {}
+
+    def disconnect(self):
+        self.disconnected = True
+        return True
+
+    def setParam(self, key, value):
+        self.params[key] = value
+        return 'OK'
+
+    def emit(self, index):
+        if self.onDataCallback is not None:
+            self.onDataCallback(self, Packet(index))
+
+
+def collect(profile):
+    received = []
+    profile.onDataCallback = lambda sensor, data: received.append(data.index)
+    return received
+
+
+class FakeBoard:
+    def __init__(self):
+        self.package_num = 0
+
+    def get_board_data(self):
+        data = np.arange(self.package_num, self.package_num + 5, dtype=float)[None, :]
+        self.package_num += 5
+        return data
+
+    def start_stream(self, *args):
+        pass
+
+    def config_board(self, config):
+        return 'OK'
+
+
+def test_injector_windows_and_one_shots():
+    injector = FaultInjector([FaultEvent(0.0, 'drop', 0.1), FaultEvent(0.0, 'disconnect')])
+    assert injector.active('disconnect') is not None
+    assert injector.active('disconnect') is None
+    assert injector.active('drop') is not None
+    time.sleep(0.15)
+    assert injector.active('drop') is None
+    assert [record['kind'] for record in injector.injected] == ['disconnect', 'drop']
+    with pytest.raises(ValueError):
+        FaultInjector([FaultEvent(0.0, 'fire')])
+
+
+def test_random_faults_are_reproducible():
+    def draws(seed):
+        injector = FaultInjector(rates={'drop': 0.3}, seed=seed)
+        return [injector.active('drop') is not None for _ in range(50)]
+    assert draws(1) == draws(1)
+    assert 5 < sum(draws(1)) < 30
+
+
+def test_sensor_profile_drop_burst_and_set_param():
+    inner = FakeProfile()
+    injector = FaultInjector()
+    profile = FaultySensorProfile(inner, injector)
+    received = collect(profile)
+    inner.emit(0)
+    injector.schedule('drop')
+    inner.emit(1)
+    injector.schedule('burst', duration=0.1)
+    inner.emit(2)
+    inner.emit(3)
+    assert received == [0]
+    time.sleep(0.15)
+    inner.emit(4)
+    # 突发结束后扣住的包先按顺序送达
+    assert received == [0, 2, 3, 4]
+    assert profile.dropped_samples == 10
+
+    injector.schedule('set_param', duration=0.1)
+    assert profile.setParam('FILTER_HPF', 'ON').startswith('Error')
+    time.sleep(0.15)
+    assert profile.setParam('FILTER_HPF', 'ON') == 'OK'
+    # 未被包装的属性原样转发
+    profile.marker = 1
+    assert inner.marker == 1
+
+
+def test_sensor_profile_disconnect_reports_error():
+    inner = FakeProfile()
+    injector = FaultInjector()
+    profile = FaultySensorProfile(inner, injector)
+    errors = []
+    profile.onErrorCallback = lambda sensor, reason: errors.append(reason)
+    received = collect(profile)
+    injector.schedule('disconnect')
+    inner.emit(0)
+    assert inner.disconnected and received == [] and errors
+
+
+def test_board_disconnect_until_restart():
+    injector = FaultInjector()
+    board = FaultyBoardShim(FakeBoard(), injector)
+    assert board.get_board_data().shape[1] == 5
+    injector.schedule('disconnect')
+    brainflow = pytest.importorskip('brainflow')
+    with pytest.raises(brainflow.BrainFlowError):
+        board.get_board_data()
+    with pytest.raises(brainflow.BrainFlowError):
+        board.get_board_data()
+    board.start_stream()
+    # 断开期间的数据丢弃，重新开始采集后包序号出现缺口
+    assert board.get_board_data()[0, 0] == 10
+    assert board.dropped_samples == 5
+    injector.schedule('drop')
+    assert board.get_board_data().shape[1] == 0
+    assert board.dropped_samples == 10
@@ -0,0 +1,106 @@
+import numpy as np
+
+from eeg_common.packet_loss import PacketLossTracker, analyze_board_data, find_gaps
+
+
+def sequence_with_drops(count, drops, start=0):
+    """
+    生成 count 个包序号，drops 为需要删掉的原始序号。
+    """
+    nums = (np.arange(count) + start) % 256
+    keep = np.ones(count, dtype=bool)
+    keep[list(drops)] = False
+    return nums[keep].astype(float)
+
+
+class TestFindGaps:
+    def test_positions_and_lengths_with_wraparound(self):
+        nums = sequence_with_drops(600, drops=[10, 11, 12, 300, 511], start=250)
+        report = find_gaps(nums)
+        assert report.received == 595
+        assert report.lost == 5
+        assert report.positions.tolist() == [10, 297, 507]
+        assert report.lengths.tolist() == [3, 1, 1]
+        assert report.longest_gap == 3
+
+    def test_duplicates_are_not_loss(self):
+        assert find_gaps([4, 5, 5, 6]).lost == 0
+
+    def test_outage_longer_than_cycle_uses_timestamps(self):
+        nums = sequence_with_drops(1000, drops=range(100, 700))
+        timestamps = np.delete(np.arange(1000) / 250.0, range(100, 700))
+        assert find_gaps(nums).lost == 600 % 256
+        report = find_gaps(nums, timestamps=timestamps, sampling_rate=250)
+        assert report.lost == 600 and report.positions.tolist() == [100]
+
+    def test_stall_without_loss_is_not_a_wrap(self):
+        # 包序号连续，到达间隔 0.9s：没有丢包，跳变后的样本不足以证明按正常节奏到达
+        timestamps = np.arange(20) / 250.0
+        timestamps[10:] += 0.9
+        assert find_gaps(np.arange(20), timestamps=timestamps, sampling_rate=250).lost == 0
+
+    def test_backlog_burst_after_stall_is_not_a_wrap(self):
+        # 停滞 1.2s 后积压的 300 个样本在 0.1s 内批量送达，之后恢复正常节奏
+        timestamps = np.concatenate((np.arange(100) / 250.0, 1.6 + np.arange(300) * 0.1 / 300,
+                                     1.7 + np.arange(1, 201) / 250.0))
+        assert find_gaps(np.arange(600) % 256, timestamps=timestamps, sampling_rate=250).lost == 0
+
+    def test_empty_input(self):
+        report = find_gaps([])
+        assert report.received == 0 and report.lost == 0 and report.loss_rate == 0.0
+
+
+class TestPacketLossTracker:
+    def test_incremental_matches_batch(self):
+        nums = sequence_with_drops(5000, drops=[100, 255, 256, 257, 1023, 4000])
+        batch = find_gaps(nums)
+        tracker = PacketLossTracker()
+        positions = []
+        for chunk in np.array_split(nums, 37):
+            positions += tracker.update(chunk).positions.tolist()
+        assert tracker.lost == batch.lost == 6
+        assert tracker.gaps == batch.gap_count
+        assert positions == batch.positions.tolist()
+        assert tracker.longest_gap == 3
+
+    def test_gap_on_chunk_boundary(self):
+        tracker = PacketLossTracker()
+        tracker.update([253, 254])
+        report = tracker.update([2, 3])
+        assert report.positions.tolist() == [2]
+        assert report.lengths.tolist() == [3]
+
+    def test_outage_across_chunks_uses_timestamps(self):
+        tracker = PacketLossTracker(sampling_rate=250)
+        tracker.update([254, 255], [0.0, 0.004])
+        # 跨块中断 512 + 2 个包，之后按正常节奏送达
+        nums = (np.arange(200) + 2) % 256
+        timestamps = 0.004 + (515 + np.arange(200)) / 250
+        # 后续样本不足时先不计，等到齐后再按原位置报告
+        assert tracker.update(nums[:50], timestamps[:50]).lost == 0
+        report = tracker.update(nums[50:], timestamps[50:])
+        assert report.positions.tolist() == [2] and report.lengths.tolist() == [514]
+        assert tracker.lost == 514 and tracker.longest_gap == 514 and tracker.gaps == 1
+
+    def test_stall_across_chunks_is_not_loss(self):
+        tracker = PacketLossTracker(sampling_rate=250)
+        tracker.update(np.arange(10), np.arange(10) / 250.0)
+        # 停滞 0.9s 后积压的样本批量送达，包序号连续
+        assert tracker.update(np.arange(10, 240), 0.936 + np.arange(230) * 1e-4).lost == 0
+        assert tracker.update(np.arange(240, 256), 0.96 + np.arange(16) / 250.0).lost == 0
+        assert tracker.flush().lost == 0 and tracker.lost == 0
+
+    def test_flush_counts_unresolved_gaps_by_package_number(self):
+        tracker = PacketLossTracker(sampling_rate=250)
+        tracker.update([0, 1], [0.0, 0.004])
+        assert tracker.update([5, 6], [0.004 + 260 / 250, 0.008 + 260 / 250]).lost == 0
+        report = tracker.flush()
+        assert report.positions.tolist() == [2] and report.lengths.tolist() == [3] and tracker.lost == 3
+
+def test_analyze_synthetic_board_layout():
+    from brainflow.board_shim import BoardIds, BoardShim
+
+    board_id = BoardIds.SYNTHETIC_BOARD.value
+    data = np.zeros((BoardShim.get_num_rows(board_id), 50))
+    data[BoardShim.get_package_num_channel(board_id)] = sequence_with_drops(52, drops=[20, 21])
+    assert analyze_board_data(data, board_id).lost == 2
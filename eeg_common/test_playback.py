@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from eeg_common.playback import PlaybackBoard, SessionPlayer
+from eeg_common.recorder import SessionRecorder
+
+
+@pytest.fixture
+def session_dir(tmp_path):
+    recorder = SessionRecorder(str(tmp_path), channel_count=2, sampling_rate=100)
+    recorder.start()
+    data = np.arange(2 * 300, dtype=np.float64).reshape(2, 300)
+    markers = np.zeros(300)
+    markers[150] = 7
+    recorder.append(data, np.arange(300) / 100.0, markers)
+    recorder.stop()
+    return str(tmp_path)
+
+
+class TestPlaybackBoard:
+    def test_as_fast_as_possible_is_deterministic(self, session_dir):
+        board = PlaybackBoard(session_dir, speed=None, chunk_samples=40)
+        board.prepare_session()
+        board.start_stream()
+        chunks = []
+        while not board.is_finished():
+            chunks.append(board.get_board_data())
+        assert [c.shape[1] for c in chunks] == [40] * 7 + [20]
+        data = np.hstack(chunks)
+        assert data.shape == (board.get_num_rows(), 300)
+        assert np.array_equal(data[board.get_eeg_channels()], np.arange(600).reshape(2, 300))
+        assert np.flatnonzero(data[board.get_marker_channel()]).tolist() == [150]
+
+    def test_real_time_pacing(self, session_dir):
+        board = PlaybackBoard(session_dir, speed=1.0)
+        board.prepare_session()
+        board.start_stream()
+        assert board.get_board_data().shape[1] <= 5
+
+    def test_start_stream_requires_prepared_session(self, session_dir):
+        brainflow = pytest.importorskip('brainflow')
+        board = PlaybackBoard(session_dir)
+        with pytest.raises(brainflow.BrainFlowError):
+            board.start_stream()
+
+
+class TestSessionPlayer:
+    def test_unpaced_playback_delivers_all_packets(self, session_dir):
+        received = []
+        player = SessionPlayer(session_dir, lambda samples, timestamps: received.append(samples.shape[1]),
+                               package_samples=25, speed=None)
+        player.start()
+        player.wait(5)
+        assert received == [25] * 12
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from eeg_common.rate_check import estimate_rate, t_quantile
+
+
+def packets(rate, package, seconds, jitter=0.0, seed=0):
+    """
+    :return: (每包到达时间, 每包样本数)
+    """
+    rng = np.random.default_rng(seed)
+    count = int(seconds * rate / package)
+    arrivals = np.arange(1, count + 1) * package / rate + rng.uniform(0, jitter, count)
+    return np.sort(arrivals), np.full(count, package)
+
+
+class TestRateCheck:
+    def test_t_quantile(self):
+        assert t_quantile(0.95, 9) == pytest.approx(2.262, abs=0.005)
+        assert t_quantile(0.95, 4) == pytest.approx(2.776, abs=0.015)
+        assert t_quantile(0.95, 1000) == pytest.approx(1.960, abs=0.005)
+
+    def test_per_sample_timestamps(self):
+        estimate = estimate_rate(np.arange(2500) / 250.0)
+        assert estimate.rate == pytest.approx(250)
+        assert estimate.low == pytest.approx(250) and estimate.high == pytest.approx(250)
+        assert estimate.within(250, 0.01)
+
+    def test_jittered_packets(self):
+        arrivals, counts = packets(250, 10, 10, jitter=0.02)
+        estimate = estimate_rate(arrivals, counts)
+        assert estimate.batches == 10
+        assert estimate.low < estimate.rate < estimate.high
+        assert estimate.low <= 250 <= estimate.high
+        assert estimate.within(250, 0.05)
+
+    def test_slow_stream_fails_tolerance(self):
+        # 每 10 包丢 1 包，实际送达 225 Hz
+        arrivals, counts = packets(250, 10, 10, jitter=0.005)
+        keep = np.arange(arrivals.size) % 10 != 5
+        estimate = estimate_rate(arrivals[keep], counts[keep])
+        assert estimate.rate == pytest.approx(225, rel=0.01)
+        assert not estimate.within(250, 0.05)
+        assert estimate.within(225, 0.05)
+
+    def test_too_few_samples(self):
+        assert np.isnan(estimate_rate([1.0]).rate)
+        estimate = estimate_rate([0.0, 0.1], [5, 5])
+        assert estimate.rate == pytest.approx(50) and np.isnan(estimate.low)
+        assert not estimate.within(50)
@@ -0,0 +1,70 @@
+import time
+
+import numpy as np
+import pytest
+
+from eeg_common.recorder import RecordedSession, SessionRecorder
+
+
+class TestSessionRecorder:
+    def test_round_trip_across_chunks(self, tmp_path):
+        recorder = SessionRecorder(str(tmp_path), channel_count=3, sampling_rate=250, chunk_samples=100)
+        recorder.start()
+        data = np.arange(3 * 250, dtype=np.float64).reshape(3, 250)
+        timestamps = np.arange(250) / 250.0
+        markers = np.zeros(250)
+        markers[[10, 180]] = [1, 2]
+        for start in range(0, 250, 25):
+            stop = start + 25
+            recorder.append(data[:, start:stop], timestamps[start:stop], markers[start:stop])
+        recorder.stop()
+
+        session = RecordedSession(str(tmp_path))
+        assert len(session) == 250
+        assert len(session.chunks) == 3
+        samples, read_timestamps = session.read(90, 210)
+        assert np.array_equal(samples, data[:, 90:210])
+        assert np.array_equal(read_timestamps, timestamps[90:210])
+        assert np.array_equal(session.markers[:, 0], [10, 180])
+        assert np.array_equal(session.markers[:, 2], [1, 2])
+
+    def test_stop_without_data(self, tmp_path):
+        recorder = SessionRecorder(str(tmp_path), channel_count=2, sampling_rate=250)
+        recorder.start()
+        recorder.stop()
+        assert len(RecordedSession(str(tmp_path))) == 0
+
+    def test_full_queue_drops_chunks(self, tmp_path):
+        # 未启动写线程，队列不会被取走
+        recorder = SessionRecorder(str(tmp_path), channel_count=2, sampling_rate=250, max_pending=4)
+        for _ in range(6):
+            recorder.append(np.zeros((2, 10)), np.zeros(10))
+        assert recorder.dropped_chunks == 2 and recorder.dropped_samples == 20
+
+    def test_append_raises_after_writer_error(self, tmp_path):
+        # 分块文件名被目录占用，写线程第一次写入即出错退出
+        (tmp_path / 'chunk_00000.bin').mkdir()
+        recorder = SessionRecorder(str(tmp_path), channel_count=2, sampling_rate=250, batch_samples=1)
+        recorder.start()
+        recorder.append(np.zeros((2, 10)), np.zeros(10))
+        recorder._thread.join(5)
+        assert recorder.error is not None
+        with pytest.raises(RuntimeError):
+            recorder.append(np.zeros((2, 10)), np.zeros(10))
+        with pytest.raises(OSError):
+            recorder.stop()
+
+    def test_append_cost(self, tmp_path):
+        # append 在数据回调 / 界面线程中调用，只允许入队的开销
+        recorder = SessionRecorder(str(tmp_path), channel_count=8, sampling_rate=250)
+        recorder.start()
+        samples = np.zeros((8, 10))
+        timestamps = np.zeros(10)
+        costs = []
+        for _ in range(500):
+            start = time.perf_counter()
+            recorder.append(samples, timestamps)
+            costs.append(time.perf_counter() - start)
+        recorder.stop()
+        assert recorder.dropped_chunks == 0
+        assert np.median(costs) < 1e-4
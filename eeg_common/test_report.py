@@ -0,0 +1,101 @@
+import json
+import os
+
+from eeg_common.report import INDEX_FILE, ROUNDS_FILE, ReportBuilder, build_report
+
+
+def junit(*cases):
+    body = ''.join(f'<testcase classname="test_api.TestApi" name="{name}" time="0.5">{child}</testcase>'
+                   for name, child in cases)
+    return f'<?xml version="1.0" encoding="utf-8"?><testsuites><testsuite>{body}</testsuite></testsuites>'
+
+
+def write(path, text):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+class TestReport:
+    def test_incremental_junit(self, tmp_path):
+        results = tmp_path / 'results'
+        report = tmp_path / 'report'
+        results.mkdir()
+        write(results / 'round-1.xml', junit(('test_a', ''), ('test_b', '<failure message="boom"/>')))
+        path, new_rounds = build_report(str(report), str(results))
+        assert len(new_rounds) == 1 and new_rounds[0]['failures'] == ['test_api.TestApi::test_b']
+        assert 'test_api.TestApi::test_b' in open(path, encoding='utf-8').read()
+
+        # 已处理的文件不再重复统计
+        _, new_rounds = build_report(str(report), str(results))
+        assert new_rounds == []
+
+        write(results / 'round-2.xml', junit(('test_a', ''), ('test_b', '')))
+        _, new_rounds = build_report(str(report), str(results))
+        assert [record['round'] for record in new_rounds] == [2]
+        summary = json.loads((report / 'summary.json').read_text(encoding='utf-8'))
+        assert summary['rounds'] == 2
+        assert summary['totals']['passed'] == 3 and summary['totals']['failed'] == 1
+        assert summary['failing'] == [] and summary['flaky'] == ['test_api.TestApi::test_b']
+        assert len((report / ROUNDS_FILE).read_text(encoding='utf-8').splitlines()) == 2
+        # 索引只保存结果目录的水位线，不逐个记录已处理的文件
+        index = json.loads((report / INDEX_FILE).read_text(encoding='utf-8'))
+        assert 'sources' not in index and list(index['watermarks'].values()) == [
+            [os.stat(results / 'round-2.xml').st_mtime_ns, 'round-2.xml']]
+
+    def test_archive_and_legacy_index(self, tmp_path):
+        results = tmp_path / 'results'
+        archive = tmp_path / 'results' / 'archive'
+        report = tmp_path / 'report'
+        results.mkdir()
+        report.mkdir()
+        write(results / 'round-1.xml', junit(('test_a', '')))
+        # 旧版索引逐个记录已处理的文件，迁移为水位线后不再重复统计
+        write(report / INDEX_FILE, json.dumps({'sources': {str(results / 'round-1.xml'): {}}, 'round_count': 1,
+                                               'totals': {'passed': 1, 'failed': 0, 'error': 0, 'skipped': 0},
+                                               'tests': {}, 'recent_rounds': []}))
+        _, new_rounds = build_report(str(report), str(results), archive_dir=str(archive))
+        assert new_rounds == []
+
+        write(results / 'round-2.xml', junit(('test_a', '')))
+        _, new_rounds = build_report(str(report), str(results), archive_dir=str(archive))
+        assert [record['round'] for record in new_rounds] == [2]
+        # 处理过的文件移入归档目录，结果目录只剩未处理的文件
+        assert sorted(os.listdir(results)) == ['archive', 'round-1.xml']
+        assert os.listdir(archive) == ['round-2.xml']
+        _, new_rounds = build_report(str(report), str(results), archive_dir=str(archive))
+        assert new_rounds == []
+
+    def test_soak_jsonl_offset(self, tmp_path):
+        soak = tmp_path / 'aging.jsonl'
+        report = str(tmp_path / 'report')
+
+        def round_record(num, outcome):
+            return json.dumps({'type': 'round', 'round': num, 'time': 1000.0 + num,
+                               'tests': [{'test': 'test_x', 'outcome': outcome, 'duration': 0.1, 'message': ''}]})
+
+        write(soak, json.dumps({'type': 'start', 'time': 1000.0}) + '\n' + round_record(1, 'passed') + '\n'
+              + round_record(2, 'error')[:10])
+        builder = ReportBuilder(report)
+        assert len(builder.add_soak_jsonl(str(soak))) == 1
+        builder.write()
+
+        # 写了一半的行在补全后才处理
+        write(soak, json.dumps({'type': 'start', 'time': 1000.0}) + '\n' + round_record(1, 'passed') + '\n'
+              + round_record(2, 'error') + '\n')
+        builder = ReportBuilder(report)
+        records = builder.add_soak_jsonl(str(soak))
+        assert [record['label'] for record in records] == ['aging.jsonl#2']
+        assert builder.index['tests']['test_x']['history'] == ['p', 'e']
+
+    def test_allure_results(self, tmp_path):
+        results = tmp_path / 'allure-results'
+        results.mkdir()
+        for i, status in enumerate(('passed', 'broken')):
+            write(results / f'{i}-result.json', json.dumps({'name': f'test_{i}', 'fullName': f'mod#test_{i}',
+                                                            'status': status, 'start': 0, 'stop': 1500,
+                                                            'statusDetails': {'message': 'oops'}}))
+        builder = ReportBuilder(str(tmp_path / 'report'))
+        (record,) = builder.update(str(results))
+        assert record['counts']['passed'] == 1 and record['counts']['error'] == 1
+        assert builder.index['tests']['mod#test_1']['message'] == 'oops'
+        assert os.path.exists(builder.write())
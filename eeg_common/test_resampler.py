@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from eeg_common.resampler import PolyphaseDecimator, design_decimation_taps
+
+
+class TestPolyphaseDecimator:
+    def test_chunked_output_matches_single_call(self):
+        data = np.random.default_rng(0).normal(size=(3, 1000))
+        whole = PolyphaseDecimator(3, 8).process(data)
+        decimator = PolyphaseDecimator(3, 8)
+        parts = [decimator.process(data[:, start:start + size])
+                 for start, size in zip(range(0, 1000, 37), [37] * 28)]
+        assert whole.shape == (3, 125)
+        assert np.allclose(np.hstack(parts), whole)
+
+    def test_matches_direct_convolution(self):
+        data = np.random.default_rng(1).normal(size=(1, 400))
+        decimator = PolyphaseDecimator(1, 4)
+        expected = np.convolve(data[0], decimator.taps)[:400][::4]
+        assert np.allclose(decimator.process(data)[0], expected)
+
+    def test_rejects_aliasing_tone(self):
+        # 1 kHz 抽取到 125 Hz：10 Hz 信号保留，100 Hz 信号（高于输出奈奎斯特频率）被滤除
+        t = np.arange(4000) / 1000.0
+        decimator = PolyphaseDecimator.from_rates(2, 1000, 125)
+        output = decimator.process(np.vstack((np.sin(2 * np.pi * 10 * t), np.sin(2 * np.pi * 100 * t))))
+        steady = output[:, 100:]
+        assert np.abs(steady[0]).max() > 0.9
+        assert np.abs(steady[1]).max() < 0.01
+
+    def test_taps_are_cached(self):
+        assert design_decimation_taps(8) is design_decimation_taps(8)
+
+    def test_rejects_non_integer_ratio(self):
+        with pytest.raises(ValueError):
+            PolyphaseDecimator.from_rates(1, 250, 100)
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from eeg_common.ring_buffer import RingBuffer
+
+
+class TestRingBuffer:
+    def test_write_and_read_across_wrap(self):
+        ring = RingBuffer(2, 10)
+        data = np.arange(24, dtype=np.float64).reshape(2, 12)
+        ring.write(data[:, :7])
+        ring.write(data[:, 7:])
+        assert ring.head == 12
+        assert ring.tail == 2
+        assert np.array_equal(ring.read(2, 12), data[:, 2:12])
+
+    def test_read_into_preallocated_output(self):
+        ring = RingBuffer(1, 8)
+        ring.write(np.arange(8, dtype=np.float64).reshape(1, 8))
+        out = np.zeros((1, 4))
+        result = ring.read(4, 8, out=out)
+        assert result is out
+        assert np.array_equal(out[0], [4, 5, 6, 7])
+
+    def test_oversized_write_keeps_latest(self):
+        ring = RingBuffer(1, 4)
+        ring.write(np.arange(10, dtype=np.float64).reshape(1, 10))
+        assert ring.head == 10
+        assert np.array_equal(ring.read(6, 10)[0], [6, 7, 8, 9])
+
+    def test_read_overwritten_range_raises(self):
+        ring = RingBuffer(1, 4)
+        ring.write(np.zeros((1, 6)))
+        with pytest.raises(ValueError):
+            ring.read(0, 4)
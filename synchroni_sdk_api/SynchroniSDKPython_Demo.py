@@ -1,26 +1,40 @@
+import argparse
 import traceback
-import matplotlib.pyplot as plt
-plt.rcParams['font.family'] = 'SimHei'  # 使用黑体字体
-plt.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
+import matplotlib
+matplotlib.rcParams['font.family'] = 'SimHei'  # 使用黑体字体
+matplotlib.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
 
+import os
 import sys
 import signal
+import threading
+import time
 from typing import List
 from PyQt5 import QtWidgets, QtCore
 from PyQt5.QtCore import QRunnable, QThreadPool
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT
+from matplotlib.figure import Figure
 import numpy as np
-from scipy.signal.windows import gaussian
-from scipy.signal import butter, filtfilt, medfilt, convolve
-from scipy.interpolate import CubicSpline, interp1d
-# 假设 sensor 模块已定义，这里省略其具体实现
+# SYNCHRONI_MODE=simulated 时使用进程内模拟的 sensor 模块，无需蓝牙和设备
+import sensor_sim
+sensor_sim.install_if_requested()
 from sensor import *
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+from eeg_common.clock_sync import ClockDriftEstimator
+from eeg_common.resampler import PolyphaseDecimator
+from state_waiter import DeviceStateWaiter
+# 回放、录制只在用到时才导入（见 start_playback、toggle_recording），缩短启动时间
+
 SCAN_DEVICE_PERIOD_IN_MS = 3000
 PACKAGE_COUNT = 10
 POWER_REFRESH_PERIOD_IN_MS = 60000
+CONNECT_TIMEOUT = 30  # 等待设备进入 Ready 状态的超时时间（秒）
 PLOT_UPDATE_INTERVAL = 100  # 更新图像的时间间隔
+RECORD_DIR = './recordings'  # 录制文件保存目录
+OVERVIEW_PERIOD = 30  # 周期不短于该值（秒）时，显示缓冲区改存抽取后的数据
+OVERVIEW_RATE = 125  # 抽取后的目标采样率，例如 1000 Hz 抽取为 125 Hz
 
 # 定义周期选项
 PERIOD_OPTIONS = {
@@ -35,20 +49,43 @@ PERIOD_OPTIONS = {
 
 
 class DataProcessingTask(QRunnable):
-    def __init__(self, parent, data):
+    def __init__(self, parent, data, display_samples):
         super().__init__()
         self.parent = parent
         self.data = data
+        self.display_samples = display_samples
 
     def run(self):
         try:
-            self.parent.add_data_to_buffer(self.data)
+            self.parent.add_data_to_buffer(self.data, self.display_samples)
         except Exception as e:
             print(f"DataProcessingTask 中出现异常: {e}")
 
 
+class PlaybackSample:
+    """回放时代替 sensor 模块中的 Sample，只包含处理流程用到的字段"""
+    __slots__ = ('data', 'impedance', 'timeStampInMs')
+
+    def __init__(self, data, timeStampInMs):
+        self.data = data
+        self.impedance = 0
+        self.timeStampInMs = timeStampInMs
+
+
+class PlaybackSensorData:
+    """回放时代替 sensor 模块中的 SensorData"""
+
+    def __init__(self, samples, timestamps):
+        self.dataType = DataType.NTF_EEG
+        timestamps_ms = (timestamps * 1000).tolist()
+        self.channelSamples = [[PlaybackSample(value, ts) for value, ts in zip(channel, timestamps_ms)]
+                               for channel in samples.tolist()]
+
+
 class BluetoothDeviceScanner(QtWidgets.QWidget):
-    data_received = QtCore.pyqtSignal(object)
+    data_received = QtCore.pyqtSignal(object, object)  # 数据包、抽取后用于显示的样本
+    recording_failed = QtCore.pyqtSignal(str)  # 录制写线程出错，回到界面线程停止录制
+    device_ready = QtCore.pyqtSignal(str)  # 正在连接的设备进入 Ready（设备地址），回到界面线程继续初始化
     add_device_signal = QtCore.pyqtSignal(str)
     update_plot_signal = QtCore.pyqtSignal()
     # 定义信号，用于传递绘图数据
@@ -65,6 +102,7 @@ class BluetoothDeviceScanner(QtWidgets.QWidget):
         self.SensorControllerInstance = SensorController()
         self.sensor_profiles = {}
         self.current_sensor = None
+        self.state_waiter = None  # 当前设备的状态等待器，接管 onStateChanged
         self.sampling_rate = 250
         self.period = 1  # 默认周期为 1s
         self.data_buffer = None
@@ -75,10 +113,23 @@ class BluetoothDeviceScanner(QtWidgets.QWidget):
         # self.thread_pool = QThreadPool.globalInstance()  # 获取全局线程池
         # 在类初始化时配置线程池
         self.thread_pool = QThreadPool()
-        self.thread_pool.setMaxThreadCount(4)  # 根据硬件配置调整
+        # 显示缓冲区按数据包顺序滚动写入，任务必须按提交顺序串行执行
+        self.thread_pool.setMaxThreadCount(1)
         self.current_channel = 0  # 默认显示通道 1 的数据
         self.EegChannelCount = 0  # 通道数目初始化为 0
         self.impedance = []  # 阻抗值
+        self.recorder = None  # 录制到磁盘的接收端，未录制时为 None
+        self.player = None  # 回放录制会话时使用
+        self.display_rate = self.sampling_rate  # 显示缓冲区的采样率，长周期时为抽取后的采样率
+        self.decimator = None  # 长周期显示用的抽取器
+        self.decimator_lock = threading.Lock()  # 抽取器在数据回调线程中使用，切换显示周期时在界面线程中重建
+        self.clock_sync = None  # 设备采样时钟相对主机时钟的漂移估计，连接设备后创建
+        self.samples_received = 0  # 本次连接收到的样本数，即下一个样本的序号
+        # 已发起连接、等待进入 Ready 的设备（扫描结果），连接流程由 device_ready 信号继续，不阻塞界面线程
+        self.pending_device = None
+        self.connect_timer = QtCore.QTimer(self)
+        self.connect_timer.setSingleShot(True)
+        self.connect_timer.timeout.connect(self.on_connect_timeout)
         self.initUI()
         self.timer = QtCore.QTimer(self)
         self.timer.timeout.connect(self.update_plot)
@@ -87,6 +138,8 @@ class BluetoothDeviceScanner(QtWidgets.QWidget):
         self.add_device_signal.connect(self.add_device_to_list)
         self.update_plot_signal.connect(self.update_plot)
         self.data_received.connect(self.start_data_processing)
+        self.recording_failed.connect(self.on_recording_failed)
+        self.device_ready.connect(self.finish_connect)
 
         if not self.SensorControllerInstance.hasDeviceFoundCallback:
             self.SensorControllerInstance.onDeviceFoundCallback = self.deviceFoundCallback
@@ -97,7 +150,7 @@ class BluetoothDeviceScanner(QtWidgets.QWidget):
         main_layout = QtWidgets.QHBoxLayout()
 
         left_layout = QtWidgets.QVBoxLayout()
-        self.figure = plt.figure()
+        self.figure = Figure()
         self.canvas = FigureCanvas(self.figure)
         left_layout.addWidget(self.canvas,stretch=18)
         toolbar = NavigationToolbar2QT(self.canvas, self)
@@ -163,6 +216,11 @@ class BluetoothDeviceScanner(QtWidgets.QWidget):
         
         right_layout.addLayout(filter_layout1)
         right_layout.addLayout(filter_layout2)
+
+        # 录制开关，勾选后把原始数据和时间戳持续写入磁盘
+        self.record_checkbox = QtWidgets.QCheckBox('录制数据到磁盘')
+        self.record_checkbox.stateChanged.connect(self.toggle_recording)
+        right_layout.addWidget(self.record_checkbox)
         
         # 连接信号与槽
         self.hpf_checkbox.stateChanged.connect(self.toggle_hpf)
@@ -223,6 +281,33 @@ class BluetoothDeviceScanner(QtWidgets.QWidget):
         else:
             print("60Hz陷波器已关闭")
             self.current_sensor.setParam("FILTER_60Hz", "OFF")
+
+    def toggle_recording(self, state):
+        if state == QtCore.Qt.Checked:
+            if self.EegChannelCount == 0:
+                print('当前未连接设备，无法录制')
+                self.record_checkbox.setChecked(False)
+                return
+            if self.recorder is None:
+                from eeg_common.recorder import SessionRecorder
+                directory = os.path.join(RECORD_DIR, time.strftime('%Y%m%d_%H%M%S', time.localtime()))
+                self.recorder = SessionRecorder(directory, self.EegChannelCount, self.sampling_rate)
+                self.recorder.start()
+                print(f"开始录制到 {directory}")
+        elif self.recorder is not None:
+            recorder = self.recorder
+            self.recorder = None
+            try:
+                recorder.stop()
+            except Exception as e:
+                print(f"录制数据写入磁盘出错: {e}")
+
+    def on_recording_failed(self, message):
+        """
+        录制写线程出错后由数据回调线程经信号通知：取消勾选即走 toggle_recording 的停止流程并打印错误。
+        """
+        print(message)
+        self.record_checkbox.setChecked(False)
             
 
     def start_scan(self):
@@ -263,42 +348,108 @@ class BluetoothDeviceScanner(QtWidgets.QWidget):
 
                 self.current_sensor.onDataCallback = self.onDataCallback
                 self.current_sensor.onPowerChanged = self.onPowerChanged
-                self.current_sensor.onStateChanged = self.onStateChanged
+                self.state_waiter = DeviceStateWaiter(self.current_sensor, self.onStateChanged)
                 self.current_sensor.onErrorCallback = self.onErrorCallback
 
-                if self.current_sensor.deviceState != DeviceStateEx.Ready:
-                    if not self.current_sensor.connect():
-                        print('connect device: ' + self.current_sensor.BLEDevice.Name + ' failed')
-                        return
-
-                if not self.current_sensor.hasInited:
-                    # result = self.current_sensor.setParam('DEBUG_BLE_DATA_PATH', '/temp/test.csv')
-                    if not self.current_sensor.init(PACKAGE_COUNT, POWER_REFRESH_PERIOD_IN_MS):
-                        print('init device: ' + self.current_sensor.BLEDevice.Name + ' failed')
-                        return
-                    deviceInfo = self.current_sensor.getDeviceInfo()
-                    self.sampling_rate = deviceInfo.EegSampleRate
-                    self.EegChannelCount = deviceInfo.EegChannelCount
-                    self.update_buffer_size()
-                    # 清空原有的通道选项
-                    self.channel_combobox.clear()
-                    # 根据读取到的通道数目添加通道选项
-                    for i in range(self.EegChannelCount):
-                        self.channel_combobox.addItem(f"通道 {i + 1}")
-                    self.channel_combobox.setCurrentIndex(0)
-
-                if not self.current_sensor.startDataNotification():
-                    print('start data transfer with device: ' + self.current_sensor.BLEDevice.Name + ' failed')
+                self.pending_device = target_device
+                if self.current_sensor.deviceState == DeviceStateEx.Ready:
+                    self.finish_connect(device_address)
                     return
+                # 不在界面线程中等待：onStateChanged 收到 Ready 后经 device_ready 信号回到界面线程继续初始化，
+                # 超时由 connect_timer 处理。先启动定时器再连接，状态回调可能在 connect 返回前就已触发
+                self.connect_timer.start(CONNECT_TIMEOUT * 1000)
+                if not self.current_sensor.connect():
+                    self.connect_timer.stop()
+                    self.pending_device = None
+                    print('connect device: ' + self.current_sensor.BLEDevice.Name + ' failed')
+            except Exception as e:
+                print(f"连接设备出错: {e}")
 
-                self.connected_device = target_device
-                self.sensor_profiles[device_address] = self.current_sensor
-                self.disconnect_button.setEnabled(True)
+    def on_connect_timeout(self):
+        device = self.pending_device
+        if device is None:
+            return
+        self.pending_device = None
+        print('device: ' + device.Name + ' not ready after ' + str(CONNECT_TIMEOUT) + 's')
+        # 放弃这次连接：断开半连接的设备并清掉回调，再次点击时重新开始完整的连接流程
+        sensor = self.current_sensor
+        self.current_sensor = None
+        if self.state_waiter is not None:
+            self.state_waiter.close()
+            self.state_waiter = None
+        if sensor is not None:
+            sensor.onDataCallback = None
+            sensor.onPowerChanged = None
+            sensor.onErrorCallback = None
+            try:
+                sensor.disconnect()
+            except Exception as e:
+                print(f"断开设备出错: {e}")
 
-                self.init_blitting()
+    def finish_connect(self, device_address):
+        """
+        设备进入 Ready 后在界面线程中执行：初始化、读取设备信息并开启数据通知。
+        超时或已改为连接其他设备时，迟到的 Ready 不再处理。
 
-            except Exception as e:
-                print(f"连接设备出错: {e}")
+        :param device_address: 进入 Ready 的设备地址
+        """
+        if self.pending_device is None or self.pending_device.Address != device_address:
+            return
+        self.connect_timer.stop()
+        target_device = self.pending_device
+        self.pending_device = None
+        try:
+            if not self.current_sensor.hasInited:
+                # result = self.current_sensor.setParam('DEBUG_BLE_DATA_PATH', '/temp/test.csv')
+                if not self.current_sensor.init(PACKAGE_COUNT, POWER_REFRESH_PERIOD_IN_MS):
+                    print('init device: ' + self.current_sensor.BLEDevice.Name + ' failed')
+                    return
+                deviceInfo = self.current_sensor.getDeviceInfo()
+                self.sampling_rate = deviceInfo.EegSampleRate
+                self.EegChannelCount = deviceInfo.EegChannelCount
+                self.update_buffer_size()
+                # 清空原有的通道选项
+                self.channel_combobox.clear()
+                # 根据读取到的通道数目添加通道选项
+                for i in range(self.EegChannelCount):
+                    self.channel_combobox.addItem(f"通道 {i + 1}")
+                self.channel_combobox.setCurrentIndex(0)
+
+            self.clock_sync = ClockDriftEstimator(self.sampling_rate)
+            self.samples_received = 0
+            if not self.current_sensor.startDataNotification():
+                print('start data transfer with device: ' + self.current_sensor.BLEDevice.Name + ' failed')
+                return
+
+            self.connected_device = target_device
+            self.sensor_profiles[device_address] = self.current_sensor
+            self.disconnect_button.setEnabled(True)
+
+            self.init_blitting()
+
+        except Exception as e:
+            print(f"连接设备出错: {e}")
+
+    def start_playback(self, directory, speed=1.0):
+        """
+        回放录制的会话：数据包经 data_received 信号进入与真实设备完全相同的处理和绘图流程。
+        """
+        from eeg_common.playback import SessionPlayer
+        self.player = SessionPlayer(directory, self.onPlaybackData, PACKAGE_COUNT, speed)
+        self.sampling_rate = self.player.session.sampling_rate
+        self.EegChannelCount = self.player.session.channel_count
+        self.update_buffer_size()
+        self.channel_combobox.clear()
+        for i in range(self.EegChannelCount):
+            self.channel_combobox.addItem(f"通道 {i + 1}")
+        self.channel_combobox.setCurrentIndex(0)
+        self.init_blitting()
+        self.player.start()
+        print(f"开始回放 {directory}，倍速: {speed or '不限速'}")
+
+    def onPlaybackData(self, samples, timestamps):
+        # 录制时保存的已经是校正后的主机时间，直接使用
+        self.ingest_packet(PlaybackSensorData(samples, timestamps), timestamps)
 
     def add_device_to_list(self, item_text):
         self.device_list.addItem(item_text)
@@ -311,15 +462,21 @@ class BluetoothDeviceScanner(QtWidgets.QWidget):
                 try:
                     sensor.stopDataNotification()
                     sensor.disconnect()
+                    if self.clock_sync is not None and self.clock_sync.ready:
+                        print(f"设备时钟漂移 {self.clock_sync.drift_ppm:.1f} ppm，"
+                              f"实际采样率 {self.clock_sync.effective_rate:.3f} Hz，"
+                              f"剔除异常到达时间 {self.clock_sync.rejected} 个")
                     sensor.onDataCallback = None  # 清除回调引用
                     print(f"Disconnected from device {self.connected_device.Name}")
                     self.connected_device = None
                     self.disconnect_button.setEnabled(False)
                     self.current_sensor.onDataCallback = None
                     self.current_sensor.onPowerChanged = None
-                    self.current_sensor.onStateChanged = None
+                    self.state_waiter.close()
+                    self.state_waiter = None
                     self.current_sensor.onErrorCallback = None
                     self.current_sensor = None
+                    self.record_checkbox.setChecked(False)
                     # 停止数据更新相关操作，但不清除绘图
                     self.data_buffer = None
                     self.buffer_index = 0
@@ -351,7 +508,39 @@ class BluetoothDeviceScanner(QtWidgets.QWidget):
 
     def onDataCallback(self, sensor: SensorProfile, data: SensorData):
         if data and data.channelSamples and data.dataType in [DataType.NTF_EEG]:
-            self.data_received.emit(data)
+            # 回调按到达顺序串行执行，在这里记录到达时间并更新漂移估计
+            arrival_time = time.time()
+            indices = self.samples_received + np.arange(len(data.channelSamples[0]))
+            self.samples_received += len(indices)
+            timestamps = None
+            if self.clock_sync is not None and len(indices):
+                self.clock_sync.update(indices[-1], arrival_time)
+                timestamps = self.clock_sync.corrected(indices)
+            self.ingest_packet(data, timestamps)
+
+    def ingest_packet(self, data, timestamps=None):
+        """
+        在按到达顺序串行执行的数据回调（设备回调线程或回放线程）中调用：抽取器保存有跨包的滤波历史和抽取相位，
+        必须按数据顺序处理，因此在这里完成抽取，再经 data_received 交给线程池写入显示缓冲区。
+        录制同样在这里入队，保证写盘顺序与采集顺序一致。
+
+        :param timestamps: 按主机时间校正后的每个样本时间戳（秒），为 None 时录制使用设备上报的时间戳
+        """
+        try:
+            samples = np.array([[sample.data for sample in channel] for channel in data.channelSamples])
+            with self.decimator_lock:
+                display_samples = self.decimator.process(samples) if self.decimator is not None else samples
+            recorder = self.recorder
+            if recorder is not None and recorder.error is None:
+                if timestamps is None:
+                    timestamps = np.array([sample.timeStampInMs for sample in data.channelSamples[0]]) / 1000.0
+                try:
+                    recorder.append(samples, timestamps)
+                except RuntimeError as e:
+                    self.recording_failed.emit(str(e))
+            self.data_received.emit(data, display_samples)
+        except Exception as e:
+            print(f"ingest_packet 方法中出现异常: {e}")
 
     def onPowerChanged(self, sensor: SensorProfile, power: int):
         print('connected sensor: ' + sensor.BLEDevice.Name + ' power: ' + str(power))
@@ -364,12 +553,19 @@ class BluetoothDeviceScanner(QtWidgets.QWidget):
 
     def onStateChanged(self, sensor: SensorProfile, newstate: DeviceStateEx):
         print('device: ' + sensor.BLEDevice.Name + str(newstate))
+        # 回调在 SDK 线程中触发，是否为正在连接的设备由 finish_connect 在界面线程中按地址判断
+        if newstate == DeviceStateEx.Ready:
+            self.device_ready.emit(sensor.BLEDevice.Address)
 
     def onErrorCallback(self, sensor: SensorProfile, reason: str):
         print('device: ' + sensor.BLEDevice.Name + reason)
 
     def update_buffer_size(self):
-        buffer_size = int(self.period * self.sampling_rate)
+        factor = max(1, int(self.sampling_rate // OVERVIEW_RATE)) if self.period >= OVERVIEW_PERIOD else 1
+        with self.decimator_lock:
+            self.decimator = PolyphaseDecimator(self.EegChannelCount, factor) if factor > 1 and self.EegChannelCount else None
+        self.display_rate = self.sampling_rate / factor if self.decimator is not None else self.sampling_rate
+        buffer_size = int(self.period * self.display_rate)
         self.data_buffer = np.zeros((self.EegChannelCount, buffer_size))
         self.buffer_index = 0
 
@@ -497,15 +693,20 @@ class BluetoothDeviceScanner(QtWidgets.QWidget):
     #         print(f"add_data_to_buffer 方法中出现异常: {e}")
     #         print(traceback.format_exc())  # 打印详细的异常堆栈信息
     
-    def add_data_to_buffer(self, data: SensorData):
+    def add_data_to_buffer(self, data: SensorData, display_samples):
+        """
+        :param display_samples: ingest_packet 抽取后用于显示的样本（通道 × 样本）
+        """
         try:
             if data and data.channelSamples:
                 for i, channel in enumerate(data.channelSamples):
                     if i >= len(self.impedance):
                         self.impedance.append([])
-                    new_data = np.array([sample.data for sample in channel])
+                    new_data = display_samples[i]
                     buffer_size = len(self.data_buffer[i])
                     num_samples = len(new_data)
+                    if num_samples == 0:
+                        continue
 
                     # 处理数据添加到缓冲区
                     self.data_buffer[i] = np.roll(self.data_buffer[i], -num_samples)
@@ -528,8 +729,8 @@ class BluetoothDeviceScanner(QtWidgets.QWidget):
         self.ax.legend(handles=[self.line], loc='upper right')
 
 
-    def start_data_processing(self, data):
-        task = DataProcessingTask(self, data)
+    def start_data_processing(self, data, display_samples):
+        task = DataProcessingTask(self, data, display_samples)
         self.thread_pool.start(task)
         
     def init_plot(self):
@@ -592,7 +793,7 @@ class BluetoothDeviceScanner(QtWidgets.QWidget):
     def update_plot(self):
         try:
             if self.data_buffer is not None and self.current_channel < self.EegChannelCount:
-                buffer_size = int(self.period * self.sampling_rate)
+                buffer_size = int(self.period * self.display_rate)
                 time_axis = np.linspace(0, self.period, buffer_size)
                 y_data = self.data_buffer[self.current_channel]
                 self.line.set_data(time_axis, y_data)
@@ -677,10 +878,21 @@ class BluetoothDeviceScanner(QtWidgets.QWidget):
         # self.update_plot()
 
 
+def parse_speed(text):
+    # 'max' 表示不限速回放
+    return None if text == 'max' else float(text)
+
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='SynchroniSDKPython Demo')
+    parser.add_argument('--playback', help='回放录制的会话目录，不连接真实设备')
+    parser.add_argument('--speed', type=parse_speed, default=1.0, help='回放倍速，如 1、4，或 max 表示不限速')
+    args = parser.parse_args()
     try:
         app = QtWidgets.QApplication(sys.argv)
         scanner = BluetoothDeviceScanner()
+        if args.playback:
+            scanner.start_playback(args.playback, args.speed)
 
         def sigint_handler(signal, frame):
             app.quit()
@@ -0,0 +1,107 @@
+import json
+import os
+import sys
+
+import pytest
+
+from phase_timing import DEFAULT_TOLERANCE, PhaseRecorder, append_history, compare, load_baseline, save_baseline, \
+    summarize
+from sensor_sim import MODE_ENV, SENSOR_MODES
+
+phase_recorder = PhaseRecorder()
+
+
+def pytest_addoption(parser):
+    parser.addoption('--sensor-mode', choices=SENSOR_MODES, default=None,
+                     help='hardware 使用真实 sensor SDK，simulated 使用进程内模拟器（无需蓝牙）；'
+                          '默认读取 SYNCHRONI_MODE 环境变量')
+    group = parser.getgroup('phase-timing', 'SDK 阶段耗时')
+    group.addoption('--phase-history', default=None,
+                    help='把每次 SDK 调用的耗时追加到该文件（.csv 为 CSV，其他扩展名为 JSONL）')
+    group.addoption('--phase-baseline', default=None,
+                    help='阶段耗时基线 JSON；p50/p95 相对基线回归时测试会话以失败退出')
+    group.addoption('--phase-update-baseline', action='store_true',
+                    help='用本次的阶段耗时覆盖 --phase-baseline 指定的基线')
+    group.addoption('--phase-tolerance', type=float, default=DEFAULT_TOLERANCE,
+                    help=f'判定回归的相对变慢比例，默认 {DEFAULT_TOLERANCE}')
+
+
+def pytest_configure(config):
+    # 测试模块在收集阶段才导入 sensor，在此之前设置好环境变量即可由 install_if_requested 生效
+    mode = config.getoption('sensor_mode')
+    if mode:
+        os.environ[MODE_ENV] = mode
+
+
+@pytest.fixture(scope='session', autouse=True)
+def phase_timing():
+    """
+    整个会话内为 SDK 调用计时。测试模块在收集阶段已导入 sensor（真实 SDK 或模拟器），这里直接替换其方法。
+    """
+    from discovery import DiscoveryCache
+    from state_waiter import DeviceStateWaiter
+    phase_recorder.instrument(sys.modules.get('sensor'), DeviceStateWaiter, DiscoveryCache)
+    yield phase_recorder
+    phase_recorder.restore()
+
+
+def pytest_runtest_setup(item):
+    # fixture 中的扫描、连接也计入该用例
+    phase_recorder.test = item.nodeid
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_teardown(item):
+    yield
+    records = phase_recorder.for_test(item.nodeid)
+    phase_recorder.test = None
+    if not records:
+        return
+    totals = {}
+    for record in records:
+        totals[record['phase']] = totals.get(record['phase'], 0.0) + record['duration_ms']
+    # junit XML 中以 property 记录，增量报告和设备矩阵都能读到
+    for phase, duration in totals.items():
+        item.user_properties.append((f'phase.{phase}_ms', round(duration, 1)))
+    try:
+        import allure
+    except ImportError:
+        return
+    allure.attach(json.dumps(records, ensure_ascii=False, indent=2), name='SDK 阶段耗时',
+                  attachment_type=allure.attachment_type.JSON)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    config = session.config
+    records = phase_recorder.records
+    if not records:
+        return
+    history = config.getoption('phase_history')
+    if history:
+        append_history(history, records)
+    summary = summarize(records)
+    config._phase_summary = summary
+    config._phase_regressions = []
+    baseline = config.getoption('phase_baseline')
+    if not baseline:
+        return
+    if config.getoption('phase_update_baseline'):
+        save_baseline(baseline, summary)
+    elif os.path.exists(baseline):
+        regressions = compare(summary, load_baseline(baseline), config.getoption('phase_tolerance'))
+        config._phase_regressions = regressions
+        if regressions and exitstatus == pytest.ExitCode.OK:
+            session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    summary = getattr(config, '_phase_summary', None)
+    if not summary:
+        return
+    terminalreporter.section('SDK 阶段耗时')
+    for phase, stats in summary.items():
+        terminalreporter.write_line(f"{phase:<32} n={stats['count']:<4} p50 {stats['p50']:9.1f} ms  "
+                                    f"p95 {stats['p95']:9.1f} ms  max {stats['max']:9.1f} ms")
+    for regression in config._phase_regressions:
+        terminalreporter.write_line(f"回归: {regression['phase']} {regression['stat']} "
+                                    f"{regression['baseline']:.1f} ms -> {regression['current']:.1f} ms", red=True)
@@ -0,0 +1,96 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class DiscoveryCache:
+    """
+    扫描结果缓存：按 MAC 地址保存扫描到的 BLEDevice，在 ttl 秒内重复查找同一设备时直接返回缓存，不再扫描。
+
+    需要扫描时，device_found_callback 一发现目标地址就唤醒等待方并停止扫描，
+    不再固定等满整个扫描周期。整个测试进程共用一个实例，相当于会话级缓存。
+    """
+
+    def __init__(self, ttl=120.0):
+        """
+        :param ttl: 缓存有效期（秒），超过后重新扫描
+        """
+        self.ttl = ttl
+        # MAC 地址 -> (BLEDevice, 发现时间)
+        self._devices = {}
+        # MAC 地址 -> threading.Event，正在等待的地址
+        self._waiting = {}
+        self._lock = threading.Lock()
+        # 统计信息：缓存命中次数、实际扫描次数
+        self.hits = 0
+        self.scans = 0
+
+    def _on_devices_found(self, device_list):
+        now = time.monotonic()
+        with self._lock:
+            for device in device_list:
+                self._devices[device.Address] = (device, now)
+                event = self._waiting.get(device.Address)
+                if event is not None:
+                    event.set()
+
+    def remember(self, devices):
+        """
+        把其他途径（例如 asyncScan）得到的设备加入缓存。
+        """
+        self._on_devices_found(devices)
+
+    def cached(self, address):
+        """
+        :return: 未过期的缓存设备，没有时为 None
+        """
+        with self._lock:
+            entry = self._devices.get(address)
+        if entry is not None and time.monotonic() - entry[1] <= self.ttl:
+            return entry[0]
+        return None
+
+    def invalidate(self, address=None):
+        with self._lock:
+            if address is None:
+                self._devices.clear()
+            else:
+                self._devices.pop(address, None)
+
+    def find(self, controller, address, scan_period_ms=5000, wait_seconds=8.0, max_retries=3):
+        """
+        查找指定地址的设备：缓存未过期时直接返回，否则扫描，发现目标后立即返回。
+
+        :param controller: SensorController
+        :param address: 目标 MAC 地址
+        :param scan_period_ms: 每次 startScan 的扫描时长（毫秒）
+        :param wait_seconds: 每次扫描最长等待时间（秒）
+        :param max_retries: 最大扫描次数
+        :return: BLEDevice，未找到时为 None
+        """
+        device = self.cached(address)
+        if device is not None:
+            self.hits += 1
+            return device
+        event = threading.Event()
+        with self._lock:
+            self._waiting[address] = event
+        try:
+            for retry in range(max_retries):
+                self.scans += 1
+                controller.onDeviceFoundCallback = self._on_devices_found
+                controller.startScan(scan_period_ms)
+                start = time.monotonic()
+                logger.info(f"Scanning for {address}, up to {wait_seconds} seconds... (Retry {retry + 1})")
+                found = event.wait(wait_seconds)
+                if controller.isScanning:
+                    controller.stopScan()
+                if found:
+                    logger.info(f"Found {address} after {time.monotonic() - start:.2f} seconds")
+                    return self.cached(address)
+        finally:
+            with self._lock:
+                self._waiting.pop(address, None)
+        return None
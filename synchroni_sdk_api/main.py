@@ -1,102 +1,85 @@
+import argparse
+import os
 import subprocess
+import sys
 import time
 import webbrowser
-import socket
-import shutil
 
-# 动态获取 Allure 路径
-ALLURE_PATH = shutil.which('allure')
-if ALLURE_PATH is None:
-    print("未找到 Allure，请确保 Allure 已安装并配置到环境变量中。")
-    exit(1)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+from eeg_common.report import build_report
 
 TEST_FILE = 'test_synchroni_sdk_api.py'
-RESULT_DIR = 'allure-results'
-REPORT_DIR = 'allure-report'
-SERVER_PORT = 8081
-SERVER_URL = f"http://localhost:{SERVER_PORT}"
-
-
-def run_pytest():
+RESULT_DIR = 'test-results'
+REPORT_DIR = 'test-report'
+# 已汇总进报告的结果文件移到这里，test-results 中只保留未处理的文件
+ARCHIVE_DIR = os.path.join(RESULT_DIR, 'archive')
+# 老化测试时页面的自动刷新间隔（秒）
+REPORT_REFRESH = 60
+# SDK 各阶段耗时的历史和基线（见 conftest.py 的 --phase-* 选项）
+PHASE_HISTORY = 'phase-history.csv'
+PHASE_BASELINE = 'phase-baseline.json'
+
+
+def run_pytest(round_num=1):
     """
-    执行 pytest 测试并将结果保存到 allure-results 目录
+    执行 pytest 测试，结果以 junit XML 保存到 test-results 目录，每次执行一个文件。
+    文件名带毫秒和轮次编号，同一秒内结束的多轮不会互相覆盖
+
+    :param round_num: 本次执行的轮次编号（从 1 开始）
     """
     print("开始执行 pytest 测试...")
+    os.makedirs(RESULT_DIR, exist_ok=True)
+    now = time.time()
+    stamp = f"{time.strftime('%Y%m%d_%H%M%S', time.localtime(now))}_{int(now * 1000) % 1000:03d}"
+    result_file = os.path.join(RESULT_DIR, f"round-{stamp}-{round_num:04d}.xml")
+    command = [sys.executable, '-m', 'pytest', '-v', '-s', TEST_FILE, f'--junitxml={result_file}',
+               f'--phase-history={PHASE_HISTORY}']
+    if os.path.exists(PHASE_BASELINE):
+        command.append(f'--phase-baseline={PHASE_BASELINE}')
     try:
-        subprocess.run(['pytest', '-v', '-s', TEST_FILE, f'--alluredir={RESULT_DIR}'], check=False)
+        subprocess.run(command, check=False)
         print("pytest 测试执行完成")
     except Exception as e:
         print(f"pytest 测试执行过程中出现错误: {e}")
 
 
-def generate_allure_report():
-    """
-    依据 allure-results 目录下的结果生成 Allure 报告
-    """
-    print("开始生成 Allure 报告...")
-    try:
-        subprocess.run([ALLURE_PATH, 'generate', RESULT_DIR, '-o', REPORT_DIR, '--clean'], check=True)
-        print("Allure 报告生成完成")
-    except subprocess.CalledProcessError as e:
-        print(f"Allure 报告生成失败: {e}")
-        raise
-
-
-def is_server_running():
+def generate_report(refresh=None):
     """
-    检查 Allure 服务器是否正在运行
+    把新增的测试结果合并进 test-report 目录中的报告，只处理上次之后新出现的结果文件
     """
-    try:
-        with socket.create_connection(('localhost', SERVER_PORT), timeout=1):
-            return True
-    except (ConnectionRefusedError, OSError):
-        return False
+    start = time.perf_counter()
+    path, new_rounds = build_report(REPORT_DIR, RESULT_DIR, refresh=refresh, archive_dir=ARCHIVE_DIR)
+    print(f"报告已更新（新增 {len(new_rounds)} 轮，耗时 {time.perf_counter() - start:.2f}s）: {path}")
+    return path
 
 
-def start_allure_server():
+def open_browser(path):
     """
-    启动 Allure 服务器并等待其启动
+    使用默认浏览器打开报告页面
     """
-    print("启动 Allure 服务器...")
-    server_process = subprocess.Popen([ALLURE_PATH, 'serve', RESULT_DIR, '-p', str(SERVER_PORT)])
-    max_retries = 30
-    retries = 0
-    while retries < max_retries:
-        if is_server_running():
-            print("Allure 服务器已启动")
-            break
-        retries += 1
-        time.sleep(1)
-    else:
-        print("Allure 服务器启动失败，超时等待")
-        server_process.terminate()
-        raise TimeoutError("Allure 服务器启动超时")
-    return server_process
-
-
-def open_browser():
-    """
-    使用默认浏览器打开 Allure 报告页面
-    """
-    print(f"打开浏览器访问 Allure 报告页面: {SERVER_URL}")
-    webbrowser.open(SERVER_URL)
+    url = 'file://' + os.path.abspath(path)
+    print(f"打开浏览器访问测试报告页面: {url}")
+    webbrowser.open(url)
 
 
 def main():
-    run_pytest()
+    parser = argparse.ArgumentParser(description='执行 Synchroni SDK 测试并生成测试报告')
+    parser.add_argument('--rounds', type=int, default=1, help='重复执行的轮数（老化测试），每轮结束后更新报告')
+    parser.add_argument('--no-browser', action='store_true', help='不打开浏览器')
+    args = parser.parse_args()
+
+    refresh = REPORT_REFRESH if args.rounds > 1 else None
     try:
-        generate_allure_report()
-        server_process = start_allure_server()
-        open_browser()
-        try:
-            while True:
-                time.sleep(1)
-        except KeyboardInterrupt:
-            print("用户手动终止，停止 Allure 服务器...")
-            server_process.terminate()
+        for i in range(args.rounds):
+            run_pytest(i + 1)
+            path = generate_report(refresh)
+            if i == 0 and not args.no_browser:
+                open_browser(path)
+    except KeyboardInterrupt:
+        print("用户手动终止")
     except Exception as e:
         print(f"执行过程中出现错误: {e}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
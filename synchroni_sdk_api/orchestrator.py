@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import time
+
+from discovery import DiscoveryCache
+
+logger = logging.getLogger(__name__)
+
+# 同时进行的 BLE 操作（连接、断开、init、setParam、开关数据通知）上限；
+# 多数适配器同时建立多个连接时容易失败，数据接收不受限制
+DEFAULT_MAX_CONCURRENT = 2
+SCAN_PERIOD_IN_MS = 5000
+PACKAGE_COUNT = 5
+POWER_REFRESH_PERIOD_IN_MS = 60 * 1000
+
+
+class LimitedSensorProfile:
+    """
+    包装 SensorProfile：async 开头的方法在信号量内执行，其余属性和方法原样转发。
+    """
+
+    def __init__(self, profile, semaphore):
+        object.__setattr__(self, '_profile', profile)
+        object.__setattr__(self, '_semaphore', semaphore)
+
+    def __getattr__(self, name):
+        attr = getattr(self._profile, name)
+        if not name.startswith('async') or not callable(attr):
+            return attr
+
+        async def limited(*args, **kwargs):
+            async with self._semaphore:
+                return await attr(*args, **kwargs)
+        return limited
+
+    def __setattr__(self, name, value):
+        setattr(self._profile, name, value)
+
+
+class AsyncSensorOrchestrator:
+    """
+    扫描一次，然后用 asyncio.gather 在多台设备上并发执行同一个异步场景；
+    BLE 操作经信号量限流，总耗时接近最慢的一台设备，而不是各设备耗时之和。
+
+    场景是 async def scenario(profile) 形式的协程函数，profile 为 LimitedSensorProfile；
+    场景结束（包括出错）后设备都会被断开。指定了地址但没有扫描到的设备在结果中记为失败，不会被静默略过。
+    """
+
+    def __init__(self, controller, addresses=None, max_concurrent=DEFAULT_MAX_CONCURRENT,
+                 scan_period_ms=SCAN_PERIOD_IN_MS, discovery=None):
+        """
+        :param controller: SensorController
+        :param addresses: 被测设备 MAC 地址列表，为 None 时使用扫描到的全部设备
+        :param max_concurrent: 同时进行的 BLE 操作上限
+        :param discovery: 共用的 DiscoveryCache，地址都已缓存时不再扫描
+        """
+        self.controller = controller
+        self.addresses = list(addresses) if addresses is not None else None
+        self.max_concurrent = max_concurrent
+        self.scan_period_ms = scan_period_ms
+        self.discovery = discovery or DiscoveryCache()
+        self.devices = []
+        # 指定了但没有扫描到的地址
+        self.missing = []
+
+    async def scan(self):
+        """
+        :return: 找到的设备列表，顺序与 addresses 一致；未找到的地址记录在 missing 中
+        """
+        if self.addresses is not None:
+            cached = [self.discovery.cached(address) for address in self.addresses]
+            if all(device is not None for device in cached):
+                self.devices = cached
+                self.missing = []
+                return self.devices
+        found = await self.controller.asyncScan(self.scan_period_ms) or []
+        self.discovery.remember(found)
+        if self.addresses is None:
+            self.devices = list(found)
+        else:
+            by_address = {device.Address: device for device in found}
+            self.devices = [by_address[address] for address in self.addresses if address in by_address]
+            self.missing = [address for address in self.addresses if address not in by_address]
+            if self.missing:
+                logger.warning(f"未扫描到设备: {', '.join(self.missing)}")
+        return self.devices
+
+    async def _run_one(self, device, scenario, semaphore):
+        start = time.perf_counter()
+        entry = {'address': device.Address, 'ok': False, 'result': None, 'error': None}
+        profile = self.controller.requireSensor(device)
+        if profile is None:
+            entry['error'] = 'requireSensor 返回 None'
+            entry['elapsed'] = time.perf_counter() - start
+            return entry
+        limited = LimitedSensorProfile(profile, semaphore)
+        try:
+            entry['result'] = await scenario(limited)
+            entry['ok'] = True
+        except Exception as e:
+            logger.error(f"设备 {device.Address} 场景 {scenario.__name__} 出错: {e!r}")
+            entry['error'] = repr(e)
+        finally:
+            # DeviceStateEx 可能来自真实 SDK 或模拟器，取状态值自身的枚举类型
+            state = profile.deviceState
+            if state != type(state).Disconnected:
+                await limited.asyncDisconnect()
+        entry['elapsed'] = time.perf_counter() - start
+        return entry
+
+    async def run(self, scenario):
+        """
+        在所有设备上并发执行 scenario，尚未扫描时先扫描一次。
+
+        :return: {'scenario', 'elapsed', 'devices': [{'address', 'ok', 'result', 'error', 'elapsed'}]}，
+            devices 与 addresses 一一对应，未扫描到的设备 ok 为 False
+        """
+        if not self.devices:
+            await self.scan()
+        # 信号量需在当前事件循环内创建
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+        start = time.perf_counter()
+        entries = await asyncio.gather(*(self._run_one(device, scenario, semaphore) for device in self.devices))
+        entries = list(entries) + [{'address': address, 'ok': False, 'result': None, 'error': '未扫描到设备',
+                                    'elapsed': 0.0} for address in self.missing]
+        if self.addresses is not None:
+            order = {address: index for index, address in enumerate(self.addresses)}
+            entries.sort(key=lambda entry: order.get(entry['address'], len(order)))
+        return {'scenario': scenario.__name__, 'elapsed': time.perf_counter() - start, 'devices': entries}
+
+
+def _expect(result, step):
+    if result is not True:
+        raise RuntimeError(f'{step} 失败: {result!r}')
+
+
+async def connect_scenario(profile):
+    _expect(await profile.asyncConnect(), 'asyncConnect')
+    _expect(await profile.asyncDisconnect(), 'asyncDisconnect')
+
+
+async def set_param_scenario(profile):
+    _expect(await profile.asyncConnect(), 'asyncConnect')
+    return await profile.asyncSetParam('NTF_EMG', 'ON')
+
+
+async def battery_scenario(profile):
+    _expect(await profile.asyncConnect(), 'asyncConnect')
+    _expect(await profile.asyncInit(PACKAGE_COUNT, POWER_REFRESH_PERIOD_IN_MS), 'asyncInit')
+    return await profile.asyncGetBatteryLevel()
+
+
+def stream_scenario(seconds=1.0):
+    """
+    :return: 接收 seconds 秒数据通知的场景，结果为收到的数据包数
+    """
+    async def stream(profile):
+        packets = []
+        profile.onDataCallback = lambda sensor, data: packets.append(data)
+        try:
+            _expect(await profile.asyncConnect(), 'asyncConnect')
+            _expect(await profile.asyncInit(PACKAGE_COUNT, POWER_REFRESH_PERIOD_IN_MS), 'asyncInit')
+            _expect(await profile.asyncStartDataNotification(), 'asyncStartDataNotification')
+            await asyncio.sleep(seconds)
+            _expect(await profile.asyncStopDataNotification(), 'asyncStopDataNotification')
+        finally:
+            profile.onDataCallback = None
+        return len(packets)
+    stream.__name__ = 'stream_scenario'
+    return stream
@@ -0,0 +1,200 @@
+import contextvars
+import csv
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+# 计时的 SDK 方法：(方法名, 阶段名)；异步方法与同步方法记为同一阶段
+PROFILE_PHASES = (
+    ('connect', 'connect'), ('asyncConnect', 'connect'),
+    ('init', 'init'), ('asyncInit', 'init'),
+    ('startDataNotification', 'startDataNotification'), ('asyncStartDataNotification', 'startDataNotification'),
+    ('stopDataNotification', 'stopDataNotification'), ('asyncStopDataNotification', 'stopDataNotification'),
+    ('disconnect', 'disconnect'), ('asyncDisconnect', 'disconnect'),
+)
+CONTROLLER_PHASES = (('asyncScan', 'scan'), ('scan', 'scan'))
+HISTORY_FIELDS = ('run', 'time', 'test', 'phase', 'duration_ms', 'ok')
+# 相对基线的回归判定：分位数变慢超过 tolerance 比例，且绝对值超过 MIN_REGRESSION_MS
+DEFAULT_TOLERANCE = 0.25
+MIN_REGRESSION_MS = 50.0
+# 正在计时的阶段；异步方法内部调用同步方法（asyncio.to_thread 会带上上下文）时只记外层一次
+_current_phase = contextvars.ContextVar('phase_timing_current', default=None)
+
+
+class PhaseRecorder:
+    """
+    记录 SDK 各阶段耗时；instrument 之后，被替换的方法每次调用都会写入一条记录。
+    """
+
+    def __init__(self):
+        self.test = None
+        self.records = []
+        self._lock = threading.Lock()
+        self._restore = []
+
+    def record(self, phase, duration, ok=True):
+        """
+        :param duration: 耗时（秒）
+        """
+        with self._lock:
+            self.records.append({'test': self.test, 'phase': phase, 'duration_ms': duration * 1000.0, 'ok': ok})
+
+    def for_test(self, test):
+        with self._lock:
+            return [record for record in self.records if record['test'] == test]
+
+    def _timed(self, func, phase):
+        """
+        :param phase: 阶段名，或根据调用参数得出阶段名的函数
+        """
+        name_of = phase if callable(phase) else (lambda *args: phase)
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                name = name_of(*args)
+                if _current_phase.get() == name:
+                    return await func(*args, **kwargs)
+                token = _current_phase.set(name)
+                start = time.perf_counter()
+                result = False
+                try:
+                    result = await func(*args, **kwargs)
+                    return result
+                finally:
+                    self.record(name, time.perf_counter() - start, result is not False)
+                    _current_phase.reset(token)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                name = name_of(*args)
+                if _current_phase.get() == name:
+                    return func(*args, **kwargs)
+                token = _current_phase.set(name)
+                start = time.perf_counter()
+                result = False
+                try:
+                    result = func(*args, **kwargs)
+                    return result
+                finally:
+                    self.record(name, time.perf_counter() - start, result is not False)
+                    _current_phase.reset(token)
+        return wrapper
+
+    def _patch(self, cls, attr, phase):
+        func = cls.__dict__.get(attr)
+        if func is None:
+            return
+        setattr(cls, attr, self._timed(func, phase))
+        self._restore.append((cls, attr, func))
+
+    def instrument(self, sensor_module=None, waiter_cls=None, discovery_cls=None):
+        """
+        替换 SensorProfile / SensorController / DeviceStateWaiter / DiscoveryCache 的方法以计时。
+        真实 SDK 和 sensor_sim 都适用；不存在的方法跳过。
+
+        :param sensor_module: sensor 模块
+        :param waiter_cls: DeviceStateWaiter，wait / async_wait 按目标状态记为 wait_for_state.<状态名>
+        :param discovery_cls: DiscoveryCache，只记录真正执行了扫描的 find（命中缓存不计入 scan）
+        """
+        if sensor_module is not None:
+            for attr, phase in PROFILE_PHASES:
+                self._patch(sensor_module.SensorProfile, attr, phase)
+            for attr, phase in CONTROLLER_PHASES:
+                self._patch(sensor_module.SensorController, attr, phase)
+        if waiter_cls is not None:
+            def state_phase(waiter, state, *args):
+                return f"wait_for_state.{getattr(state, 'name', state)}"
+            self._patch(waiter_cls, 'wait', state_phase)
+            self._patch(waiter_cls, 'async_wait', state_phase)
+        if discovery_cls is not None and 'find' in discovery_cls.__dict__:
+            find = discovery_cls.__dict__['find']
+            recorder = self
+
+            @functools.wraps(find)
+            def timed_find(cache, *args, **kwargs):
+                scans = cache.scans
+                start = time.perf_counter()
+                device = find(cache, *args, **kwargs)
+                if cache.scans != scans:
+                    recorder.record('scan', time.perf_counter() - start, device is not None)
+                return device
+
+            discovery_cls.find = timed_find
+            self._restore.append((discovery_cls, 'find', find))
+
+    def restore(self):
+        for cls, attr, func in reversed(self._restore):
+            setattr(cls, attr, func)
+        self._restore = []
+
+
+def summarize(records):
+    """
+    :return: {阶段名: {'count', 'p50', 'p95', 'max'}}，单位毫秒，只统计成功的调用
+    """
+    durations = {}
+    for record in records:
+        if record['ok']:
+            durations.setdefault(record['phase'], []).append(record['duration_ms'])
+    summary = {}
+    for phase, values in sorted(durations.items()):
+        values = np.asarray(values)
+        summary[phase] = {'count': int(values.size), 'p50': float(np.percentile(values, 50)),
+                          'p95': float(np.percentile(values, 95)), 'max': float(values.max())}
+    return summary
+
+
+def compare(summary, baseline, tolerance=DEFAULT_TOLERANCE, min_delta_ms=MIN_REGRESSION_MS):
+    """
+    :param summary: 本次的 summarize 结果
+    :param baseline: 基线的 summarize 结果
+    :return: 回归列表 [{'phase', 'stat', 'baseline', 'current'}]
+    """
+    regressions = []
+    for phase, stats in summary.items():
+        reference = baseline.get(phase)
+        if reference is None:
+            continue
+        for stat in ('p50', 'p95'):
+            current, previous = stats[stat], reference[stat]
+            if current > previous * (1 + tolerance) and current - previous > min_delta_ms:
+                regressions.append({'phase': phase, 'stat': stat, 'baseline': previous, 'current': current})
+    return regressions
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['phases']
+
+
+def save_baseline(path, summary):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'phases': summary}, f, ensure_ascii=False,
+                  indent=2)
+
+
+def append_history(path, records, run=None):
+    """
+    追加到历史文件：扩展名为 .csv 时写 CSV，否则写 JSONL。
+
+    :param run: 本次执行的标识，默认为当前时间
+    """
+    run = run or time.strftime('%Y%m%d_%H%M%S')
+    now = time.time()
+    rows = [dict(record, run=run, time=now) for record in records]
+    if path.endswith('.csv'):
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        with open(path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=HISTORY_FIELDS)
+            if new_file:
+                writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(path, 'a', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + '\n')
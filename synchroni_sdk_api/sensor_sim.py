@@ -0,0 +1,533 @@
+"""
+进程内模拟的 sensor 模块：实现测试套件、演示程序和基准脚本用到的 SensorController / SensorProfile /
+BLEDevice / DeviceStateEx / DataType / SensorData / DeviceInfo 接口，不需要蓝牙适配器和头戴设备即可运行。
+
+模拟设备的通道数、采样率、每包样本数、丢包率、送达抖动和阻抗均可配置。回调与真实 SDK 一样在后台线程中触发。
+
+启用方式（在 import sensor 之前调用 install_if_requested）:
+    SYNCHRONI_MODE=simulated python -m pytest test_synchroni_sdk_api.py
+    SYNCHRONI_MODE=simulated SYNCHRONI_SIM_OPTIONS="channels=4,sample_rate=500,loss=0.01" python SynchroniSDKPython_Demo.py
+    python -m pytest test_synchroni_sdk_api.py --sensor-mode simulated
+"""
+import asyncio
+import enum
+import logging
+import math
+import os
+import random
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# from sensor import * 时导出的名称，与真实 SDK 一致
+__all__ = ['SensorController', 'SensorProfile', 'BLEDevice', 'DeviceInfo', 'DeviceStateEx', 'DataType',
+           'Sample', 'SensorData']
+
+# 选择真实 SDK 或模拟器的环境变量，取值 hardware / simulated
+MODE_ENV = 'SYNCHRONI_MODE'
+SENSOR_MODES = ('hardware', 'simulated')
+# 模拟设备参数，格式为 "key=value,key=value"，key 为 SimulatedDevice 的参数名，另有 devices=N 指定设备数
+OPTIONS_ENV = 'SYNCHRONI_SIM_OPTIONS'
+# 与 test_synchroni_sdk_api.py 的默认被测设备一致
+DEFAULT_ADDRESS = os.environ.get('SYNCHRONI_MAC', 'C4:64:E3:D8:E9:E2')
+
+
+class DataType(enum.IntEnum):
+    NTF_ACC = 0x1
+    NTF_GYRO = 0x2
+    NTF_EULER_DATA = 0x4
+    NTF_QUATERNION = 0x5
+    NTF_GEST = 0x07
+    NTF_EMG = 0x8
+    NTF_MAG_ANGLE_DATA = 0x0D
+    NTF_EEG = 0x10
+    NTF_ECG = 0x11
+    NTF_IMPEDANCE = 0x12
+    NTF_IMU = 0x13
+    NTF_ADS = 0x14
+    NTF_BRTH = 0x15
+    NTF_IMPEDANCE_EXT = 0x16
+
+
+class DeviceStateEx(enum.IntEnum):
+    Disconnected = 0
+    Connecting = 1
+    Connected = 2
+    Ready = 3
+    Disconnecting = 4
+    Invalid = 5
+
+
+class BLEDevice:
+    def __init__(self, name, address, rssi):
+        self.Name = name
+        self.Address = address
+        self.RSSI = rssi
+
+    def __repr__(self):
+        return f'BLEDevice(Name={self.Name!r}, Address={self.Address!r}, RSSI={self.RSSI})'
+
+
+class DeviceInfo(dict):
+    """
+    设备信息：既可以按属性访问（deviceInfo.EegSampleRate），也可以当作字典使用。
+    """
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+class Sample:
+    __slots__ = ('rawData', 'sampleIndex', 'channelIndex', 'data', 'impedance', 'saturation',
+                 'timeStampInMs', 'isLost')
+
+    def __init__(self, rawData, sampleIndex, channelIndex, data, impedance, timeStampInMs):
+        self.rawData = rawData
+        self.sampleIndex = sampleIndex
+        self.channelIndex = channelIndex
+        self.data = data
+        self.impedance = impedance
+        self.saturation = 0.0
+        self.timeStampInMs = timeStampInMs
+        self.isLost = False
+
+
+class SensorData:
+    def __init__(self, deviceMac, dataType, sampleRate, channelSamples, lastPackageIndex):
+        self.deviceMac = deviceMac
+        self.dataType = dataType
+        self.sampleRate = sampleRate
+        self.channelCount = len(channelSamples)
+        self.channelMask = (1 << self.channelCount) - 1
+        self.packageSampleCount = len(channelSamples[0]) if channelSamples else 0
+        self.minPackageSampleCount = self.packageSampleCount
+        self.resolutionBits = 24
+        self.lastPackageIndex = lastPackageIndex
+        self.channelSamples = channelSamples
+
+
+class SimulatedDevice:
+    """
+    一台模拟设备的参数。
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, name='Sync-Sim', rssi=-50, channels=8, sample_rate=250,
+                 packet_size=0, loss=0.0, jitter=0.0, impedance=5000.0, battery=80, connect_delay=0.1,
+                 scan_latency=0.2, amplitude=50.0, seed=None):
+        """
+        :param address: MAC 地址
+        :param name: 设备名，演示程序只列出 OB、Sync 开头的设备
+        :param channels: EEG 通道数
+        :param sample_rate: 采样率（Hz）
+        :param packet_size: 每包样本数，为 0 时使用 init 传入的 packageSampleCount
+        :param loss: 每个数据包被丢弃的概率
+        :param jitter: 每个数据包送达时间的随机延迟上限（秒）
+        :param impedance: 各通道阻抗均值（Ω）
+        :param battery: 电量（0~100）
+        :param connect_delay: 连接、断开时每次状态切换的耗时（秒）
+        :param scan_latency: 扫描时上报设备列表的间隔（秒）
+        :param amplitude: 模拟 EEG 信号幅值（µV）
+        :param seed: 随机数种子，用于复现丢包和抖动
+        """
+        self.address = address
+        self.name = name
+        self.rssi = rssi
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.packet_size = packet_size
+        self.loss = loss
+        self.jitter = jitter
+        self.impedance = impedance
+        self.battery = battery
+        self.connect_delay = connect_delay
+        self.scan_latency = scan_latency
+        self.amplitude = amplitude
+        self.seed = seed
+
+    def ble_device(self):
+        return BLEDevice(self.name, self.address, self.rssi)
+
+
+def parse_options(text):
+    """
+    解析 SYNCHRONI_SIM_OPTIONS，按 SimulatedDevice 参数的默认值类型转换。
+
+    :return: 模拟设备列表
+    """
+    defaults = SimulatedDevice()
+    options = {}
+    count = 1
+    for item in filter(None, (part.strip() for part in (text or '').split(','))):
+        key, _, value = item.partition('=')
+        key = key.strip()
+        if key == 'devices':
+            count = int(value)
+        elif not hasattr(defaults, key):
+            raise ValueError(f'未知的模拟设备参数: {key}')
+        else:
+            default = getattr(defaults, key)
+            options[key] = type(default)(value) if default is not None else int(value)
+    devices = [SimulatedDevice(**options) for _ in range(count)]
+    if count > 1:
+        # 多台设备时按序号改写 MAC 地址的最后一个字节和设备名
+        prefix, last = devices[0].address.rsplit(':', 1)
+        for i, device in enumerate(devices):
+            device.address = f'{prefix}:{(int(last, 16) + i) % 256:02X}'
+            device.name = f'{device.name}-{i + 1}'
+    return devices
+
+
+_devices = parse_options(os.environ.get(OPTIONS_ENV))
+
+
+def configure(*devices):
+    """
+    替换模拟设备列表，并丢弃已创建的 SensorProfile（已连接的设备先断开）。
+    """
+    global _devices
+    _devices = list(devices) or [SimulatedDevice()]
+    controller = SensorController._instance
+    if controller is not None:
+        controller.terminate()
+        controller._profiles = {}
+
+
+def devices():
+    return list(_devices)
+
+
+def install():
+    """
+    把本模块注册为 sensor，之后 from sensor import ... 得到的都是模拟实现。
+    """
+    sys.modules['sensor'] = sys.modules[__name__]
+
+
+def install_if_requested():
+    """
+    SYNCHRONI_MODE 为 simulated 时注册模拟器，否则什么都不做（使用真实 SDK）。
+
+    :return: 是否使用模拟器
+    """
+    if os.environ.get(MODE_ENV, 'hardware') == 'simulated':
+        install()
+        return True
+    return False
+
+
+class SensorProfile:
+    """
+    模拟设备会话。connect / disconnect 立即返回，状态变化由后台线程通过 onStateChanged 上报；
+    startDataNotification 后按采样率实时生成数据包，经 onDataCallback 送达。
+    """
+
+    def __init__(self, device):
+        self._device = device
+        self._ble_device = device.ble_device()
+        self._state = DeviceStateEx.Disconnected
+        self._condition = threading.Condition()
+        self._rng = random.Random(device.seed)
+        self._inited = False
+        self._packet_size = device.packet_size
+        self._power_interval = 0
+        self._stream_stop = None
+        self._power_stop = None
+        self._stream_thread = None
+        self._params = {}
+        # 自启动以来已生成的样本数和数据包数（含丢弃的包）
+        self.samples_generated = 0
+        self.packets_generated = 0
+        self.packets_dropped = 0
+        self.onStateChanged = None
+        self.onErrorCallback = None
+        self.onDataCallback = None
+        self.onPowerChanged = None
+
+    @property
+    def BLEDevice(self):
+        return self._ble_device
+
+    @property
+    def deviceState(self):
+        return self._state
+
+    @property
+    def hasInited(self):
+        return self._inited
+
+    @property
+    def isDataTransfering(self):
+        return self._stream_stop is not None
+
+    def _set_state(self, state):
+        with self._condition:
+            self._state = state
+            self._condition.notify_all()
+        callback = self.onStateChanged
+        if callback is not None:
+            try:
+                callback(self, state)
+            except Exception as e:
+                logger.error(f"onStateChanged 回调出错: {e}")
+
+    def _wait_state(self, state, timeout):
+        with self._condition:
+            return self._condition.wait_for(lambda: self._state == state, timeout)
+
+    def _run_transitions(self, states):
+        def run():
+            for state in states:
+                time.sleep(self._device.connect_delay)
+                self._set_state(state)
+        threading.Thread(target=run, name=f'sim-state-{self._device.address}', daemon=True).start()
+
+    def connect(self):
+        if self._state != DeviceStateEx.Disconnected:
+            return False
+        self._set_state(DeviceStateEx.Connecting)
+        self._run_transitions((DeviceStateEx.Connected, DeviceStateEx.Ready))
+        return True
+
+    def disconnect(self):
+        if self._state in (DeviceStateEx.Disconnected, DeviceStateEx.Disconnecting):
+            return False
+        self._stop_threads()
+        self._inited = False
+        self._set_state(DeviceStateEx.Disconnecting)
+        self._run_transitions((DeviceStateEx.Disconnected,))
+        return True
+
+    def _stop_threads(self):
+        for name in ('_stream_stop', '_power_stop'):
+            event = getattr(self, name)
+            if event is not None:
+                event.set()
+                setattr(self, name, None)
+        thread = self._stream_thread
+        self._stream_thread = None
+        # 在数据回调中断开时不能等待自身所在的线程
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(1.0)
+
+    def init(self, packageSampleCount, powerRefreshInterval):
+        if self._state != DeviceStateEx.Ready:
+            return False
+        self._packet_size = self._device.packet_size or max(1, int(packageSampleCount))
+        self._power_interval = powerRefreshInterval
+        self._inited = True
+        if powerRefreshInterval > 0:
+            self._power_stop = threading.Event()
+            threading.Thread(target=self._power_loop, args=(self._power_stop, powerRefreshInterval / 1000.0),
+                             name=f'sim-power-{self._device.address}', daemon=True).start()
+        return True
+
+    def _power_loop(self, stop, interval):
+        while not stop.wait(interval):
+            callback = self.onPowerChanged
+            if callback is not None:
+                try:
+                    callback(self, self._device.battery)
+                except Exception as e:
+                    logger.error(f"onPowerChanged 回调出错: {e}")
+
+    def startDataNotification(self):
+        if self._state != DeviceStateEx.Ready or not self._inited:
+            return False
+        if self._stream_stop is not None:
+            return True
+        self._stream_stop = threading.Event()
+        self._stream_thread = threading.Thread(target=self._stream_loop, args=(self._stream_stop,),
+                                               name=f'sim-data-{self._device.address}', daemon=True)
+        self._stream_thread.start()
+        return True
+
+    def stopDataNotification(self):
+        if self._stream_stop is None:
+            return self._state == DeviceStateEx.Ready
+        self._stream_stop.set()
+        self._stream_stop = None
+        thread = self._stream_thread
+        self._stream_thread = None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(1.0)
+        return True
+
+    def _make_packet(self, count):
+        device = self._device
+        start = self.samples_generated
+        channels = []
+        for channel in range(device.channels):
+            impedance = device.impedance * (1 + 0.1 * math.sin(channel))
+            samples = []
+            for i in range(start, start + count):
+                t = i / device.sample_rate
+                value = (device.amplitude * math.sin(2 * math.pi * (8 + channel) * t)
+                         + self._rng.gauss(0, device.amplitude * 0.1))
+                samples.append(Sample(int(value * 1000), i, channel, value,
+                                      impedance + self._rng.uniform(-50, 50), i * 1000.0 / device.sample_rate))
+            channels.append(samples)
+        return SensorData(device.address, DataType.NTF_EEG, device.sample_rate, channels, self.packets_generated)
+
+    def _stream_loop(self, stop):
+        device = self._device
+        count = self._packet_size
+        interval = count / device.sample_rate
+        start = time.monotonic()
+        last_due = start
+        index = 0
+        while True:
+            index += 1
+            due = max(start + index * interval + self._rng.uniform(0, device.jitter), last_due)
+            last_due = due
+            if stop.wait(max(0.0, due - time.monotonic())):
+                return
+            packet = self._make_packet(count)
+            self.samples_generated += count
+            self.packets_generated += 1
+            if device.loss and self._rng.random() < device.loss:
+                self.packets_dropped += 1
+                continue
+            callback = self.onDataCallback
+            if callback is not None:
+                try:
+                    callback(self, packet)
+                except Exception as e:
+                    logger.error(f"onDataCallback 回调出错: {e}")
+
+    def getDeviceInfo(self):
+        if self._state != DeviceStateEx.Ready:
+            return None
+        device = self._device
+        return DeviceInfo(DeviceName=device.name, ModelName='SimulatedSensor', HardwareVersion='sim',
+                          FirmwareVersion='sim', EegChannelCount=device.channels, EegSampleRate=device.sample_rate,
+                          EcgChannelCount=0, EcgSampleRate=0, EmgChannelCount=0, EmgSampleRate=0,
+                          AccChannelCount=0, GyroChannelCount=0, MTUSize=247)
+
+    def getBatteryLevel(self):
+        return self._device.battery if self._state == DeviceStateEx.Ready else -1
+
+    def setParam(self, key, value):
+        if self._state != DeviceStateEx.Ready:
+            return 'Error: Not connected'
+        self._params[key] = value
+        return 'OK'
+
+    async def asyncConnect(self):
+        if not self.connect():
+            return False
+        return await asyncio.to_thread(self._wait_state, DeviceStateEx.Ready, 30.0)
+
+    async def asyncDisconnect(self):
+        if not self.disconnect():
+            return False
+        return await asyncio.to_thread(self._wait_state, DeviceStateEx.Disconnected, 15.0)
+
+    async def asyncInit(self, packageSampleCount, powerRefreshInterval):
+        return self.init(packageSampleCount, powerRefreshInterval)
+
+    async def asyncStartDataNotification(self):
+        return self.startDataNotification()
+
+    async def asyncStopDataNotification(self):
+        return await asyncio.to_thread(self.stopDataNotification)
+
+    async def asyncSetParam(self, key, value):
+        return self.setParam(key, value)
+
+    async def asyncGetBatteryLevel(self):
+        return self.getBatteryLevel()
+
+
+class SensorController:
+    """
+    与真实 SDK 一样是单例：requireSensor 对同一设备总是返回同一个 SensorProfile。
+    """
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            instance = super().__new__(cls)
+            instance._profiles = {}
+            instance._scan_stop = None
+            instance.onDeviceFoundCallback = None
+            cls._instance = instance
+        return cls._instance
+
+    @property
+    def isEnable(self):
+        return True
+
+    @property
+    def isScanning(self):
+        return self._scan_stop is not None and not self._scan_stop.is_set()
+
+    @property
+    def hasDeviceFoundCallback(self):
+        return self.onDeviceFoundCallback is not None
+
+    def _found(self):
+        return [device.ble_device() for device in _devices]
+
+    def startScan(self, periodInMs):
+        """
+        开始扫描：每隔 scan_latency 秒通过 onDeviceFoundCallback 上报一次设备列表，periodInMs 后自动停止。
+        """
+        self.stopScan()
+        stop = self._scan_stop = threading.Event()
+        latency = min(device.scan_latency for device in _devices)
+
+        def run():
+            deadline = time.monotonic() + periodInMs / 1000.0
+            while not stop.wait(latency):
+                callback = self.onDeviceFoundCallback
+                if callback is not None:
+                    try:
+                        callback(self._found())
+                    except Exception as e:
+                        logger.error(f"onDeviceFoundCallback 回调出错: {e}")
+                if time.monotonic() >= deadline:
+                    stop.set()
+        threading.Thread(target=run, name='sim-scan', daemon=True).start()
+        return True
+
+    def stopScan(self):
+        if self._scan_stop is not None:
+            self._scan_stop.set()
+            self._scan_stop = None
+        return True
+
+    def scan(self, periodInMs):
+        time.sleep(min(device.scan_latency for device in _devices))
+        return self._found()
+
+    async def asyncScan(self, periodInMs):
+        await asyncio.sleep(min(device.scan_latency for device in _devices))
+        return self._found()
+
+    def requireSensor(self, device):
+        profile = self._profiles.get(device.Address)
+        if profile is None:
+            simulated = next((d for d in _devices if d.address == device.Address), None)
+            if simulated is None:
+                return None
+            profile = self._profiles[device.Address] = SensorProfile(simulated)
+        return profile
+
+    def getSensor(self, deviceMac):
+        return self._profiles.get(deviceMac)
+
+    def getConnectedSensors(self):
+        return [profile for profile in self._profiles.values() if profile.deviceState == DeviceStateEx.Ready]
+
+    def getConnectedDevices(self):
+        return [profile.BLEDevice for profile in self.getConnectedSensors()]
+
+    def terminate(self):
+        self.stopScan()
+        for profile in self._profiles.values():
+            profile.disconnect()
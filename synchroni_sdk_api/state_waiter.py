@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class DeviceStateWaiter:
+    """
+    基于 SensorProfile.onStateChanged 的设备状态等待器：目标状态一到达就唤醒等待方，
+    不再每 0.5s 读一次 deviceState。同步代码用 wait（threading.Event），协程用 async_wait（asyncio Future）。
+
+    创建后接管 profile.onStateChanged，原有的状态回调通过 callback 传入，每次状态变化仍会被调用。
+    """
+
+    def __init__(self, profile, callback=None):
+        """
+        :param profile: SensorProfile
+        :param callback: 状态变化时额外调用的回调，参数同 onStateChanged (sensor, newstate)
+        """
+        self.profile = profile
+        self.callback = callback
+        # 最近一次收到的状态，尚未收到回调时为 None
+        self.state = None
+        self._lock = threading.Lock()
+        self._waiters = []
+        profile.onStateChanged = self._on_state_changed
+
+    def _on_state_changed(self, sensor, newstate):
+        with self._lock:
+            self.state = newstate
+            matched = [waiter for waiter in self._waiters if waiter[0] == newstate]
+            self._waiters = [waiter for waiter in self._waiters if waiter[0] != newstate]
+        for _, notify in matched:
+            notify()
+        if self.callback is not None:
+            try:
+                self.callback(sensor, newstate)
+            except Exception as e:
+                logger.error(f"状态回调出错: {e}")
+
+    def _register(self, target_state, notify):
+        """
+        先登记再读一次当前状态，避免在登记前已经到达目标状态而漏掉回调。
+
+        :return: 已处于目标状态时返回 True（不再登记）
+        """
+        waiter = (target_state, notify)
+        with self._lock:
+            self._waiters.append(waiter)
+        if self.profile.deviceState == target_state:
+            self._unregister(waiter)
+            return True
+        return False
+
+    def _unregister(self, waiter):
+        with self._lock:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def wait(self, target_state, timeout):
+        """
+        阻塞等待设备进入 target_state。
+
+        :param timeout: 超时时间（秒）
+        :return: 是否在超时前到达目标状态
+        """
+        event = threading.Event()
+        if self._register(target_state, event.set):
+            return True
+        if event.wait(timeout):
+            return True
+        self._unregister((target_state, event.set))
+        return False
+
+    async def async_wait(self, target_state, timeout):
+        """
+        协程版本：状态回调在 SDK 线程中触发，通过 call_soon_threadsafe 完成事件循环中的 Future。
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def notify():
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(True))
+
+        if self._register(target_state, notify):
+            return True
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self._unregister((target_state, notify))
+            return False
+
+    def close(self):
+        """
+        解除对 onStateChanged 的接管，丢弃尚未完成的等待（这些调用方会等到各自超时后返回 False）。
+        """
+        self.profile.onStateChanged = None
+        with self._lock:
+            self._waiters = []
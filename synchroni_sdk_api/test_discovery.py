@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import namedtuple
+
+from discovery import DiscoveryCache
+
+Device = namedtuple('Device', ['Address', 'RSSI'])
+
+
+class FakeController:
+    """
+    模拟 SensorController：startScan 后由另一个线程分批上报扫描结果。
+    """
+
+    def __init__(self, batches, delay=0.05):
+        self.batches = batches
+        self.delay = delay
+        self.onDeviceFoundCallback = None
+        self.isScanning = False
+        self.scan_count = 0
+
+    def startScan(self, period_ms):
+        self.isScanning = True
+        self.scan_count += 1
+
+        def run():
+            for batch in self.batches:
+                time.sleep(self.delay)
+                if not self.isScanning:
+                    return
+                self.onDeviceFoundCallback(batch)
+        threading.Thread(target=run, daemon=True).start()
+        return True
+
+    def stopScan(self):
+        self.isScanning = False
+
+
+class TestDiscoveryCache:
+    def test_returns_as_soon_as_target_found(self):
+        target = Device('AA:BB', -50)
+        controller = FakeController([[Device('CC:DD', -70)], [target]])
+        cache = DiscoveryCache()
+        start = time.perf_counter()
+        assert cache.find(controller, 'AA:BB', wait_seconds=5) == target
+        assert time.perf_counter() - start < 1
+        assert controller.isScanning is False
+        # 同一批扫描到的其他设备也进入缓存
+        assert cache.cached('CC:DD') == Device('CC:DD', -70)
+
+    def test_cache_hit_skips_scan(self):
+        controller = FakeController([[Device('AA:BB', -50)]])
+        cache = DiscoveryCache()
+        cache.find(controller, 'AA:BB', wait_seconds=5)
+        cache.find(controller, 'AA:BB', wait_seconds=5)
+        assert controller.scan_count == 1
+        assert cache.hits == 1
+
+    def test_expired_entry_rescans(self):
+        controller = FakeController([[Device('AA:BB', -50)]])
+        cache = DiscoveryCache(ttl=0.01)
+        cache.find(controller, 'AA:BB', wait_seconds=5)
+        time.sleep(0.05)
+        assert cache.cached('AA:BB') is None
+        assert cache.find(controller, 'AA:BB', wait_seconds=5) is not None
+        assert controller.scan_count == 2
+
+    def test_not_found_after_retries(self):
+        controller = FakeController([[Device('CC:DD', -70)]], delay=0.01)
+        cache = DiscoveryCache()
+        assert cache.find(controller, 'AA:BB', wait_seconds=0.1, max_retries=2) is None
+        assert controller.scan_count == 2
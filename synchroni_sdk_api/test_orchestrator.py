@@ -0,0 +1,99 @@
+import asyncio
+from collections import namedtuple
+
+import pytest
+
+import sensor_sim
+from orchestrator import AsyncSensorOrchestrator, connect_scenario, stream_scenario
+from sensor_sim import DeviceStateEx, SensorController
+
+Device = namedtuple('Device', ['Address'])
+
+
+class FakeProfile:
+    """
+    每个 async 调用耗时 delay 秒，记录同时进行的调用数。
+    """
+
+    def __init__(self, counter, delay=0.05):
+        self.counter = counter
+        self.delay = delay
+        self.deviceState = DeviceStateEx.Disconnected
+
+    async def _call(self, state):
+        self.counter['active'] += 1
+        self.counter['peak'] = max(self.counter['peak'], self.counter['active'])
+        await asyncio.sleep(self.delay)
+        self.counter['active'] -= 1
+        self.deviceState = state
+        return True
+
+    async def asyncConnect(self):
+        return await self._call(DeviceStateEx.Ready)
+
+    async def asyncDisconnect(self):
+        return await self._call(DeviceStateEx.Disconnected)
+
+
+class FakeController:
+    def __init__(self, addresses):
+        self.addresses = addresses
+        self.counter = {'active': 0, 'peak': 0}
+        self.profiles = {address: FakeProfile(self.counter) for address in addresses}
+        self.scan_count = 0
+
+    async def asyncScan(self, period_ms):
+        self.scan_count += 1
+        return [Device(address) for address in self.addresses]
+
+    def requireSensor(self, device):
+        return self.profiles.get(device.Address)
+
+
+def test_semaphore_caps_ble_operations():
+    controller = FakeController([f'00:00:00:00:00:0{i}' for i in range(6)])
+    orchestrator = AsyncSensorOrchestrator(controller, max_concurrent=2)
+    result = asyncio.run(orchestrator.run(connect_scenario))
+    assert all(entry['ok'] for entry in result['devices'])
+    assert controller.counter['peak'] == 2
+    # 第二次执行不再扫描
+    asyncio.run(orchestrator.run(connect_scenario))
+    assert controller.scan_count == 1
+
+
+def test_missing_address_and_failure_are_reported():
+    controller = FakeController(['00:00:00:00:00:01', '00:00:00:00:00:02'])
+
+    async def failing(profile):
+        await profile.asyncConnect()
+        raise RuntimeError('boom')
+
+    orchestrator = AsyncSensorOrchestrator(controller, ['00:00:00:00:00:02', '00:00:00:00:00:09'])
+    result = asyncio.run(orchestrator.run(failing))
+    entry, missing = result['devices']
+    assert entry['address'] == '00:00:00:00:00:02' and not entry['ok'] and 'boom' in entry['error']
+    # 未扫描到的地址记为失败，而不是被静默略过
+    assert missing['address'] == '00:00:00:00:00:09' and not missing['ok'] and missing['error'] == '未扫描到设备'
+    assert orchestrator.missing == ['00:00:00:00:00:09']
+    # 出错后设备仍被断开
+    assert controller.profiles['00:00:00:00:00:02'].deviceState == DeviceStateEx.Disconnected
+
+
+@pytest.fixture
+def simulated_devices():
+    devices = sensor_sim.parse_options('devices=3,connect_delay=0.1,scan_latency=0.05')
+    sensor_sim.configure(*devices)
+    yield devices
+    sensor_sim.configure(*sensor_sim.parse_options(None))
+
+
+def test_concurrent_stream_on_simulated_sensors(simulated_devices):
+    orchestrator = AsyncSensorOrchestrator(SensorController(), max_concurrent=3)
+    result = asyncio.run(orchestrator.run(stream_scenario(0.5)))
+    entries = result['devices']
+    assert [entry['address'] for entry in entries] == [device.address for device in simulated_devices]
+    assert all(entry['ok'] and entry['result'] > 0 for entry in entries)
+    # 总耗时接近最慢的一台设备，而不是各设备耗时之和
+    assert result['elapsed'] < 0.6 * sum(entry['elapsed'] for entry in entries)
+    assert all(SensorController().getSensor(device.address).deviceState == DeviceStateEx.Disconnected
+               for device in simulated_devices)
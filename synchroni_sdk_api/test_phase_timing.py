@@ -0,0 +1,65 @@
+import asyncio
+import csv
+import json
+
+import pytest
+
+import sensor_sim
+from discovery import DiscoveryCache
+from phase_timing import PhaseRecorder, append_history, compare, summarize
+from sensor_sim import DeviceStateEx, SensorController, SimulatedDevice
+from state_waiter import DeviceStateWaiter
+
+
+@pytest.fixture
+def recorder():
+    sensor_sim.configure(SimulatedDevice(connect_delay=0.02, scan_latency=0.05))
+    recorder = PhaseRecorder()
+    recorder.instrument(sensor_sim, DeviceStateWaiter, DiscoveryCache)
+    recorder.test = 'case'
+    yield recorder
+    recorder.restore()
+    sensor_sim.configure(*sensor_sim.parse_options(None))
+
+
+def test_instrumented_phases(recorder):
+    controller = SensorController()
+    discovery = DiscoveryCache()
+    device = discovery.find(controller, sensor_sim.DEFAULT_ADDRESS, 1000, 2.0)
+    # 命中缓存不计入 scan
+    assert discovery.find(controller, sensor_sim.DEFAULT_ADDRESS) is device
+    profile = controller.requireSensor(device)
+    waiter = DeviceStateWaiter(profile)
+    assert profile.connect() and waiter.wait(DeviceStateEx.Ready, 5)
+    assert profile.init(10, 0) and profile.startDataNotification()
+    profile.disconnect()
+    assert waiter.wait(DeviceStateEx.Disconnected, 5)
+    asyncio.run(profile.asyncConnect())
+    profile.disconnect()
+
+    phases = [record['phase'] for record in recorder.for_test('case')]
+    assert phases == ['scan', 'connect', 'wait_for_state.Ready', 'init', 'startDataNotification', 'disconnect',
+                      'wait_for_state.Disconnected', 'connect', 'disconnect']
+    assert all(record['ok'] for record in recorder.records)
+    # restore 之后不再计时
+    recorder.restore()
+    profile.disconnect()
+    assert len(recorder.records) == len(phases)
+
+
+def test_compare_and_history(tmp_path):
+    records = [{'test': 't', 'phase': 'connect', 'duration_ms': value, 'ok': True} for value in (100, 110, 120)]
+    records.append({'test': 't', 'phase': 'init', 'duration_ms': 5000.0, 'ok': False})
+    summary = summarize(records)
+    assert list(summary) == ['connect'] and summary['connect']['p50'] == 110
+    baseline = {'connect': {'p50': 50.0, 'p95': 119.0}}
+    assert [(item['phase'], item['stat']) for item in compare(summary, baseline)] == [('connect', 'p50')]
+    assert compare(summary, {'connect': summary['connect']}) == []
+
+    append_history(str(tmp_path / 'phases.csv'), records, run='r1')
+    append_history(str(tmp_path / 'phases.csv'), records[:1], run='r2')
+    rows = list(csv.DictReader(open(tmp_path / 'phases.csv', encoding='utf-8')))
+    assert [row['run'] for row in rows] == ['r1'] * 4 + ['r2']
+    append_history(str(tmp_path / 'phases.jsonl'), records, run='r1')
+    lines = (tmp_path / 'phases.jsonl').read_text(encoding='utf-8').splitlines()
+    assert json.loads(lines[-1])['ok'] is False
@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+import sensor_sim
+from sensor_sim import DeviceStateEx, SensorController, SimulatedDevice
+from state_waiter import DeviceStateWaiter
+
+
+@pytest.fixture
+def controller():
+    yield SensorController()
+    sensor_sim.configure(*sensor_sim.parse_options(None))
+
+
+def connect(controller, device):
+    profile = controller.requireSensor(device.ble_device())
+    waiter = DeviceStateWaiter(profile)
+    assert profile.connect()
+    assert waiter.wait(DeviceStateEx.Ready, 5)
+    return profile, waiter
+
+
+def test_parse_options():
+    devices = sensor_sim.parse_options('devices=2, channels=4, sample_rate=500, loss=0.1, seed=7')
+    assert [device.channels for device in devices] == [4, 4]
+    assert devices[0].loss == 0.1 and devices[0].seed == 7
+    assert devices[0].address != devices[1].address
+    with pytest.raises(ValueError):
+        sensor_sim.parse_options('colour=red')
+
+
+def test_packets_follow_init_and_config(controller):
+    device = SimulatedDevice(channels=3, sample_rate=1000, loss=0.3, seed=5)
+    sensor_sim.configure(device)
+    profile, waiter = connect(controller, device)
+    assert profile.init(20, 0)
+    info = profile.getDeviceInfo()
+    assert info.EegChannelCount == 3 and info['EegSampleRate'] == 1000
+
+    packets = []
+    enough = threading.Event()
+
+    def on_data(sensor, data):
+        packets.append(data)
+        if len(packets) >= 10:
+            enough.set()
+
+    profile.onDataCallback = on_data
+    assert profile.startDataNotification()
+    assert enough.wait(5)
+    assert profile.stopDataNotification()
+    assert all(len(data.channelSamples) == 3 and len(data.channelSamples[0]) == 20 for data in packets)
+    # 被丢弃的包不送达，样本序号出现相应的跳变
+    first = [data.channelSamples[0][0].sampleIndex for data in packets]
+    skipped = sum(b - a - 20 for a, b in zip(first, first[1:]))
+    assert skipped > 0 and skipped % 20 == 0
+    assert skipped + first[0] <= 20 * profile.packets_dropped
+
+    assert profile.disconnect()
+    assert waiter.wait(DeviceStateEx.Disconnected, 5)
+    assert not profile.hasInited
+    waiter.close()
+
+
+def test_scan_reports_configured_devices(controller):
+    sensor_sim.configure(*sensor_sim.parse_options('devices=3'))
+    found = threading.Event()
+    controller.onDeviceFoundCallback = lambda devices: len(devices) == 3 and found.set()
+    assert controller.startScan(1000)
+    assert found.wait(2)
+    controller.stopScan()
+    controller.onDeviceFoundCallback = None
+    assert not controller.isScanning
+    assert controller.requireSensor(sensor_sim.BLEDevice('x', 'AA:AA:AA:AA:AA:AA', 0)) is None
@@ -0,0 +1,83 @@
+import asyncio
+import enum
+import threading
+import time
+
+from state_waiter import DeviceStateWaiter
+
+
+class State(enum.IntEnum):
+    Disconnected = 0
+    Connecting = 1
+    Connected = 2
+    Ready = 3
+
+
+class FakeProfile:
+    """
+    模拟 SensorProfile：connect 后由另一个线程依次上报状态变化，并统计 deviceState 的读取次数。
+    """
+
+    def __init__(self):
+        self._state = State.Disconnected
+        self.onStateChanged = None
+        self.state_reads = 0
+
+    @property
+    def deviceState(self):
+        self.state_reads += 1
+        return self._state
+
+    def report(self, state):
+        self._state = state
+        if self.onStateChanged is not None:
+            self.onStateChanged(self, state)
+
+    def connect(self, delay=0.05):
+        def run():
+            for state in (State.Connecting, State.Connected, State.Ready):
+                time.sleep(delay)
+                self.report(state)
+        threading.Thread(target=run, daemon=True).start()
+        return True
+
+
+class TestDeviceStateWaiter:
+    def test_wakes_as_soon_as_state_arrives(self):
+        profile = FakeProfile()
+        seen = []
+        waiter = DeviceStateWaiter(profile, lambda sensor, state: seen.append(state))
+        start = time.perf_counter()
+        profile.connect()
+        assert waiter.wait(State.Ready, timeout=5)
+        assert time.perf_counter() - start < 0.5
+        # 只在登记时读一次 deviceState，其余全靠回调
+        assert profile.state_reads == 1
+        assert seen == [State.Connecting, State.Connected, State.Ready]
+
+    def test_already_in_state(self):
+        profile = FakeProfile()
+        waiter = DeviceStateWaiter(profile)
+        assert waiter.wait(State.Disconnected, timeout=0)
+
+    def test_timeout(self):
+        profile = FakeProfile()
+        waiter = DeviceStateWaiter(profile)
+        assert not waiter.wait(State.Ready, timeout=0.05)
+        assert waiter._waiters == []
+
+    def test_async_wait(self):
+        profile = FakeProfile()
+        waiter = DeviceStateWaiter(profile)
+
+        async def connect_and_wait():
+            profile.connect(delay=0.01)
+            return await waiter.async_wait(State.Ready, timeout=5)
+
+        assert asyncio.run(connect_and_wait())
+
+    def test_close_detaches_callback(self):
+        profile = FakeProfile()
+        waiter = DeviceStateWaiter(profile)
+        waiter.close()
+        assert profile.onStateChanged is None
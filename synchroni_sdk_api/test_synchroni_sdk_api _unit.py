@@ -3,6 +3,8 @@ import unittest
 import time
 import signal
 from typing import List
+import sensor_sim
+sensor_sim.install_if_requested()
 from sensor import SensorController, SensorProfile, BLEDevice, DeviceStateEx, DataType
 
 # 配置日志
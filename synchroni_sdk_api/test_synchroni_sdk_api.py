@@ -1,9 +1,19 @@
+import os
+import sys
 import time
-from typing import List
 import pytest
 import asyncio
 import pytest_asyncio
-from sensor import DeviceInfo, SensorController, SensorProfile, BLEDevice, DeviceStateEx
+import sensor_sim
+sensor_sim.install_if_requested()
+from sensor import DeviceInfo, SensorController, SensorProfile, BLEDevice, DeviceStateEx, DataType
+from discovery import DiscoveryCache
+from orchestrator import AsyncSensorOrchestrator, battery_scenario, connect_scenario, set_param_scenario, \
+    stream_scenario
+from state_waiter import DeviceStateWaiter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+from eeg_common.rate_check import measure_sensor_rate
 
 # 配置日志
 import logging
@@ -14,44 +24,43 @@ logger = logging.getLogger(__name__)
 SCAN_DEVICE_PERIOD_IN_MS = 5000
 ASYNC_SCAN_DEVICE_PERIOD_IN_MS = 5000
 WAIT_SCAN_RESULT = SCAN_DEVICE_PERIOD_IN_MS / 1000 + 3
-specified_mac =  'C4:64:E3:D8:E9:E2'#'24:71:89:EF:2B:E2'  # 'C4:64:E3:D8:ED:68'
+# 设备矩阵批量测试时由 SYNCHRONI_MAC 环境变量指定被测设备
+specified_mac = os.environ.get('SYNCHRONI_MAC', 'C4:64:E3:D8:E9:E2')  #'24:71:89:EF:2B:E2'  # 'C4:64:E3:D8:ED:68'
 MAX_SCAN_RETRIES = 3
 TIMEOUT = 45
+# 多设备并发用例的被测设备（逗号分隔），默认只有 specified_mac；同时进行的 BLE 操作上限
+multi_sensor_macs = [mac for mac in os.environ.get('SYNCHRONI_MACS', specified_mac).split(',') if mac]
+MAX_CONCURRENT_BLE = 2
+STREAM_SECONDS = 2
+# 送达采样率校验：接收时长（秒）和允许的相对偏差，置信区间需整体落在标称值 ±RATE_TOLERANCE 内
+RATE_CHECK_SECONDS = 10
+RATE_TOLERANCE = 0.05
+
+# 扫描结果缓存：整个测试会话共用，缓存有效期内各用例不再重复扫描
+DISCOVERY_TTL = 120
+discovery = DiscoveryCache(DISCOVERY_TTL)
 
-# 给startScan函数使用的回调
 def scan_devices(controller, max_retries=MAX_SCAN_RETRIES):
-    discovered_devices = []
-
-    def device_found_callback(deviceList: List[BLEDevice]):
-        nonlocal discovered_devices
-        try:
-            filteredDevice = filter(lambda x: x.Address == specified_mac, deviceList)
-            for device in filteredDevice:
-                if device.Address not in [d.Address for d in discovered_devices]:
-                    discovered_devices.append(device)
-                    logger.info(f'device.Address = {device.Address }, device.RSSI = {device.RSSI}')
-            logger.info(f'{len(discovered_devices)} Bluetooth devices found in total')
-        except Exception as e:
-            logger.error(f"Error in device_found_callback: {e}")
-
-    for retry in range(max_retries):
-        controller.onDeviceFoundCallback = device_found_callback
-        controller.startScan(SCAN_DEVICE_PERIOD_IN_MS)
-        logger.info(f"Waiting for {WAIT_SCAN_RESULT} seconds to discover devices... (Retry {retry + 1})")
-        time.sleep(WAIT_SCAN_RESULT)
-
-        if discovered_devices:
-            break
-
-    return discovered_devices
+    """
+    查找 specified_mac 对应的设备：缓存未过期时直接返回，否则扫描，发现目标设备后立即返回，
+    不再固定等待 WAIT_SCAN_RESULT 秒。
+
+    :return: 找到的设备列表（至多一个），未找到时为空列表
+    """
+    device = discovery.find(controller, specified_mac, SCAN_DEVICE_PERIOD_IN_MS, WAIT_SCAN_RESULT, max_retries)
+    if device is None:
+        return []
+    logger.info(f'device.Address = {device.Address}, device.RSSI = {device.RSSI}')
+    return [device]
 
 def wait_for_state(profile, target_state, timeout=TIMEOUT):
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        if profile.deviceState == target_state:
-            return True
-        time.sleep(0.5)
-    return False
+    """
+    等待设备进入目标状态：由 onStateChanged 回调唤醒，状态到达即返回，不再轮询 deviceState。
+    """
+    waiter = getattr(profile, '_state_waiter', None)
+    if waiter is None:
+        waiter = profile._state_waiter = DeviceStateWaiter(profile)
+    return waiter.wait(target_state, timeout)
 
 class TestSensorController:
     @pytest.fixture(scope="class")
@@ -78,11 +87,13 @@ class TestSensorController:
 
         # 保存 controller 以便后续使用
         profile._controller = controller
+        profile._state_waiter = DeviceStateWaiter(profile)
 
         yield profile
 
         if profile.deviceState != DeviceStateEx.Disconnected:
             profile.disconnect()
+        profile._state_waiter.close()
         controller.stopScan()
 
     def test_start_scan(self, controller):
@@ -241,6 +252,21 @@ class TestSensorController:
         assert wait_for_state(sensor_profile, DeviceStateEx.Disconnected) is True
         sensor_profile._controller.stopScan()
 
+    def test_delivered_sampling_rate(self, sensor_profile):
+        logger.info('\nTesting delivered EEG sampling rate')
+        sensor_profile.connect()
+        assert wait_for_state(sensor_profile, DeviceStateEx.Ready) is True
+        assert sensor_profile.init(5, 60 * 1000) is True
+
+        nominal = sensor_profile.getDeviceInfo().EegSampleRate
+        estimate = measure_sensor_rate(sensor_profile, RATE_CHECK_SECONDS, DataType.NTF_EEG)
+        assert estimate.within(nominal, RATE_TOLERANCE), \
+            f"送达采样率 {estimate} 超出标称值 {nominal} Hz 的 ±{RATE_TOLERANCE:.0%}"
+
+        sensor_profile.disconnect()
+        assert wait_for_state(sensor_profile, DeviceStateEx.Disconnected) is True
+        sensor_profile._controller.stopScan()
+
     def test_stop_data_notification(self, sensor_profile):
         logger.info('\nTesting stopDataNotification method')
         sensor_profile.connect()
@@ -318,20 +344,27 @@ class TestSensorControllerAsyncMethods:
         ctrl.onDeviceFoundCallback = None
 
     @pytest.fixture
-    async def sensor_profile_async(self, controller):
+    def sensor_profile_async(self, controller):
+        # 用例中通过 anext 取得 profile，这里直接返回异步生成器（pytest 不再接受未经插件处理的异步 fixture）
+        return self._sensor_profile_async(controller)
+
+    async def _sensor_profile_async(self, controller):
         print('sensor_profile_async')
         try:
-            devices = await controller.asyncScan(ASYNC_SCAN_DEVICE_PERIOD_IN_MS)
-            if devices:
-                target_device = find_device_by_mac(devices, specified_mac)
-                if target_device:
-                    profile = controller.requireSensor(target_device)
-                    try:
-                        yield profile
-                    finally:
-                        if profile.deviceState != DeviceStateEx.Disconnected:
-                            await profile.asyncDisconnect()
-                        controller.stopScan()
+            target_device = discovery.cached(specified_mac)
+            if target_device is None:
+                devices = await controller.asyncScan(ASYNC_SCAN_DEVICE_PERIOD_IN_MS)
+                if devices:
+                    discovery.remember(devices)
+                    target_device = find_device_by_mac(devices, specified_mac)
+            if target_device:
+                profile = controller.requireSensor(target_device)
+                try:
+                    yield profile
+                finally:
+                    if profile.deviceState != DeviceStateEx.Disconnected:
+                        await profile.asyncDisconnect()
+                    controller.stopScan()
         except Exception as e:
                 logger.error(f"Error in sensor_profile_async: {e}")
 
@@ -449,6 +482,45 @@ class TestSensorControllerAsyncMethods:
         except Exception as e:
             logger.error(f"Error in test_asyncInit: {e}")
             pytest.fail("Failed to async Init.")
-            
 
 
+@pytest.mark.asyncio
+class TestMultiSensorAsync:
+    """
+    扫描一次后，在 multi_sensor_macs 的全部设备上用 asyncio.gather 并发执行异步场景
+    """
+    @pytest.fixture(scope="class")
+    def orchestrator(self):
+        ctrl = SensorController()
+        if not ctrl.isEnable:
+            pytest.skip("Bluetooth is not enabled")
+        yield AsyncSensorOrchestrator(ctrl, multi_sensor_macs, MAX_CONCURRENT_BLE, ASYNC_SCAN_DEVICE_PERIOD_IN_MS,
+                                      discovery)
+        if ctrl.isScanning:
+            ctrl.stopScan()
+
+    async def run_scenario(self, orchestrator, scenario):
+        if not orchestrator.devices and not await orchestrator.scan():
+            pytest.skip("No devices discovered")
+        result = await orchestrator.run(scenario)
+        logger.info(f"{result['scenario']}: {len(result['devices'])} 台设备，耗时 {result['elapsed']:.2f}s")
+        # 未扫描到的设备也记为失败条目，部分设备缺席时用例失败而不是只测找到的设备
+        assert len(result['devices']) == len(multi_sensor_macs), f"未扫描到设备: {orchestrator.missing}"
+        failed = [entry for entry in result['devices'] if not entry['ok']]
+        assert not failed, f"场景失败: {failed}"
+        return [entry['result'] for entry in result['devices']]
+
+    async def test_concurrent_connect(self, orchestrator):
+        await self.run_scenario(orchestrator, connect_scenario)
+
+    async def test_concurrent_set_param(self, orchestrator):
+        results = await self.run_scenario(orchestrator, set_param_scenario)
+        assert all(result == "OK" for result in results)
+
+    async def test_concurrent_battery_level(self, orchestrator):
+        results = await self.run_scenario(orchestrator, battery_scenario)
+        assert all(isinstance(result, int) and 0 <= result <= 100 for result in results)
+
+    async def test_concurrent_stream(self, orchestrator):
+        results = await self.run_scenario(orchestrator, stream_scenario(STREAM_SECONDS))
+        assert all(packets > 0 for packets in results)
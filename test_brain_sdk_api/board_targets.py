@@ -0,0 +1,67 @@
+import collections
+import os
+
+from brainflow.board_shim import BoardIds, BoardShim
+
+SYNTHETIC_BOARD = BoardIds.SYNTHETIC_BOARD.value
+
+# 被测设备：主板子和并发用例使用的第二块板子
+BoardTarget = collections.namedtuple('BoardTarget', ['name', 'board_id', 'mac_address', 'board_id2', 'mac_address2'])
+
+# 合成板不需要蓝牙，两块合成板靠不同的 mac_address 区分会话（brainflow 按参数判断是否为同一块板子）
+SYNTHETIC_TARGET = BoardTarget('synthetic', SYNTHETIC_BOARD, '', SYNTHETIC_BOARD, 'synthetic-2')
+
+# 运行模式：hardware 只测真实设备，synthetic 只测合成板，all 两者都测
+BOARD_MODES = ('hardware', 'synthetic', 'all')
+
+
+def hardware_target():
+    """
+    真实设备，设备矩阵批量测试时由 BRAINFLOW_BOARD_ID / BRAINFLOW_MAC 环境变量指定。
+    第二块板子由 BRAINFLOW_BOARD_ID2 / BRAINFLOW_MAC2 指定；BRAINFLOW_BOARD_ID2 为空表示没有第二块板子，
+    此时 board_id2 为 None，双板用例自动跳过（设备矩阵中未指定第二块板子的设备即是如此，避免并行子进程争用同一块板子）。
+    """
+    board_id2 = os.environ.get('BRAINFLOW_BOARD_ID2', '58')
+    return BoardTarget('hardware', int(os.environ.get('BRAINFLOW_BOARD_ID', 57)),
+                       os.environ.get('BRAINFLOW_MAC', 'C4:64:E3:D8:E6:D2'),
+                       int(board_id2) if board_id2 else None,
+                       os.environ.get('BRAINFLOW_MAC2', 'C4:64:E3:D8:E3:EE') if board_id2 else '')
+
+
+def selected_targets(mode=None):
+    """
+    :param mode: hardware / synthetic / all，默认读取 BRAINFLOW_BOARD_MODE 环境变量，未设置时为 hardware
+    """
+    mode = mode or os.environ.get('BRAINFLOW_BOARD_MODE', 'hardware')
+    if mode not in BOARD_MODES:
+        raise ValueError(f"未知的运行模式 {mode}，可选 {', '.join(BOARD_MODES)}")
+    targets = []
+    if mode in ('hardware', 'all'):
+        targets.append(hardware_target())
+    if mode in ('synthetic', 'all'):
+        targets.append(SYNTHETIC_TARGET)
+    return targets
+
+
+def is_synthetic(board_id):
+    return board_id == SYNTHETIC_BOARD
+
+
+def board_expectations(board_id):
+    """
+    从板子描述中读取期望的脑电通道数和采样率，不再在用例里写死某一款产品的数值。
+
+    :return: (通道数, 采样率)
+    """
+    descr = BoardShim.get_board_descr(board_id)
+    return len(descr['eeg_channels']), descr['sampling_rate']
+
+
+def hardware_only(reason):
+    """
+    标记依赖真实设备行为的用例（蓝牙连接超时、无效 MAC 等），合成板上自动跳过。
+    """
+    def decorator(func):
+        func.hardware_only = reason
+        return func
+    return decorator
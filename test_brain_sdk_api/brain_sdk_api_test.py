@@ -5,6 +5,8 @@ import unittest
 from brainflow import BoardIds, BoardShim, BrainFlowError
 import brainflow
 
+from board_targets import board_expectations
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -15,9 +17,8 @@ class TestSDKApi(unittest.TestCase):
         self.mac_address = mac_address
         self.board_id = board_id
         self.timeout = 10
-        #以下为测试常数定义部分
-        self.CHANNEL_NUM = 7 # 不同产品的通道数目有区分
-        self.SAMPLING_RATE = 250 # 根据产品定义的实际采样率
+        #以下为测试常数定义部分，通道数和采样率取自板子描述，board_id 传合成板（-1）时无需蓝牙
+        self.CHANNEL_NUM, self.SAMPLING_RATE = board_expectations(board_id)
 
     def setUp(self):
         logger.info('setUp')
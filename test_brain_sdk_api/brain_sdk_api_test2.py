@@ -1,4 +1,7 @@
+import contextlib
 import logging
+import os
+import sys
 import threading
 import time
 import unittest
@@ -7,6 +10,13 @@ from brainflow import BoardIds, BoardShim, BrainFlowError
 import brainflow
 import numpy as np
 
+from board_targets import board_expectations, hardware_only, hardware_target, is_synthetic, selected_targets
+from session_pool import SessionPool, dual_board, fresh_session
+from soak import SoakEngine
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+from eeg_common.packet_loss import analyze_board_data
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -38,34 +48,56 @@ file_handler.setFormatter(log_format)
 # 将文件处理器添加到日志记录器
 logger.addHandler(file_handler)
 
+# 所有轮次共用的设备连接池，每个设备只连接一次，main 结束时统一释放
+SESSION_POOL = SessionPool()
+
 class TestSDKApi(unittest.TestCase):
+    # 被测设备，main 按运行模式为每个设备派生一个子类并覆盖该属性
+    target = hardware_target()
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.board_id = 57
-        self.board_id2 = 58
-        self.mac_address = 'C4:64:E3:D8:E6:D2'
-        self.mac_address2 = 'C4:64:E3:D8:E3:EE'
+        self.board_id = self.target.board_id
+        self.board_id2 = self.target.board_id2
+        self.mac_address = self.target.mac_address
+        self.mac_address2 = self.target.mac_address2
         self.timeout = 10
-        # 以下为测试常数定义部分
-        self.CHANNEL_NUM = 2  # 不同产品的通道数目有区分，这里假设真实值是7
-        self.CHANNEL_NUM2 = 7
-        self.SAMPLING_RATE = 250  # 根据产品定义的实际采样率，假设真实值是250
-        self.SAMPLING_RATE2 = 250
+        # 以下为测试常数定义部分，通道数和采样率取自板子描述
+        self.CHANNEL_NUM, self.SAMPLING_RATE = board_expectations(self.board_id)
+        if self.board_id2 is not None:
+            self.CHANNEL_NUM2, self.SAMPLING_RATE2 = board_expectations(self.board_id2)
         
     def is_skip_concurrent():
         return True
 
     def setUp(self):
+        # 生命周期用例自己连接、释放；其余用例从连接池租用已连接的会话，不再每条用例重连
         logger.info('setUp')
-        self.board_shim = self.init_board_shim(self.board_id, self.mac_address)
-        if TestSDKApi.is_skip_concurrent():
-            self.board_shim2 = self.init_board_shim(self.board_id2, self.mac_address2)
+        test_method = getattr(self, self._testMethodName)
+        reason = getattr(test_method, 'hardware_only', None)
+        if reason and is_synthetic(self.board_id):
+            self.skipTest(f'合成板不适用: {reason}')
+        devices = [(self.board_id, self.mac_address)]
+        if getattr(test_method, 'dual_board', False):
+            if self.board_id2 is None:
+                self.skipTest('未指定第二块板子（BRAINFLOW_BOARD_ID2）')
+            devices.append((self.board_id2, self.mac_address2))
+        self.lease_stack = contextlib.ExitStack()
+        if getattr(test_method, 'fresh_session', False):
+            for board_id, mac_address in devices:
+                SESSION_POOL.evict(board_id, mac_address)
+            board_shims = [self.init_board_shim(board_id, mac_address) for board_id, mac_address in devices]
+        else:
+            board_shims = [self.lease_stack.enter_context(SESSION_POOL.lease(board_id, mac_address, self.timeout))
+                           for board_id, mac_address in devices]
+        self.board_shim = board_shims[0]
+        self.board_shim2 = board_shims[1] if len(board_shims) > 1 else None
 
     def tearDown(self):
         logger.info('tearDown')
+        self.lease_stack.close()
         self.board_shim = None
-        if TestSDKApi.is_skip_concurrent():
-            self.board_shim2 = None
+        self.board_shim2 = None
 
     def init_board_shim(self, board_id, mac_address):
         """
@@ -76,6 +108,7 @@ class TestSDKApi(unittest.TestCase):
         params.timeout = self.timeout
         return BoardShim(board_id, params)
 
+    @fresh_session
     def test_prepare_session(self):
         logger.info('test_prepare_session')
         try:
@@ -95,7 +128,6 @@ class TestSDKApi(unittest.TestCase):
     def test_start_stream(self):
         logger.info('test_start_stream')
         try:
-            self.board_shim.prepare_session()
             self.board_shim.start_stream()
             data = self.board_shim.get_board_data()
             self.assertEqual(len(data), self.board_shim.get_num_rows(board_id=self.board_id))
@@ -104,15 +136,10 @@ class TestSDKApi(unittest.TestCase):
             self.handle_brainflow_error("test_start_stream", e)
         except Exception as e:
             self.handle_general_exception("test_start_stream", e)
-        finally:
-            if self.board_shim.is_prepared():
-                self.board_shim.stop_stream()
-                self.board_shim.release_session()
 
     def test_get_sampling_rate(self):
         logger.info('test_get_sampling_rate')
         try:
-            self.board_shim.prepare_session()
             sampling_rate = self.board_shim.get_sampling_rate(board_id=self.board_id)
             self.assertEqual(sampling_rate, self.SAMPLING_RATE)
             logger.info(f"test_get_sampling_rate: 获取采样率成功，采样率为 {sampling_rate}")
@@ -120,34 +147,26 @@ class TestSDKApi(unittest.TestCase):
             self.handle_brainflow_error("test_get_sampling_rate", e)
         except Exception as e:
             self.handle_general_exception("test_get_sampling_rate", e)
-        finally:
-            if self.board_shim.is_prepared():
-                self.board_shim.release_session()
 
     def test_get_board_data(self):
         logger.info('test_get_board_data')
         try:
-            self.board_shim.prepare_session()
             self.board_shim.start_stream()
             time.sleep(1)
             data = self.board_shim.get_board_data()
             self.assertEqual(len(data), self.board_shim.get_num_rows(board_id=self.board_id))
+            report = analyze_board_data(data, self.board_id)
+            self.assertEqual(report.lost, 0, f"1秒数据中丢失 {report.lost} 个包，缺口位置 {report.positions.tolist()}")
             logger.info("test_get_board_data: 获取板卡数据成功")
         except BrainFlowError as e:
             self.handle_brainflow_error("test_get_board_data", e)
         except Exception as e:
             self.handle_general_exception("test_get_board_data", e)
-        finally:
-            if self.board_shim.is_prepared():
-                self.board_shim.stop_stream()
-                self.board_shim.release_session()
 
-            
     @unittest.skip('停流后，仍然能获取到数据，该条case暂时跳过，已反馈给研发分析')
     def test_stop_stream(self):
         logger.info('test_stop_stream')
         try:
-            self.board_shim.prepare_session()
             self.board_shim.start_stream()
             self.board_shim.stop_stream()
             data = self.board_shim.get_board_data()
@@ -157,10 +176,8 @@ class TestSDKApi(unittest.TestCase):
             self.handle_brainflow_error("test_stop_stream", e)
         except Exception as e:
             self.handle_general_exception("test_stop_stream", e)
-        finally:
-             if self.board_shim.is_prepared():
-                self.board_shim.release_session()
 
+    @fresh_session
     def test_release_session(self):
         logger.info('test_release_session')
         try:
@@ -173,6 +190,8 @@ class TestSDKApi(unittest.TestCase):
         except Exception as e:
             self.handle_general_exception("test_release_session", e)
             
+    @fresh_session
+    @hardware_only('合成板忽略 MAC 地址，不会连接失败')
     def test_invalid_mac_address(self):
         logger.info('test_invalid_mac_address')
         invalid_mac = "invalid_mac_address"
@@ -189,6 +208,8 @@ class TestSDKApi(unittest.TestCase):
         except Exception as e:
             self.handle_general_exception("test_invalid_mac_address", e)
 
+    @fresh_session
+    @hardware_only('合成板立即连接成功，不会超时')
     def test_timeout_scenario(self):
         logger.info('test_timeout_scenario')
         params = brainflow.BrainFlowInputParams()
@@ -213,7 +234,6 @@ class TestSDKApi(unittest.TestCase):
     def test_data_format_verification(self):
         logger.info('test_data_format_verification')
         try:
-            self.board_shim.prepare_session()
             self.board_shim.start_stream()
             data = self.board_shim.get_board_data()
             # 假设数据应该是二维数组，进行格式验证
@@ -225,11 +245,8 @@ class TestSDKApi(unittest.TestCase):
             self.handle_brainflow_error("test_data_format_verification", e)
         except Exception as e:
             self.handle_general_exception("test_data_format_verification", e)
-        finally:
-                if self.board_shim.is_prepared():
-                    self.board_shim.stop_stream()
-                    self.board_shim.release_session()
-            
+
+    @fresh_session
     def test_get_data_without_start_stream(self):
         logger.info('tes_get_data_without_start_stream')
         try:
@@ -246,6 +263,7 @@ class TestSDKApi(unittest.TestCase):
             if self.board_shim.is_prepared():
                 self.board_shim.release_session()
             
+    @fresh_session
     def test_operation_order_change(self):
         logger.info('test_concurrent_operation_order_change')
         try:
@@ -277,6 +295,8 @@ class TestSDKApi(unittest.TestCase):
         self.fail(f"在{test_method_name}中出现其他运行时异常: {error}")
         
     @unittest.skipIf(is_skip_concurrent(),'just skip concurrent')
+    @fresh_session
+    @dual_board
     def test_concurrent_prepare_session(self):
         logger.info('test_concurrent_prepare_session')
         try:
@@ -300,6 +320,8 @@ class TestSDKApi(unittest.TestCase):
                 self.board_shim2.release_session()
             
     @unittest.skipIf(is_skip_concurrent(),'just skip concurrent')
+    @fresh_session
+    @dual_board
     def test_concurrent_release_session(self):
         logger.info('test_concurrent_release_session')
         try:
@@ -316,12 +338,11 @@ class TestSDKApi(unittest.TestCase):
             self.handle_general_exception("test_concurrent_release_session", e)
             
     @unittest.skipIf(is_skip_concurrent(),'just skip concurrent')
+    @dual_board
     def test_concurrent_start_stream(self):
         logger.info('test_concurrent_start_stream')
         try:
-            self.prepare_session(self.board_shim)
             self.board_shim.start_stream()
-            self.prepare_session(self.board_shim2)
             self.board_shim2.start_stream()
             data = self.board_shim.get_board_data()
             self.assertEqual(len(data), self.board_shim.get_num_rows(board_id=self.board_id))
@@ -332,22 +353,14 @@ class TestSDKApi(unittest.TestCase):
             self.handle_brainflow_error("test_concurrent_start_stream", e)
         except Exception as e:
             self.handle_general_exception("test_concurrent_start_stream", e)
-        finally:
-            if self.board_shim.is_prepared():
-                self.board_shim.stop_stream()
-                self.board_shim.release_session()
-            if self.board_shim2.is_prepared():
-                self.board_shim2.stop_stream()
-                self.board_shim2.release_session()
 
     @unittest.skipIf(is_skip_concurrent(),'just skip concurrent')
+    @dual_board
     def test_concurrent_stop_stream(self):
         logger.info('test_concurrent_stop_stream')
         try:
-            self.prepare_session(self.board_shim)
             self.board_shim.start_stream()
             self.board_shim.stop_stream()
-            self.prepare_session(self.board_shim2)
             self.board_shim2.start_stream()
             self.board_shim2.stop_stream()
             data = self.board_shim.get_board_data()
@@ -359,20 +372,14 @@ class TestSDKApi(unittest.TestCase):
             self.handle_brainflow_error("test_concurrent_stop_stream", e)
         except Exception as e:
             self.handle_general_exception("test_concurrent_stop_stream", e)
-        finally:
-            if self.board_shim.is_prepared():
-                self.board_shim.release_session()
-            if self.board_shim2.is_prepared():
-                self.board_shim2.release_session()
-            
+
     @unittest.skipIf(is_skip_concurrent(),'just skip concurrent')
+    @dual_board
     def test_concurrent_get_sampling_rate(self):
         logger.info('test_concurrent_get_sampling_rate')
         try:
-            self.prepare_session(self.board_shim)
             sampling_rate = self.board_shim.get_sampling_rate(board_id=self.board_id)
             self.assertEqual(sampling_rate, self.SAMPLING_RATE)
-            self.prepare_session(self.board_shim2)
             sampling_rate2 = self.board_shim2.get_sampling_rate(board_id=self.board_id2)
             self.assertEqual(sampling_rate2, self.SAMPLING_RATE2)
             logger.info(f"test_concurrent_get_sampling_rate: 获取采样率成功，采样率为 {sampling_rate}")
@@ -380,84 +387,53 @@ class TestSDKApi(unittest.TestCase):
             self.handle_brainflow_error("test_concurrent_get_sampling_rate", e)
         except Exception as e:
             self.handle_general_exception("test_concurrent_get_sampling_rate", e)
-        finally:
-            if self.board_shim.is_prepared():
-                self.board_shim.release_session()
-            if self.board_shim2.is_prepared():
-                self.board_shim2.release_session()
-
     
-def main(aging_duration: float = 0.5):
+def main(aging_duration: float = 0.5, board_mode: str = None, output_path: str = None, resume: bool = False):
     """
-    主函数，用于执行多轮测试并全面处理测试结果，支持将日志输出到文件或控制台。
+    主函数，用于执行多轮测试并全面处理测试结果。测试套件只加载一次，各轮复用；
+    每轮每条用例的耗时、结果以及进程资源占用以 JSONL 时间序列写入 output_path。
+
     :param aging_duration: 测试持续的时长（单位：小时），默认值为0.5小时
+    :param board_mode: hardware / synthetic / all，默认读取 BRAINFLOW_BOARD_MODE 环境变量
+    :param output_path: JSONL 输出路径，默认与日志文件同名
+    :param resume: output_path 已存在时从中断处续跑，直到累计时长达到最初计划的时长
     """
-
-    end_time = time.time() + aging_duration * 3600
-    round_num = 0
-    total_tests_run = 0
-    total_failures = 0
-    total_errors = 0
-    total_skipped = 0
-    total_passed = 0
-
-    while time.time() < end_time:
-        round_num += 1
-        logger.info(f"开始第 {round_num} 轮测试")
-        start_time = time.time()
-        test_result = '不通过'
-
-        # 动态创建临时测试类，继承自TestSDKApi并传递必要参数
-        TempTestClass = type('TempTest', (TestSDKApi,),{'__init__': lambda self, *args, **kwargs: TestSDKApi.__init__(self,*args, **kwargs)})
-
-        suite = unittest.TestSuite()
-        loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    loader = unittest.TestLoader()
+    for target in selected_targets(board_mode):
+        # 动态创建临时测试类，继承自TestSDKApi并指定被测设备
+        TempTestClass = type('TempTest', (TestSDKApi,), {'target': target})
         tests = loader.loadTestsFromTestCase(TempTestClass)
-        suite.addTests(tests)
+        # 先执行复用连接池会话的用例，再执行需要重新连接的生命周期用例，避免两类用例交替导致反复重连
+        suite.addTests(sorted(tests, key=lambda test: getattr(getattr(test, test._testMethodName), 'fresh_session', False)))
 
-        runner = unittest.TextTestRunner(verbosity=2)
-        result = runner.run(suite)
+    output_path = output_path or log_file_name.replace('.txt', '.jsonl')
+    engine = SoakEngine(suite, output_path, aging_duration * 3600, resume=resume, verbosity=2)
 
-        # 更新每轮测试的统计信息
-        total_tests_run += result.testsRun
-        total_failures += len(result.failures)
-        total_errors += len(result.errors)
-        total_skipped += len(result.skipped)
-        total_passed += result.testsRun - len(result.failures) - len(result.skipped) - len(result.errors)
-
-        # 处理测试失败情况
+    def on_round(record, result):
+        # 处理测试失败、错误、跳过情况
         handle_test_result(result.failures, handle_failure_result)
-
-        # 处理测试错误情况
         handle_test_result(result.errors, handle_error_result)
-
-        # 处理测试跳过情况
         handle_test_result(result.skipped, handle_skipped_result)
+        test_result = '通过' if result.wasSuccessful() else '不通过'
+        process = record['process']
+        logger.info(f"\n\n 执行case: {result.testsRun}, 耗时： {record['duration']:.3f}s, "
+                    f"内存 {process['rss_mb']} MB, 线程 {process['threads']}, 文件描述符 {process['open_fds']}\n")
+        logger.info(f"#################第 {record['round']} 轮测试结束，测试结果：{test_result}#############\n")
 
-        # 处理测试成功情况
-        if result.wasSuccessful():
-            logger.info("All tests passed successfully.\n")
-            test_result = '通过'
-        else:
-            logger.info("Some tests failed or encountered errors.\n")
-
-        end_time2 = time.time()
-        elapsed_time = end_time2 - start_time
-        logger.info(f"\n\n 执行case: {result.testsRun}, 耗时： {elapsed_time:.3f}s\n")
-        # logger.info(f"fail case:{len(result.failures)}条\n")
-        # logger.info(f"skip case:{len(result.skipped)}条\n")
-        # logger.info(f"error case:{len(result.errors)}条\n")
-        # logger.info(f"pass case:{result.testsRun - len(result.failures) - len(result.skipped) - len(result.errors)}条\n")
-
-        logger.info(f"#################第 {round_num} 轮测试结束，测试结果：{test_result}#############\n")
+    try:
+        totals = engine.run(on_round)
+    finally:
+        SESSION_POOL.close()
 
     # 输出整个测试过程的汇总统计信息
-    logger.info(f"========== 全部 {round_num} 轮测试结束，汇总统计信息如下 ==========")
-    logger.info(f"总执行测试用例数: {total_tests_run}")
-    logger.info(f"总失败用例数: {total_failures}")
-    logger.info(f"总错误用例数: {total_errors}")
-    logger.info(f"总跳过用例数: {total_skipped}")
-    logger.info(f"总通过用例数: {total_passed}")
+    logger.info(f"========== 全部 {engine.round_num} 轮测试结束，汇总统计信息如下 ==========")
+    logger.info(f"总执行测试用例数: {totals['run']}")
+    logger.info(f"总失败用例数: {totals['failed']}")
+    logger.info(f"总错误用例数: {totals['error']}")
+    logger.info(f"总跳过用例数: {totals['skipped']}")
+    logger.info(f"总通过用例数: {totals['passed']}")
+    logger.info(f"逐轮明细已写入 {output_path}")
 
 
 def handle_test_result(test_result_list, handler_func):
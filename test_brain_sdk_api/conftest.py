@@ -0,0 +1,32 @@
+import pytest
+
+from board_targets import BOARD_MODES, selected_targets
+from session_pool import SessionPool
+
+
+def pytest_addoption(parser):
+    parser.addoption('--board-mode', choices=BOARD_MODES, default=None,
+                     help='hardware 只测真实设备，synthetic 只测合成板（无需蓝牙），all 两者都测；'
+                          '默认读取 BRAINFLOW_BOARD_MODE 环境变量')
+
+
+def pytest_generate_tests(metafunc):
+    # 每个被测设备各跑一遍用例，用例 ID 中带上 hardware / synthetic
+    if 'board_target' in metafunc.fixturenames:
+        targets = selected_targets(metafunc.config.getoption('board_mode'))
+        metafunc.parametrize('board_target', targets, ids=[target.name for target in targets], scope='class')
+
+
+@pytest.fixture(scope='session')
+def session_pool():
+    """
+    整个测试会话共用的设备连接池，每个 (board_id, mac_address) 只连接一次，会话结束时统一释放。
+    """
+    pool = SessionPool()
+    yield pool
+    pool.close()
+
+
+def pytest_collection_modifyitems(items):
+    # 先执行复用连接池会话的用例，再执行需要重新连接的生命周期用例，避免两类用例交替导致反复重连
+    items.sort(key=lambda item: getattr(getattr(item, 'function', None), 'fresh_session', False))
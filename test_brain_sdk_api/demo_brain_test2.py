@@ -1,4 +1,6 @@
+import argparse
 import logging
+import os
 import sys
 import time
 from time import sleep
@@ -12,15 +14,40 @@ from matplotlib.figure import Figure
 import numpy as np
 from brainflow.board_shim import BoardIds, BoardShim
 import brainflow
-from brainflow.data_filter import DataFilter, FilterTypes
 from PyQt5.QtCore import QTimer
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+from eeg_common.aggregator import BoardAggregator, BoardStream
+from eeg_common.artifacts import ArtifactDetector, find_segments
+from eeg_common.resampler import PolyphaseDecimator
+from eeg_common.ring_buffer import RingBuffer
+# 滤波、回放、录制只在用到时才导入（见 apply_filter_to_data、connect_device、toggle_recording），缩短启动时间
+
 # 设置日志级别为INFO，获取日志记录器实例
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+
+# 下拉框中最长的显示周期（秒），环形缓冲区至少要容纳这么长的数据
+MAX_DISPLAY_PERIOD = 60
+# 界面刷新间隔（毫秒）
+UPDATE_INTERVAL_MS = 100
+# 显示周期不短于该值（秒）时改用抽取后的数据显示和滤波
+OVERVIEW_PERIOD = 30
+# 抽取后的目标采样率，例如 250 Hz 抽取为 125 Hz、1000 Hz 抽取为 125 Hz
+OVERVIEW_RATE = 125
+# 录制文件保存目录，每次录制在其下新建一个以时间命名的会话目录
+RECORD_DIR = './recordings'
+
+
 class EEGDataVisualizer(QtWidgets.QWidget):
-    def __init__(self):
+    def __init__(self, playback_dir=None, playback_speed=1.0):
+        """
+        :param playback_dir: 录制会话目录，指定后连接时回放该会话而不连接真实设备
+        :param playback_speed: 回放倍速，None 表示不看时钟，每次界面刷新推进固定的样本数（结果可复现）
+        """
         super().__init__()
+        self.playback_dir = playback_dir
+        self.playback_speed = playback_speed
 
         # 初始化self.fig和self.ax，确保在initUI方法使用之前已经存在
         self.fig = Figure(figsize=(8, 6))
@@ -34,12 +61,30 @@ class EEGDataVisualizer(QtWidgets.QWidget):
         # 新增buffer_index属性初始化，初始为0
         self.buffer_index = 0
 
-        # 用于标记是否暂停数据采集和图形更新，初始化为False（未暂停）
+        # 用于标记是否暂停图形更新，初始化为False（未暂停）；暂停期间采集不停，数据继续写入环形缓冲区
         self.paused = False
-        # 用于存储暂停时的数据缓冲区内容备份，初始为空
-        self.paused_data_buffer = None
-        # 用于存储暂停时的缓冲区索引备份，初始为0
-        self.paused_buffer_index = 0
+        # 环形缓冲区及显示游标（绝对样本序号），暂停时游标冻结，不再复制数据
+        self.ring_buffer = None
+        self.display_cursor = 0
+        # 允许积压的最长时长（秒），超过后最旧的未显示数据被覆盖
+        self.max_backlog_seconds = 120
+        # 恢复后消化积压数据的速度，相对实时的倍数
+        self.catchup_speed = 4.0
+        # 因积压超出环形缓冲区容量而未能显示的样本数
+        self.overflow_samples = 0
+        # 各板按包序号累计的丢包数，界面上的计数只在变化时刷新
+        self.lost_packets = 0
+        self.sampling_rate = 0
+        # 当前显示缓冲区的采样率，长周期显示时为抽取后的采样率
+        self.display_rate = 0
+        # 长周期显示用的抽取器及其环形缓冲区，采样率低于 2 * OVERVIEW_RATE 时不抽取
+        self.overview_factor = 1
+        self.decimator = None
+        self.overview_ring = None
+        # 录制到磁盘的接收端，未录制时为None
+        self.recorder = None
+        # 伪迹检测，掩码缓冲区与环形缓冲区按样本序号对齐
+        self.artifact_detector = None
         # 停止获取数据
         self.stop = False
         self.period = 1
@@ -47,6 +92,14 @@ class EEGDataVisualizer(QtWidgets.QWidget):
         # 存储通道复选框的列表
         self.channel_checkboxes = []
         self.eeg_channels = []  # 实际的脑电图通道列表，按实际初始化
+        # 显示用的通道名称，多块板子时带板子序号前缀
+        self.channel_names = []
+        # 同时连接的板子，每块板子一个采集线程，由 aggregator 按时间戳合并到同一时间轴
+        self.board_shims = []
+        self.board_ids = []
+        self.aggregator = None
+        # 不限速回放时不启动采集线程，由界面刷新同步取数，每次刷新推进固定的样本数，结果可复现
+        self.step_playback = playback_dir is not None and playback_speed is None
         
         # 滤波器类型
         self.low_pass_filter = 'Low-Pass Filter [80 HZ]'
@@ -110,6 +163,7 @@ class EEGDataVisualizer(QtWidgets.QWidget):
         mac_layout = QtWidgets.QHBoxLayout()
         self.mac_label = QtWidgets.QLabel('MAC address:') #C4:64:E3:D8:E6:D2
         self.mac_edit = QtWidgets.QLineEdit('C4:64:E3:D8:E6:D2')  # 留空让用户输入真实MAC地址 84:27:12:17:BC:D8,,,c 84:27:12:14:C6:E5  84:BA:20:6E:3C:1E
+        self.mac_edit.setToolTip('多块板子时用逗号分隔，与 Board ID 一一对应，例如 C4:64:E3:D8:E6:D2,C4:64:E3:D8:E3:EE')
         # self.mac_edit = QtWidgets.QLineEdit('')  # 留空让用户输入真实MAC地址 84:27:12:17:BC:D8,,,60:77:71:74:E6:B7 84:27:12:14:C6:E5  84:BA:20:6E:3C:1E
         mac_layout.addWidget(self.mac_label, 0, alignment=QtCore.Qt.AlignLeft)
         mac_layout.addWidget(self.mac_edit, 0, alignment=QtCore.Qt.AlignLeft)
@@ -119,6 +173,7 @@ class EEGDataVisualizer(QtWidgets.QWidget):
         id_layout = QtWidgets.QHBoxLayout()
         self.board_id_label = QtWidgets.QLabel('Board ID:')
         self.board_id_edit = QtWidgets.QLineEdit('57')  # 留空让用户输入真实Board ID
+        self.board_id_edit.setToolTip('多块板子时用逗号分隔，例如 57,58')
         # self.board_id_edit = QtWidgets.QLineEdit(str(BoardIds.SYNTHETIC_BOARD.value))  # 留空让用户输入真实Board ID
         id_layout.addWidget(self.board_id_label, 0, alignment=QtCore.Qt.AlignLeft)
         id_layout.addWidget(self.board_id_edit, 0, alignment=QtCore.Qt.AlignLeft)
@@ -175,6 +230,16 @@ class EEGDataVisualizer(QtWidgets.QWidget):
 
         left_layout.addLayout(op_layout)
 
+        # 录制开关：勾选后把采集到的原始数据、时间戳和标记持续写入磁盘
+        self.record_checkbox = QtWidgets.QCheckBox('Record to disk')
+        self.record_checkbox.setEnabled(False)
+        self.record_checkbox.stateChanged.connect(self.toggle_recording)
+        left_layout.addWidget(self.record_checkbox, 0, alignment=QtCore.Qt.AlignLeft)
+
+        # 实时丢包计数：按各板包序号缺口累计
+        self.loss_label = QtWidgets.QLabel('Lost packets: 0')
+        left_layout.addWidget(self.loss_label, 0, alignment=QtCore.Qt.AlignLeft)
+
         # 创建滤波器复选框及相关输入框布局
         for filter_type in self.filter_checkboxes:
             checkbox = QtWidgets.QCheckBox(filter_type)
@@ -190,6 +255,8 @@ class EEGDataVisualizer(QtWidgets.QWidget):
         self.toolbar = NavigationToolbar(self.canvas, self)
         right_layout.addWidget(self.toolbar, alignment=QtCore.Qt.AlignCenter)
         right_layout.addWidget(self.canvas)
+        # 每次全量重绘后重新保存背景，曲线等动态元素之后只通过 blit 更新
+        self.canvas.mpl_connect('draw_event', self.on_canvas_draw)
         right_layout.addLayout(self.channel_layout)
 
         main_layout.addLayout(left_layout, 1)
@@ -205,8 +272,11 @@ class EEGDataVisualizer(QtWidgets.QWidget):
 
         # 初始化设备相关变量
         self.params = None
-        self.board_shim = None
+        self.board_shims = []
         self.lines = []
+        self.legend = None
+        self.artifact_spans = []
+        self.background = None
         self.eeg_channels = []
         
     def handle_period_selection(self):
@@ -229,18 +299,41 @@ class EEGDataVisualizer(QtWidgets.QWidget):
         self.update_buffer_size()
 
     def update_buffer_size(self):
-        # 根据选择的时间调整缓冲区大小
-        sampling_rate = self.board_shim.get_sampling_rate(self.board_id)
-        buffer_size = int(self.period * sampling_rate)
-        if self.data_buffer is not None:
-            # 保留现有数据并调整缓冲区大小
-            current_data_size = min(self.data_buffer.shape[1], buffer_size)
-            new_data_buffer = np.zeros((len(self.eeg_channels), buffer_size))
-            new_data_buffer[:, -current_data_size:] = self.data_buffer[:, -current_data_size:]
-            self.data_buffer = new_data_buffer
-        else:
-            self.data_buffer = np.zeros((len(self.eeg_channels), buffer_size))
+        # 根据选择的时间调整显示缓冲区大小，数据统一从环形缓冲区重新读取
+        if not self.sampling_rate:
+            return
+        self.display_rate = self.sampling_rate / self.overview_factor if self.use_overview() else self.sampling_rate
+        buffer_size = int(self.period * self.display_rate)
+        self.data_buffer = np.zeros((len(self.eeg_channels), buffer_size))
         self.buffer_index = min(self.buffer_index, buffer_size)
+        if self.ring_buffer is not None:
+            self.refresh_display()
+
+    def init_ring_buffer(self):
+        """
+        按最长显示周期加上允许的积压时长分配环形缓冲区，并重置显示游标。
+        """
+        capacity = int((MAX_DISPLAY_PERIOD + self.max_backlog_seconds) * self.sampling_rate)
+        self.ring_buffer = RingBuffer(len(self.eeg_channels), capacity)
+        self.artifact_detector = ArtifactDetector(len(self.eeg_channels), self.sampling_rate, capacity)
+        self.overview_factor = max(1, int(self.sampling_rate // OVERVIEW_RATE))
+        if self.overview_factor > 1:
+            self.decimator = PolyphaseDecimator(len(self.eeg_channels), self.overview_factor)
+            self.overview_ring = RingBuffer(len(self.eeg_channels), capacity // self.overview_factor + 1)
+        else:
+            self.decimator = None
+            self.overview_ring = None
+        self.display_cursor = 0
+        self.overflow_samples = 0
+        self.lost_packets = 0
+        self.loss_label.setText('Lost packets: 0')
+        self.update_buffer_size()
+
+    def use_overview(self):
+        """
+        长周期显示且存在抽取器时，显示和滤波都在抽取后的数据上进行。
+        """
+        return self.overview_ring is not None and self.period >= OVERVIEW_PERIOD
             
     def set_all_checkboxes_enable(self, enabled):
         for filter_type in self.filter_checkboxes.keys():
@@ -248,26 +341,62 @@ class EEGDataVisualizer(QtWidgets.QWidget):
             if checkbox:
                 checkbox.setEnabled(enabled)
                 
-    def connect_device(self):
-        # 获取用户输入的 MAC 地址和 board_id
-        mac_address = self.mac_edit.text()
-        board_id_text = self.board_id_edit.text()
+    def parse_board_list(self):
+        """
+        解析输入框中逗号分隔的 Board ID 和 MAC 地址，返回 [(board_id, mac_address), ...]。
+        只填一个 Board ID 时所有 MAC 地址共用它；MAC 地址可以留空。
+        """
+        board_ids = [int(text) for text in self.board_id_edit.text().split(',') if text.strip()]
+        mac_addresses = [text.strip() for text in self.mac_edit.text().split(',')]
+        if len(board_ids) == 1 and len(mac_addresses) > 1:
+            board_ids = board_ids * len(mac_addresses)
+        if not board_ids or len(mac_addresses) not in (1, len(board_ids)):
+            raise ValueError(f"Board ID 数量 ({len(board_ids)}) 与 MAC 地址数量 ({len(mac_addresses)}) 不匹配")
+        if len(mac_addresses) == 1:
+            mac_addresses = mac_addresses * len(board_ids)
+        return list(zip(board_ids, mac_addresses))
 
+    def connect_device(self):
         try:
-            # 设置脑电设备相关参数
-            self.board_id = int(board_id_text)
-            self.params = brainflow.BrainFlowInputParams()
-            self.params.timeout = 10
-            
-            if mac_address:
-                self.params.mac_address = mac_address
-            self.board_shim = BoardShim(self.board_id, self.params)
-            
-            # 准备会话并开始数据采集
-            self.board_shim.prepare_session()
-            
-            # 获取脑电通道列表
-            self.eeg_channels = self.board_shim.get_eeg_channels(self.board_id)
+            self.board_shims = []
+            self.board_ids = []
+            if self.playback_dir:
+                # 回放录制的会话代替真实设备，后续处理流程完全相同
+                from eeg_common.playback import PlaybackBoard
+                self.board_ids.append(BoardIds.PLAYBACK_FILE_BOARD.value)
+                self.board_shims.append(PlaybackBoard(self.playback_dir, self.playback_speed))
+            else:
+                # 获取用户输入的 MAC 地址和 board_id，设置脑电设备相关参数
+                for board_id, mac_address in self.parse_board_list():
+                    self.params = brainflow.BrainFlowInputParams()
+                    self.params.timeout = 10
+                    if mac_address:
+                        self.params.mac_address = mac_address
+                    self.board_ids.append(board_id)
+                    self.board_shims.append(BoardShim(board_id, self.params))
+
+            # 准备会话，任何一块板子失败都释放已准备好的板子
+            prepared = []
+            try:
+                for board_shim in self.board_shims:
+                    board_shim.prepare_session()
+                    prepared.append(board_shim)
+            except Exception:
+                for board_shim in prepared:
+                    board_shim.release_session()
+                self.board_shims = []
+                raise
+
+            # 获取脑电通道列表，多块板子时按顺序拼接，采样率取最高值（合并时按时间戳插值到该采样率）
+            self.eeg_channels = []
+            self.channel_names = []
+            for index, (board_shim, board_id) in enumerate(zip(self.board_shims, self.board_ids)):
+                channels = board_shim.get_eeg_channels(board_id)
+                prefix = f'Board {index + 1} ' if len(self.board_shims) > 1 else ''
+                self.eeg_channels.extend(channels)
+                self.channel_names.extend(f'{prefix}Channel {channel}' for channel in channels)
+            self.sampling_rate = max(board_shim.get_sampling_rate(board_id)
+                                     for board_shim, board_id in zip(self.board_shims, self.board_ids))
             
             # 启用开始采集按钮
             self.start_button.setEnabled(True)
@@ -300,12 +429,14 @@ class EEGDataVisualizer(QtWidgets.QWidget):
     def create_channel_checkboxes_vertical(self):
         self.channel_checkboxes.clear()
         self.remove_all_widgets_from_layout(self.channel_layout)
-        for channel in self.eeg_channels:
-            checkbox = QtWidgets.QCheckBox(f'Channel {channel}')
+        for name in self.channel_names:
+            checkbox = QtWidgets.QCheckBox(name)
             checkbox.setChecked(True)  # 默认勾选所有通道
-            checkbox.stateChanged.connect(self.update_channel_visibility)
+            checkbox.stateChanged.connect(
+                lambda state, index=len(self.channel_checkboxes): self.update_channel_visibility(index, state))
             self.channel_checkboxes.append(checkbox)
             self.channel_layout.addWidget(checkbox)
+        self.lines = []
 
     def create_channel_checkboxes_grid(self):
         grid_layout = QtWidgets.QGridLayout()
@@ -314,13 +445,14 @@ class EEGDataVisualizer(QtWidgets.QWidget):
         max_columns = 4  # 最大列数设置为3，可根据需要调整
         self.channel_checkboxes.clear()
         self.remove_all_widgets_from_layout(self.channel_layout)
-        for channel in self.eeg_channels:
-            checkbox = QtWidgets.QCheckBox(f'Channel {channel}')
+        for channel, name in zip(self.eeg_channels, self.channel_names):
+            checkbox = QtWidgets.QCheckBox(name)
             if channel==1:
                 checkbox.setChecked(True)  # 默认勾选所有通道
             else:
                 checkbox.setChecked(False)
-            checkbox.stateChanged.connect(self.update_channel_visibility)
+            checkbox.stateChanged.connect(
+                lambda state, index=len(self.channel_checkboxes): self.update_channel_visibility(index, state))
             self.channel_checkboxes.append(checkbox)
             grid_layout.addWidget(checkbox, row, col)
             col += 1
@@ -328,10 +460,19 @@ class EEGDataVisualizer(QtWidgets.QWidget):
                 col = 0
                 row += 1
         self.channel_layout.addLayout(grid_layout)
+        self.lines = []
 
     def start_real_time_collection(self):
         try:
-            self.board_shim.start_stream()
+            for board_shim in self.board_shims:
+                board_shim.start_stream()
+            self.aggregator = BoardAggregator(
+                [BoardStream(board_shim, board_id, name=f'{index + 1}({board_id})')
+                 for index, (board_shim, board_id) in enumerate(zip(self.board_shims, self.board_ids))],
+                sampling_rate=self.sampling_rate)
+            if not self.step_playback:
+                self.aggregator.start()
+            self.init_ring_buffer()
             self.pause_button.setEnabled(True)
             self.resume_button.setEnabled(False)
             self.stop_button.setEnabled(True)
@@ -339,12 +480,13 @@ class EEGDataVisualizer(QtWidgets.QWidget):
             self.stop = False
             self.timer_stopped = False
             self.set_all_checkboxes_enable(True)
+            self.record_checkbox.setEnabled(True)
 
             # 开始实时更新图形
             # self.timer = self.startTimer(100)  # 每 100 毫秒更新一次
             self.timer = QtCore.QTimer(self)
             self.timer.timeout.connect(self.timerEvent)
-            self.timer.start(100)
+            self.timer.start(UPDATE_INTERVAL_MS)
         except brainflow.BrainFlowError as bfe:
             QtWidgets.QMessageBox.critical(self, "Data acquisition failed to start", f"{str(bfe)}")
         except ValueError as ve:
@@ -353,7 +495,7 @@ class EEGDataVisualizer(QtWidgets.QWidget):
             QtWidgets.QMessageBox.critical(self, "Unknown error", f"{str(e)}")
 
     def check_filter(self):
-        sampling_rate = self.board_shim.get_sampling_rate(self.board_id)
+        sampling_rate = self.display_rate
         # logger.info(f'check_filter:self.current_filter= {self.current_filter}')
         if self.current_filter is not None: 
             if self.current_filter == self.low_pass_filter:
@@ -367,85 +509,230 @@ class EEGDataVisualizer(QtWidgets.QWidget):
         
     def timerEvent(self):
         """
-        定时器触发时执行的函数，用于从板子获取数据、处理数据并更新波形显示，确保坐标轴显示最近1秒的实时内容。
+        定时器触发时执行的函数，取走各板采集线程合并好的新数据写入环形缓冲区；未暂停时推进显示游标并更新波形显示。
+        暂停期间仍然取数，避免采集端缓冲区堆积后在恢复时一次性涌入。
         """
-        if self.paused or self.stop:
+        if self.stop:
             return
         try:
-            # 从板子获取数据（这里获取1秒的数据点）
-            # sampling_rate = self.board_shim.get_sampling_rate(self.board_id)
-            
-            new_data = self.board_shim.get_board_data(250)
-            new_data_channels = new_data[self.eeg_channels, :]
-            # 数据缓冲区管理
-            if self.data_buffer is None:
-               self.data_buffer = new_data_channels
-            else:
-                # 移除旧数据，添加新数据
-                self.data_buffer = np.hstack((self.data_buffer[:, new_data_channels.shape[1]:], new_data_channels))
-            self.buffer_index = self.data_buffer.shape[1]
-            self.check_filter()
-            # 更新图形
-            time_axis = np.linspace(0, int(self.period), self.buffer_index)  # 固定时间轴
-            self.update_plot(time_axis)
+            if self.step_playback:
+                self.aggregator.poll_streams()
+            eeg_data, timestamps, markers = self.aggregator.poll()
+            self.update_loss_label()
+            if eeg_data.shape[1] > 0:
+                self.ring_buffer.write(eeg_data)
+                self.artifact_detector.update(eeg_data)
+                if self.decimator is not None:
+                    self.overview_ring.write(self.decimator.process(eeg_data))
+                if self.recorder is not None:
+                    try:
+                        self.recorder.append(eeg_data, timestamps, markers)
+                    except RuntimeError as e:
+                        # 写线程已出错退出，取消勾选即停止录制并记录错误
+                        logging.error(str(e))
+                        self.record_checkbox.setChecked(False)
+            if self.paused:
+                return
+            self.advance_display_cursor()
+            self.refresh_display()
         except brainflow.BrainFlowError as bfe:
             logging.error(f"从板子获取数据出错: {str(bfe)}")
         except Exception as e:
             logging.error(f"处理数据时出现未知错误: {str(e)}")
 
-    def update_plot(self, time_axis):
+    def update_loss_label(self):
+        lost = self.aggregator.lost_packets
+        if lost != self.lost_packets:
+            self.lost_packets = lost
+            self.loss_label.setText(f'Lost packets: {lost}')
+
+    def advance_display_cursor(self):
+        """
+        推进显示游标：没有积压时直接跟上最新数据；恢复后有积压时每次最多前进 catchup_speed 倍实时的样本数，
+        逐步追上。积压超出环形缓冲区容量时，跳过已被覆盖的部分并计数。
         """
-        根据当前数据缓冲区的数据更新图形绘制。
+        tail = self.ring_buffer.tail
+        if self.display_cursor < tail:
+            skipped = tail - self.display_cursor
+            self.overflow_samples += skipped
+            logger.warning(f"积压超出环形缓冲区容量，跳过 {skipped} 个样本，累计 {self.overflow_samples} 个")
+            self.display_cursor = tail
+        step = max(1, int(self.sampling_rate * UPDATE_INTERVAL_MS / 1000 * self.catchup_speed))
+        self.display_cursor = min(self.ring_buffer.head, self.display_cursor + step)
+
+    def refresh_display(self):
+        """
+        从环形缓冲区读取显示游标之前一个周期的数据到显示缓冲区，滤波后重绘。
+        长周期显示时从抽取后的环形缓冲区读取，第 k 个抽取样本对应第 k * overview_factor 个原始样本。
+        """
+        ring = self.ring_buffer
+        cursor = self.display_cursor
+        if self.use_overview():
+            ring = self.overview_ring
+            cursor = min(-(-self.display_cursor // self.overview_factor), ring.head)
+        self.buffer_index = min(cursor - ring.tail, self.data_buffer.shape[1])
+        ring.read(cursor - self.buffer_index, cursor, out=self.data_buffer[:, :self.buffer_index])
+        self.check_filter()
+        # 更新图形
+        time_axis = np.linspace(0, int(self.period), self.buffer_index)  # 固定时间轴
+        self.update_plot(time_axis)
+
+    def init_plot_artists(self):
+        """
+        为每个通道创建一次常驻的曲线对象，之后只更新数据和可见性，不再清空坐标轴重新绘制。
+        曲线、伪迹色块和图例都设为 animated，由 blit 单独绘制。
         """
         self.ax.clear()
-        
+        self.lines = []
         for channel in range(len(self.eeg_channels)):
-            if self.channel_checkboxes[channel].isChecked():
-                self.ax.plot(time_axis, self.data_buffer[channel, :self.buffer_index],
-                             label=f'Channel {self.eeg_channels[channel]}')
+            line, = self.ax.plot([], [], label=self.channel_names[channel], animated=True)
+            line.set_visible(self.channel_checkboxes[channel].isChecked())
+            self.lines.append(line)
+        self.artifact_spans = []
         self.ax.set_xlim(0, int(self.period))  # 固定x轴范围
         self.ax.set_xlabel('Time (s)')
         self.ax.set_ylabel('Amplitude (uV)')
         self.ax.set_title('EEG Waveform (Real-time)')
-        self.ax.legend(loc='upper right')
-        self.fig.canvas.draw_idle()
-        
+        self.legend = self.ax.legend(loc='upper right')
+        self.legend.set_animated(True)
+        for line, legend_line in zip(self.lines, self.legend.get_lines()):
+            legend_line.set_alpha(1.0 if line.get_visible() else 0.2)
+        self.background = None
+        self.canvas.draw_idle()
+
+    def on_canvas_draw(self, event):
+        """
+        全量重绘（首次显示、缩放坐标轴、窗口大小变化等）完成后保存静态背景，再画上动态元素。
+        """
+        if not self.lines:
+            return
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.draw_animated_artists()
+
+    def draw_animated_artists(self):
+        for span in self.artifact_spans:
+            self.ax.draw_artist(span)
+        for line in self.lines:
+            if line.get_visible():
+                self.ax.draw_artist(line)
+        self.ax.draw_artist(self.legend)
+
+    def blit_plot(self):
+        """
+        恢复背景后只重画动态元素，还没有背景时退化为一次全量重绘。
+        """
+        if self.background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.background)
+        self.draw_animated_artists()
+        self.canvas.blit(self.ax.bbox)
+
+    def update_plot(self, time_axis):
+        """
+        根据当前数据缓冲区的数据更新各通道曲线；坐标轴范围需要变化时全量重绘，否则只做 blit。
+        """
+        if not self.lines:
+            self.init_plot_artists()
+
+        bad_channels = self.artifact_detector.bad_channels if self.artifact_detector is not None else None
+        legend_texts = self.legend.get_texts()
+        for channel, line in enumerate(self.lines):
+            line.set_data(time_axis, self.data_buffer[channel, :self.buffer_index])
+            label = self.channel_names[channel]
+            if bad_channels is not None and bad_channels[channel]:
+                label += ' (bad)'
+            if legend_texts[channel].get_text() != label:
+                legend_texts[channel].set_text(label)
+        self.draw_artifact_segments(time_axis)
+
+        if self.update_axes_limits():
+            self.canvas.draw_idle()
+        else:
+            self.blit_plot()
+
+    def update_axes_limits(self):
+        """
+        按可见通道的数据范围调整纵轴（超出当前范围或缩小到一半以下时才调整，避免每帧全量重绘）。
+
+        :return: 坐标轴范围是否发生变化
+        """
+        changed = False
+        if self.ax.get_xlim() != (0, int(self.period)):
+            self.ax.set_xlim(0, int(self.period))
+            changed = True
+        visible = [channel for channel, line in enumerate(self.lines) if line.get_visible()]
+        if not visible or self.buffer_index == 0:
+            return changed
+        data = self.data_buffer[visible, :self.buffer_index]
+        low, high = float(data.min()), float(data.max())
+        current_low, current_high = self.ax.get_ylim()
+        if low < current_low or high > current_high or (high - low) < 0.5 * (current_high - current_low):
+            margin = 0.1 * (high - low) or 1.0
+            self.ax.set_ylim(low - margin, high + margin)
+            changed = True
+        return changed
+
+    def draw_artifact_segments(self, time_axis):
+        """
+        用半透明色块标出当前显示窗口内检测到伪迹的片段，只看显示中的通道。
+        """
+        for span in self.artifact_spans:
+            span.remove()
+        self.artifact_spans = []
+        if self.artifact_detector is None or self.buffer_index == 0:
+            return
+        visible = [channel for channel, line in enumerate(self.lines) if line.get_visible()]
+        step = self.overview_factor if self.use_overview() else 1
+        start = max(self.display_cursor - self.buffer_index * step, self.artifact_detector.mask.tail)
+        stop = min(self.display_cursor, self.artifact_detector.mask.head)
+        if not visible or stop <= start:
+            return
+        # 掩码按原始采样率对齐，长周期显示时按抽取倍数取样后与时间轴对应
+        mask = self.artifact_detector.mask.read(start, stop)[visible].any(axis=0)[::step]
+        for segment_start, segment_stop in find_segments(mask):
+            segment_stop = min(segment_stop, len(time_axis))
+            self.artifact_spans.append(self.ax.axvspan(time_axis[segment_start], time_axis[segment_stop - 1],
+                                                       color='red', alpha=0.15, animated=True))
+
     def pause_real_time_collection(self):
         """
-        暂停实时数据采集，备份当前数据缓冲区状态及索引。
+        暂停图形更新，冻结显示游标；采集继续写入环形缓冲区，不复制数据。
         """
         if not self.paused:
             self.paused = True
-            self.paused_data_buffer = self.data_buffer.copy() if self.data_buffer is not None else None
-            self.paused_buffer_index = self.buffer_index
             self.pause_button.setEnabled(False)
             self.resume_button.setEnabled(True)
             self.stop_button.setEnabled(True)
 
     def resume_real_time_collection(self):
         """
-        恢复实时数据采集，恢复之前备份的数据缓冲区状态及索引。
+        恢复图形更新，显示游标从暂停处继续，按 catchup_speed 倍速追上暂停期间积压的数据。
         """
         if self.paused:
             self.paused = False
-            self.data_buffer = self.paused_data_buffer
-            self.buffer_index = self.paused_buffer_index
             self.pause_button.setEnabled(True)
             self.resume_button.setEnabled(False)
             self.stop_button.setEnabled(True)
             if not isinstance(self.timer, QTimer):
-                self.timer = self.startTimer(100)
+                self.timer = self.startTimer(UPDATE_INTERVAL_MS)
             elif not self.timer.isActive():
-                self.timer.start(100)
+                self.timer.start(UPDATE_INTERVAL_MS)
 
     def stop_real_time_collection(self):
         """
         停止实时数据采集，释放板子资源，清空数据缓冲区及图形绘制内容，重置相关按钮状态。
         """
-        if self.board_shim is not None:
+        self.record_checkbox.setChecked(False)
+        self.record_checkbox.setEnabled(False)
+        if self.board_shims:
+            if self.aggregator is not None:
+                self.aggregator.stop()
+                self.aggregator = None
             try:
-                self.board_shim.stop_stream()
-                self.board_shim.release_session()
+                for board_shim in self.board_shims:
+                    board_shim.stop_stream()
+                    board_shim.release_session()
                 if self.timer is not None and self.timer.isActive():
                     self.timer.stop()
                     self.timer  = None
@@ -460,35 +747,51 @@ class EEGDataVisualizer(QtWidgets.QWidget):
             self.stop_button.setEnabled(False)
             self.data_buffer = None
             self.buffer_index = 0
+            self.ring_buffer = None
+            self.artifact_detector = None
+            self.decimator = None
+            self.overview_ring = None
+            self.display_cursor = 0
+            self.lines = []
+            self.artifact_spans = []
+            self.background = None
             self.ax.clear()
             self.fig.canvas.draw_idle()
 
-    def update_channel_visibility(self):
+    def toggle_recording(self, state):
         """
-        根据通道复选框的勾选状态更新图形中通道数据的显示。
+        开始或停止录制。写盘在后台线程中完成，定时器回调里只做入队。
         """
-        sampling_rate = self.board_shim.get_sampling_rate(self.board_id)
-        if self.buffer_index > 0:
-            time_axis = np.arange(0, self.buffer_index) / sampling_rate
-            self.ax.clear()
-            for channel in range(len(self.eeg_channels)):
-                if self.channel_checkboxes[channel].isChecked():
-                    self.ax.plot(time_axis, self.data_buffer[channel, :self.buffer_index], label=f'Channel {self.eeg_channels[channel]}')
-            self.ax.set_xlabel('Time (s)')
-            self.ax.set_ylabel('Amplitude (uV)')
-            self.ax.set_title('EEG Waveform (Real-time)')
-            self.ax.legend(loc='upper right')
-            self.fig.canvas.draw_idle()
+        if state == QtCore.Qt.Checked:
+            if self.recorder is None:
+                from eeg_common.recorder import SessionRecorder
+                directory = os.path.join(RECORD_DIR, time.strftime('%Y%m%d_%H%M%S', time.localtime()))
+                self.recorder = SessionRecorder(directory, len(self.eeg_channels), self.sampling_rate)
+                self.recorder.start()
+        elif self.recorder is not None:
+            recorder = self.recorder
+            self.recorder = None
+            try:
+                recorder.stop()
+            except Exception as e:
+                logging.error(f"录制数据写入磁盘出错: {str(e)}")
+
+    def update_channel_visibility(self, channel, state):
+        """
+        只切换对应通道常驻曲线的可见性并做一次 blit，不重新取数、不重建曲线；纵轴范围在下一帧按需调整。
+        """
+        if channel >= len(self.lines):
+            return
+        visible = state == QtCore.Qt.Checked
+        self.lines[channel].set_visible(visible)
+        self.legend.get_lines()[channel].set_alpha(1.0 if visible else 0.2)
+        self.blit_plot()
 
     def apply_filter(self):
         """
         根据用户选择的滤波器类型及参数，对当前数据缓冲区的数据应用相应滤波器。
         """
-        try:
-            sampling_rate = self.board_shim.get_sampling_rate(self.board_id)
-        except brainflow.BrainFlowError as bfe:
-            logging.error(f"获取采样率出错: {str(bfe)}")
-            return
+        sampling_rate = self.display_rate
 
         for filter_type in self.filter_checkboxes:
             checkbox = self.filter_checkboxes[filter_type]["checkbox"]
@@ -573,8 +876,15 @@ class EEGDataVisualizer(QtWidgets.QWidget):
             logging.error("数据缓冲区数据格式不符合预期，期望二维数组格式")
             return
 
+        # 长周期显示使用抽取后的数据，抽取时已做过抗混叠低通，截止频率达到奈奎斯特频率的滤波器直接跳过
+        cutoff = low_cutoff if filter_type == self.low_pass_filter else high_cutoff
+        if cutoff >= sampling_rate / 2:
+            logger.debug(f"{filter_type} 截止频率 {cutoff} Hz 不低于当前奈奎斯特频率 {sampling_rate / 2} Hz，跳过滤波")
+            return
+
+        from brainflow.data_filter import DataFilter, FilterTypes
         for channel in range(self.data_buffer.shape[0]):
-            channel_data = self.data_buffer[channel, :].flatten()
+            channel_data = self.data_buffer[channel, :self.buffer_index].flatten()
             try:
                 DataFilter.detrend(channel_data, brainflow.DetrendOperations.CONSTANT.value)
                 if filter_type == self.low_pass_filter:
@@ -597,11 +907,20 @@ class EEGDataVisualizer(QtWidgets.QWidget):
                 #     logger.info(self.data_buffer[channel, :].shape)
                 #     logger.error("滤波后数据重塑形状与原数据缓冲区通道形状不匹配")
                 #     continue
-                self.data_buffer[channel, :] = reshaped_data
+                self.data_buffer[channel, :self.buffer_index] = reshaped_data
             except Exception as e:
                 logger.error(f"对通道 {channel} 进行 {filter_type} 滤波操作出错: {str(e)}")
                 
+def parse_speed(text):
+    # 'max' 表示不限速回放
+    return None if text == 'max' else float(text)
+
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='EEG Data Demonstration Interface')
+    parser.add_argument('--playback', help='回放录制的会话目录，不连接真实设备')
+    parser.add_argument('--speed', type=parse_speed, default=1.0, help='回放倍速，如 1、4，或 max 表示每次界面刷新推进固定的样本数（结果可复现）')
+    args = parser.parse_args()
     app = QtWidgets.QApplication(sys.argv)
-    ex = EEGDataVisualizer()
+    ex = EEGDataVisualizer(playback_dir=args.playback, playback_speed=args.speed)
     sys.exit(app.exec_())
\ No newline at end of file
@@ -1,74 +1,80 @@
+import argparse
+import os
 import subprocess
+import sys
 import time
 import webbrowser
-import socket
 
-def run_pytest():
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+from eeg_common.report import build_report
+
+TEST_FILE = 'test_brain_sdk_api.py'
+RESULT_DIR = 'test-results'
+REPORT_DIR = 'test-report'
+# 已汇总进报告的结果文件移到这里，test-results 中只保留未处理的文件
+ARCHIVE_DIR = os.path.join(RESULT_DIR, 'archive')
+# 老化测试时页面的自动刷新间隔（秒）
+REPORT_REFRESH = 60
+
+
+def run_pytest(round_num=1):
     """
-    执行 pytest 测试并将结果保存到 allure-results 目录
+    执行 pytest 测试，结果以 junit XML 保存到 test-results 目录，每次执行一个文件。
+    文件名带毫秒和轮次编号，同一秒内结束的多轮不会互相覆盖
+
+    :param round_num: 本次执行的轮次编号（从 1 开始）
     """
     print("开始执行 pytest 测试...")
+    os.makedirs(RESULT_DIR, exist_ok=True)
+    now = time.time()
+    stamp = f"{time.strftime('%Y%m%d_%H%M%S', time.localtime(now))}_{int(now * 1000) % 1000:03d}"
+    result_file = os.path.join(RESULT_DIR, f"round-{stamp}-{round_num:04d}.xml")
     try:
-        subprocess.run(['pytest', '-v', '-s', 'test_brain_sdk_api.py', '--alluredir=allure-results'], check=True)
+        subprocess.run([sys.executable, '-m', 'pytest', '-v', '-s', TEST_FILE, f'--junitxml={result_file}'],
+                       check=False)
         print("pytest 测试执行完成")
-    except subprocess.CalledProcessError as e:
-        print(f"pytest 测试执行失败: {e}")
+    except Exception as e:
+        print(f"pytest 测试执行过程中出现错误: {e}")
 
-def generate_allure_report():
-    """
-    依据 allure-results 目录下的结果生成 Allure 报告
-    """
-    print("开始生成 Allure 报告...")
-    allure_path = r"D:\software\allure-2.32.0\allure-2.32.0\bin\allure.bat"  # 根据实际安装路径修改
-    try:
-        subprocess.run([allure_path, 'generate', 'allure-results', '-o', 'allure-report', '--clean'], check=True)
-        print("Allure 报告生成完成")
-    except subprocess.CalledProcessError as e:
-        print(f"Allure 报告生成失败: {e}")
 
-def start_allure_server():
+def generate_report(refresh=None, soak_paths=()):
     """
-    启动 Allure 服务器并等待其启动
+    把新增的测试结果合并进 test-report 目录中的报告，只处理上次之后新出现的结果文件和老化 JSONL 中新追加的记录
     """
-    print("启动 Allure 服务器...")
-    allure_path = r"D:\software\allure-2.32.0\allure-2.32.0\bin\allure.bat"  # 根据实际安装路径修改
-    server_process = subprocess.Popen([allure_path, 'serve', 'allure-results', '-p', '8081'])
-    # 等待服务器启动
-    max_retries = 30
-    retries = 0
-    while retries < max_retries:
-        try:
-            with socket.create_connection(('localhost', 8081), timeout=1):
-                print("Allure 服务器已启动")
-                break
-        except (ConnectionRefusedError, OSError):
-            retries += 1
-            time.sleep(1)
-    else:
-        print("Allure 服务器启动失败，超时等待")
-        server_process.terminate()
-        raise TimeoutError("Allure 服务器启动超时")
-    return server_process
+    start = time.perf_counter()
+    path, new_rounds = build_report(REPORT_DIR, RESULT_DIR, soak_paths, refresh, ARCHIVE_DIR)
+    print(f"报告已更新（新增 {len(new_rounds)} 轮，耗时 {time.perf_counter() - start:.2f}s）: {path}")
+    return path
 
-def open_browser():
+
+def open_browser(path):
     """
-    使用默认浏览器打开 Allure 报告页面
+    使用默认浏览器打开报告页面
     """
-    url = "http://localhost:8081"
-    print(f"打开浏览器访问 Allure 报告页面: {url}")
+    url = 'file://' + os.path.abspath(path)
+    print(f"打开浏览器访问测试报告页面: {url}")
     webbrowser.open(url)
 
-if __name__ == "__main__":
-    run_pytest()
-    generate_allure_report()
+
+def main():
+    parser = argparse.ArgumentParser(description='执行 BrainFlow SDK 测试并生成测试报告')
+    parser.add_argument('--rounds', type=int, default=1, help='重复执行的轮数（老化测试），每轮结束后更新报告')
+    parser.add_argument('--soak', nargs='*', default=[], help='一并汇总的老化测试 JSONL（brain_sdk_api_test2 的输出）')
+    parser.add_argument('--no-browser', action='store_true', help='不打开浏览器')
+    args = parser.parse_args()
+
+    refresh = REPORT_REFRESH if args.rounds > 1 else None
     try:
-        server_process = start_allure_server()
-        open_browser()
-        try:
-            while True:
-                time.sleep(1)
-        except KeyboardInterrupt:
-            print("用户手动终止，停止 Allure 服务器...")
-            server_process.terminate()
+        for i in range(args.rounds):
+            run_pytest(i + 1)
+            path = generate_report(refresh, args.soak)
+            if i == 0 and not args.no_browser:
+                open_browser(path)
+    except KeyboardInterrupt:
+        print("用户手动终止")
     except Exception as e:
-        print(f"启动 Allure 服务器或打开浏览器时出现错误: {e}")
\ No newline at end of file
+        print(f"执行过程中出现错误: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import contextlib
+import logging
+import threading
+import time
+
+import brainflow
+from brainflow.board_shim import BoardShim, BrainFlowError
+
+logger = logging.getLogger(__name__)
+
+
+def fresh_session(func):
+    """
+    标记需要自己连接、释放会话的生命周期用例（prepare/release、超时、无效MAC等）。
+    这类用例执行前会先把连接池中同一设备的会话释放掉，用例里新建的 BoardShim 才能连接成功。
+    """
+    func.fresh_session = True
+    return func
+
+
+def dual_board(func):
+    """
+    标记同时使用第二块板子（board_shim2）的用例，只有这类用例才会租用第二块板子的会话。
+    """
+    func.dual_board = True
+    return func
+
+
+class SessionPool:
+    """
+    按 (board_id, mac_address) 复用已 prepare 的 BoardShim 会话，每个设备在整个测试会话中只连接一次。
+
+    用例通过 lease 租用会话：租出前做健康检查（会话已失效时重新连接），归还时停止采集流、清空残留数据，
+    下一个用例拿到的总是“已连接、未采集”的干净状态。同一设备同一时刻只能被一个用例租用。
+    """
+
+    def __init__(self, timeout=10):
+        """
+        :param timeout: 新建会话时 BrainFlowInputParams 的超时时间（秒）
+        """
+        self.timeout = timeout
+        self._sessions = {}
+        self._locks = {}
+        self._pool_lock = threading.Lock()
+        # 统计信息：实际连接次数、租用次数、健康检查失败次数
+        self.prepares = 0
+        self.leases = 0
+        self.health_failures = 0
+
+    def _lock_for(self, key):
+        with self._pool_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _prepare(self, key, timeout):
+        board_id, mac_address = key
+        params = brainflow.BrainFlowInputParams()
+        params.mac_address = mac_address
+        params.timeout = timeout
+        board_shim = BoardShim(board_id, params)
+        start = time.time()
+        board_shim.prepare_session()
+        self.prepares += 1
+        logger.info(f"连接池: 设备 {key} 连接成功，耗时 {time.time() - start:.2f}s")
+        self._sessions[key] = board_shim
+        return board_shim
+
+    def _is_healthy(self, board_shim):
+        try:
+            return board_shim.is_prepared()
+        except BrainFlowError:
+            return False
+
+    @staticmethod
+    def _reset(board_shim):
+        """
+        停止用例遗留的采集流并取走残留数据；流本来就没有运行等预期内的错误直接忽略。
+        """
+        if not board_shim.is_prepared():
+            return
+        try:
+            board_shim.stop_stream()
+        except BrainFlowError as e:
+            if e.exit_code != brainflow.BrainFlowExitCodes.STREAM_THREAD_IS_NOT_RUNNING:
+                logger.warning(f"连接池: 归还会话时停止采集流出错: {e}")
+        try:
+            board_shim.get_board_data()
+        except BrainFlowError:
+            pass
+
+    @contextlib.contextmanager
+    def lease(self, board_id, mac_address, timeout=None):
+        """
+        租用一个已 prepare、未在采集的会话，with 块结束时自动归还。
+
+        :return: BoardShim 对象，用例不应自行 release_session（生命周期用例请使用 fresh_session）
+        """
+        key = (board_id, mac_address)
+        with self._lock_for(key):
+            board_shim = self._sessions.get(key)
+            if board_shim is not None and not self._is_healthy(board_shim):
+                self.health_failures += 1
+                logger.warning(f"连接池: 设备 {key} 的会话已失效，重新连接")
+                self._release(key)
+                board_shim = None
+            if board_shim is None:
+                board_shim = self._prepare(key, timeout or self.timeout)
+            self.leases += 1
+            try:
+                yield board_shim
+            finally:
+                self._reset(board_shim)
+
+    def _release(self, key):
+        board_shim = self._sessions.pop(key, None)
+        if board_shim is None:
+            return
+        try:
+            if board_shim.is_prepared():
+                board_shim.release_session()
+        except BrainFlowError as e:
+            logger.warning(f"连接池: 释放设备 {key} 的会话出错: {e}")
+
+    def evict(self, board_id, mac_address):
+        """
+        释放池中该设备的会话，供需要自己连接的生命周期用例使用。
+        """
+        key = (board_id, mac_address)
+        with self._lock_for(key):
+            self._release(key)
+
+    def close(self):
+        for key in list(self._sessions):
+            self.evict(*key)
+        logger.info(f"连接池: 共连接 {self.prepares} 次，租用 {self.leases} 次，健康检查失败 {self.health_failures} 次")
@@ -0,0 +1,218 @@
+import json
+import logging
+import os
+import threading
+import time
+import unittest
+
+logger = logging.getLogger(__name__)
+
+
+def sample_process():
+    """
+    采样当前进程的常驻内存、线程数和打开的文件描述符（Windows 上为句柄）数。
+    优先使用 psutil，未安装时在 Linux 上退回读取 /proc，取不到的指标记为 None。
+
+    :return: {'rss_mb', 'threads', 'python_threads', 'open_fds'}
+    """
+    sample = {'rss_mb': None, 'threads': None, 'python_threads': threading.active_count(), 'open_fds': None}
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        process = psutil.Process()
+        sample['rss_mb'] = process.memory_info().rss / 2 ** 20
+        sample['threads'] = process.num_threads()
+        sample['open_fds'] = process.num_handles() if os.name == 'nt' else process.num_fds()
+        return sample
+    try:
+        with open('/proc/self/status', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    sample['rss_mb'] = int(line.split()[1]) / 1024
+                elif line.startswith('Threads:'):
+                    sample['threads'] = int(line.split()[1])
+        sample['open_fds'] = len(os.listdir('/proc/self/fd'))
+    except OSError:
+        pass
+    return sample
+
+
+class SoakResult(unittest.TextTestResult):
+    """
+    在 TextTestResult 的基础上记录每条用例的耗时、结果和关键信息。
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.records = []
+        self._started = None
+
+    def startTest(self, test):
+        super().startTest(test)
+        self._started = time.perf_counter()
+
+    def _record(self, test, outcome, message=''):
+        duration = time.perf_counter() - self._started if self._started is not None else 0.0
+        self.records.append({'test': describe_test(test), 'outcome': outcome, 'duration': duration, 'message': message})
+
+    def addSuccess(self, test):
+        super().addSuccess(test)
+        self._record(test, 'passed')
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self._record(test, 'failed', key_message(self.failures[-1][1]))
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        self._record(test, 'error', key_message(self.errors[-1][1]))
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self._record(test, 'skipped', reason)
+
+    def addExpectedFailure(self, test, err):
+        super().addExpectedFailure(test, err)
+        self._record(test, 'xfailed')
+
+    def addUnexpectedSuccess(self, test):
+        super().addUnexpectedSuccess(test)
+        self._record(test, 'xpassed')
+
+
+def describe_test(test):
+    """
+    用例标识：测试类名.方法名，多个被测设备派生的子类通过 target 名称区分。
+    """
+    target = getattr(test, 'target', None)
+    name = f'{type(test).__name__}.{test._testMethodName}' if hasattr(test, '_testMethodName') else str(test)
+    return f'{name}[{target.name}]' if hasattr(target, 'name') else name
+
+
+def key_message(message):
+    """
+    从 traceback 中取最后一行（异常类型和信息），作为记录里的关键信息。
+    """
+    lines = [line for line in (message or '').strip().splitlines() if line.strip()]
+    return lines[-1] if lines else ''
+
+
+class SoakEngine:
+    """
+    老化测试引擎：同一个已加载的测试套件反复执行，每轮把每条用例的耗时和结果、进程资源占用
+    以一行 JSON 追加写入 output_path，多天的老化测试得到的是可以画趋势图的时间序列。
+
+    JSONL 中第一行为 start 记录（计划时长等），之后每轮一条 round 记录；中断后以 resume=True
+    重新运行会读取已有记录，从下一轮继续，直到累计执行时长达到计划时长。
+    """
+
+    def __init__(self, suite, output_path, duration, resume=False, verbosity=1, stream=None):
+        """
+        :param suite: 已加载的 unittest.TestSuite，各轮复用同一组用例对象
+        :param output_path: JSONL 输出路径
+        :param duration: 计划的累计执行时长（秒），续跑时以文件中记录的计划时长为准
+        :param resume: 输出文件已存在时是否续跑；为 False 时覆盖已有文件
+        :param verbosity: 控制台输出详细程度，同 unittest.TextTestRunner
+        """
+        self.suite = suite
+        # TestSuite 默认在用例执行后丢弃用例对象，多轮复用时必须关闭
+        self.suite._cleanup = False
+        self.output_path = output_path
+        self.duration = duration
+        self.round_num = 0
+        self.elapsed = 0.0
+        self.totals = {'run': 0, 'passed': 0, 'failed': 0, 'error': 0, 'skipped': 0}
+        self.runner = unittest.TextTestRunner(stream=stream, verbosity=verbosity, resultclass=SoakResult)
+        if resume and os.path.exists(output_path):
+            self._load()
+        else:
+            self._write({'type': 'start', 'time': time.time(), 'duration': duration,
+                         'tests': [describe_test(test) for test in self._tests()]}, mode='w')
+
+    def _tests(self):
+        stack = [self.suite]
+        while stack:
+            item = stack.pop(0)
+            if isinstance(item, unittest.TestSuite):
+                stack[:0] = list(item)
+            else:
+                yield item
+
+    def _write(self, record, mode='a'):
+        with open(self.output_path, mode, encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+
+    def _load(self):
+        """
+        读取已有记录恢复进度；进程被杀时最后一行可能只写了一半，直接忽略。
+        """
+        with open(self.output_path, encoding='utf-8') as f:
+            lines = f.read().splitlines(keepends=True)
+        if lines and not lines[-1].endswith('\n'):
+            with open(self.output_path, 'a', encoding='utf-8') as f:
+                f.write('\n')
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"忽略 {self.output_path} 中不完整的记录")
+                continue
+            if record.get('type') == 'start':
+                self.duration = record['duration']
+            elif record.get('type') == 'round':
+                self.round_num = record['round']
+                self.elapsed += record['duration']
+                for key in self.totals:
+                    self.totals[key] += record['counts'][key]
+        logger.info(f"续跑老化测试：已完成 {self.round_num} 轮，累计 {self.elapsed:.0f}s / 计划 {self.duration:.0f}s")
+        self._write({'type': 'resume', 'time': time.time(), 'round': self.round_num})
+
+    @property
+    def finished(self):
+        return self.elapsed >= self.duration
+
+    def run_round(self):
+        """
+        执行一轮并写入记录。
+
+        :return: (round 记录, SoakResult)
+        """
+        self.round_num += 1
+        logger.info(f"开始第 {self.round_num} 轮测试")
+        start = time.time()
+        result = self.runner.run(self.suite)
+        duration = time.time() - start
+        counts = {outcome: sum(1 for record in result.records if record['outcome'] == outcome)
+                  for outcome in ('passed', 'failed', 'error', 'skipped')}
+        counts['run'] = result.testsRun
+        record = {
+            'type': 'round',
+            'round': self.round_num,
+            'time': start,
+            'duration': duration,
+            'success': result.wasSuccessful(),
+            'counts': counts,
+            'process': sample_process(),
+            'tests': result.records,
+        }
+        self._write(record)
+        self.elapsed += duration
+        for key in self.totals:
+            self.totals[key] += counts[key]
+        return record, result
+
+    def run(self, on_round=None):
+        """
+        反复执行直到累计时长达到计划时长。
+
+        :param on_round: 每轮结束后的回调，参数为 (round 记录, SoakResult)
+        """
+        while not self.finished:
+            record, result = self.run_round()
+            if on_round is not None:
+                on_round(record, result)
+        self._write({'type': 'end', 'time': time.time(), 'rounds': self.round_num, 'totals': self.totals})
+        return self.totals
@@ -0,0 +1,235 @@
+"""
+持续采集老化测试：只连接一次、只 start_stream 一次，连续取数数小时，
+按包序号检查丢包、按时间戳检查数据停滞，每个统计周期输出一次丢包率、最长缺口和吞吐量。
+
+与 brain_sdk_api_test2 的老化测试（反复连接、开停流、释放）互补，覆盖长时间连续采集时的丢数问题。
+
+用法:
+    python stream_soak.py --hours 4 --interval 60 --output stream_soak.jsonl
+    python stream_soak.py --board-mode synthetic --hours 0.01 --interval 5
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+import brainflow
+import numpy as np
+from brainflow.board_shim import BoardShim
+
+from board_targets import BOARD_MODES, selected_targets
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+from eeg_common.packet_loss import PacketLossTracker
+
+logger = logging.getLogger(__name__)
+
+
+class IntervalStats:
+    """
+    一个统计周期内的累计量。
+    """
+
+    def __init__(self, start):
+        self.start = start
+        self.samples = 0
+        self.lost = 0
+        self.gaps = 0
+        self.longest_gap = 0
+        self.stalls = 0
+        self.longest_stall = 0.0
+        self.timestamp_regressions = 0
+
+    def to_record(self, index, end, sampling_rate):
+        elapsed = max(end - self.start, 1e-9)
+        total = self.samples + self.lost
+        return {
+            'type': 'interval',
+            'interval': index,
+            'time': self.start,
+            'duration': elapsed,
+            'samples': self.samples,
+            'lost': self.lost,
+            'loss_rate': self.lost / total if total else 0.0,
+            'gaps': self.gaps,
+            'longest_gap': self.longest_gap,
+            'throughput': self.samples / elapsed,
+            'rate_ratio': self.samples / elapsed / sampling_rate,
+            'stalls': self.stalls,
+            'longest_stall': self.longest_stall,
+            'timestamp_regressions': self.timestamp_regressions,
+        }
+
+
+class StreamSoak:
+    """
+    在一个已 prepare 的会话上持续采集并统计丢包、停滞。
+
+    停滞有两种：主机侧连续 stall_timeout 秒取不到任何新样本，或者相邻样本时间戳的间隔超过 stall_timeout。
+    """
+
+    def __init__(self, board_shim, board_id, interval=60.0, poll_interval=0.05, stall_timeout=1.0,
+                 output_path=None, buffer_size=450000):
+        """
+        :param board_shim: 已 prepare_session 的 BoardShim
+        :param board_id: 板子 ID，用于查询包序号、时间戳通道和采样率
+        :param interval: 统计周期（秒）
+        :param poll_interval: 取数间隔（秒）
+        :param stall_timeout: 判定数据停滞的时长（秒）
+        :param output_path: 每个统计周期一行的 JSONL 输出路径，为 None 时只写日志
+        :param buffer_size: start_stream 的缓冲区大小（样本数）
+        """
+        self.board_shim = board_shim
+        self.board_id = board_id
+        self.sampling_rate = BoardShim.get_sampling_rate(board_id)
+        self.package_num_channel = BoardShim.get_package_num_channel(board_id)
+        self.timestamp_channel = BoardShim.get_timestamp_channel(board_id)
+        self.interval = interval
+        self.poll_interval = poll_interval
+        self.stall_timeout = stall_timeout
+        self.output_path = output_path
+        self.buffer_size = buffer_size
+        self.records = []
+        # 包序号 0~255 回绕，长于一圈的中断按时间戳跳变补回
+        self.loss = PacketLossTracker(sampling_rate=self.sampling_rate)
+        self._last_timestamp = None
+        self._last_data_time = None
+        self._stalled = False
+
+    def _write(self, record):
+        self.records.append(record)
+        if self.output_path:
+            with open(self.output_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def process(self, data, now, stats):
+        """
+        统计一次 get_board_data 返回的数据，包序号和时间戳跨块连续检查。
+        """
+        count = data.shape[1]
+        if count == 0:
+            if self._last_data_time is not None and now - self._last_data_time > self.stall_timeout:
+                if not self._stalled:
+                    stats.stalls += 1
+                    self._stalled = True
+                    logger.warning(f"持续采集: 已 {now - self._last_data_time:.1f}s 没有收到新数据")
+                stats.longest_stall = max(stats.longest_stall, now - self._last_data_time)
+            return
+        # 空轮询时已经计过的停滞，恢复后第一个时间戳间隔就是同一次停滞，不再重复计数
+        resumed = self._stalled
+        self._stalled = False
+        self._last_data_time = now
+        stats.samples += count
+
+        self._count_gaps(self.loss.update_board_data(data, self.package_num_channel, self.timestamp_channel), stats)
+
+        timestamps = data[self.timestamp_channel]
+        if self._last_timestamp is not None:
+            timestamps = np.concatenate(([self._last_timestamp], timestamps))
+        intervals = np.diff(timestamps)
+        stats.timestamp_regressions += int(np.count_nonzero(intervals < 0))
+        jumps = intervals > self.stall_timeout
+        if jumps.any():
+            stats.longest_stall = max(stats.longest_stall, float(intervals[jumps].max()))
+            if resumed and self._last_timestamp is not None:
+                jumps[0] = False
+            stats.stalls += int(np.count_nonzero(jumps))
+        self._last_timestamp = timestamps[-1]
+
+    @staticmethod
+    def _count_gaps(report, stats):
+        if report.gap_count:
+            stats.lost += report.lost
+            stats.gaps += report.gap_count
+            stats.longest_gap = max(stats.longest_gap, report.longest_gap)
+
+    def run(self, duration):
+        """
+        持续采集 duration 秒。
+
+        :return: 汇总记录
+        """
+        self.board_shim.start_stream(self.buffer_size)
+        start = time.time()
+        self._last_data_time = start
+        end = start + duration
+        index = 0
+        stats = IntervalStats(start)
+        try:
+            while True:
+                time.sleep(self.poll_interval)
+                now = time.time()
+                self.process(self.board_shim.get_board_data(), now, stats)
+                if now >= end:
+                    # 时间戳跳变处尚未确定的缺口计入最后一个周期
+                    self._count_gaps(self.loss.flush(), stats)
+                if now - stats.start >= self.interval or now >= end:
+                    record = stats.to_record(index, now, self.sampling_rate)
+                    self._write(record)
+                    logger.info(f"持续采集第 {index} 周期: 吞吐 {record['throughput']:.1f} Hz，"
+                                f"丢包率 {record['loss_rate'] * 100:.3f}%，最长缺口 {record['longest_gap']}，"
+                                f"停滞 {record['stalls']} 次")
+                    index += 1
+                    stats = IntervalStats(now)
+                    if now >= end:
+                        break
+        finally:
+            try:
+                self.board_shim.stop_stream()
+            except brainflow.BrainFlowError as e:
+                logger.warning(f"持续采集: 停止采集流出错: {e}")
+        return self.summary()
+
+    def summary(self):
+        intervals = [record for record in self.records if record['type'] == 'interval']
+        samples = sum(record['samples'] for record in intervals)
+        lost = sum(record['lost'] for record in intervals)
+        duration = sum(record['duration'] for record in intervals)
+        record = {
+            'type': 'summary',
+            'intervals': len(intervals),
+            'duration': duration,
+            'samples': samples,
+            'lost': lost,
+            'loss_rate': lost / (samples + lost) if samples + lost else 0.0,
+            'longest_gap': max((record['longest_gap'] for record in intervals), default=0),
+            'throughput': samples / duration if duration else 0.0,
+            'stalls': sum(record['stalls'] for record in intervals),
+            'longest_stall': max((record['longest_stall'] for record in intervals), default=0.0),
+        }
+        self._write(record)
+        return record
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='持续采集老化测试：长时间单次采集，统计丢包、停滞和吞吐量')
+    parser.add_argument('--board-mode', choices=BOARD_MODES[:2], default=None,
+                        help='hardware 或 synthetic，默认读取 BRAINFLOW_BOARD_MODE 环境变量')
+    parser.add_argument('--hours', type=float, default=1.0, help='采集时长（小时）')
+    parser.add_argument('--interval', type=float, default=60.0, help='统计周期（秒）')
+    parser.add_argument('--stall-timeout', type=float, default=1.0, help='判定数据停滞的时长（秒）')
+    parser.add_argument('--output', help='JSONL 输出路径')
+    args = parser.parse_args()
+
+    target = selected_targets(args.board_mode)[0]
+    params = brainflow.BrainFlowInputParams()
+    params.mac_address = target.mac_address
+    params.timeout = 10
+    board_shim = BoardShim(target.board_id, params)
+    board_shim.prepare_session()
+    try:
+        soak = StreamSoak(board_shim, target.board_id, args.interval, stall_timeout=args.stall_timeout,
+                          output_path=args.output)
+        summary = soak.run(args.hours * 3600)
+    finally:
+        board_shim.release_session()
+    logger.info(f"持续采集结束: 共 {summary['samples']} 个样本，丢失 {summary['lost']} 个"
+                f"（{summary['loss_rate'] * 100:.3f}%），最长缺口 {summary['longest_gap']}，"
+                f"停滞 {summary['stalls']} 次，平均吞吐 {summary['throughput']:.1f} Hz")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+import pytest
+from brainflow.board_shim import BoardIds
+
+from session_pool import SessionPool
+
+SYNTHETIC_BOARD = BoardIds.SYNTHETIC_BOARD.value
+
+
+@pytest.fixture
+def pool():
+    pool = SessionPool(timeout=5)
+    yield pool
+    pool.close()
+
+
+class TestSessionPool:
+    def test_session_is_prepared_once_and_reset_between_leases(self, pool):
+        with pool.lease(SYNTHETIC_BOARD, '') as board_shim:
+            board_shim.start_stream()
+        with pool.lease(SYNTHETIC_BOARD, '') as same_board_shim:
+            assert same_board_shim is board_shim
+            assert same_board_shim.is_prepared()
+            # 上一个用例遗留的采集流已被停止，可以重新开始
+            same_board_shim.start_stream()
+        assert pool.prepares == 1
+        assert pool.leases == 2
+
+    def test_released_session_is_reconnected(self, pool):
+        with pool.lease(SYNTHETIC_BOARD, '') as board_shim:
+            board_shim.release_session()
+        with pool.lease(SYNTHETIC_BOARD, '') as new_board_shim:
+            assert new_board_shim.is_prepared()
+        assert pool.health_failures == 1
+        assert pool.prepares == 2
+
+    def test_evict_frees_device_for_fresh_connect(self, pool):
+        with pool.lease(SYNTHETIC_BOARD, '') as board_shim:
+            pass
+        pool.evict(SYNTHETIC_BOARD, '')
+        assert not board_shim.is_prepared()
@@ -0,0 +1,71 @@
+import json
+import unittest
+
+from soak import SoakEngine, sample_process
+
+
+class Dummy(unittest.TestCase):
+    # 只作为老化引擎的被测套件，不让 pytest 直接收集
+    __test__ = False
+    calls = 0
+
+    def test_pass(self):
+        Dummy.calls += 1
+
+    def test_fail(self):
+        self.assertEqual(1, 2)
+
+    @unittest.skip('not supported')
+    def test_skip(self):
+        pass
+
+
+def load_suite():
+    return unittest.TestLoader().loadTestsFromTestCase(Dummy)
+
+
+def read_records(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+class TestSoakEngine:
+    def test_rounds_reuse_suite_and_stream_records(self, tmp_path):
+        path = str(tmp_path / 'soak.jsonl')
+        Dummy.calls = 0
+        engine = SoakEngine(load_suite(), path, duration=0, verbosity=0)
+        for _ in range(3):
+            engine.run_round()
+        assert Dummy.calls == 3
+        records = read_records(path)
+        assert [record['type'] for record in records] == ['start', 'round', 'round', 'round']
+        outcomes = {test['test']: test['outcome'] for test in records[-1]['tests']}
+        assert outcomes == {'Dummy.test_fail': 'failed', 'Dummy.test_pass': 'passed', 'Dummy.test_skip': 'skipped'}
+        assert records[-1]['counts'] == {'passed': 1, 'failed': 1, 'error': 0, 'skipped': 1, 'run': 3}
+        assert 'AssertionError' in records[-1]['tests'][0]['message']
+
+    def test_resume_continues_round_numbers_and_totals(self, tmp_path):
+        path = str(tmp_path / 'soak.jsonl')
+        engine = SoakEngine(load_suite(), path, duration=3600, verbosity=0)
+        engine.run_round()
+        engine.run_round()
+        # 模拟进程在写最后一行时被杀
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('{"type": "round", "rou')
+        resumed = SoakEngine(load_suite(), path, duration=0, resume=True, verbosity=0)
+        assert resumed.round_num == 2
+        assert resumed.duration == 3600
+        assert resumed.totals['passed'] == 2
+        record, _ = resumed.run_round()
+        assert record['round'] == 3
+        # 不完整的那一行被单独隔开，之后的记录仍然可以逐行解析
+        with open(path, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        assert lines[-3] == '{"type": "round", "rou'
+        assert json.loads(lines[-1])['round'] == 3
+
+
+def test_sample_process():
+    sample = sample_process()
+    assert sample['python_threads'] >= 1
+    assert sample['rss_mb'] is None or sample['rss_mb'] > 0
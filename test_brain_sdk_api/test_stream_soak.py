@@ -0,0 +1,76 @@
+import brainflow
+import numpy as np
+import pytest
+from brainflow.board_shim import BoardShim
+
+from board_targets import SYNTHETIC_BOARD
+from stream_soak import IntervalStats, StreamSoak
+
+
+def make_chunk(packages, timestamps):
+    data = np.zeros((BoardShim.get_num_rows(SYNTHETIC_BOARD), len(packages)))
+    data[BoardShim.get_package_num_channel(SYNTHETIC_BOARD)] = packages
+    data[BoardShim.get_timestamp_channel(SYNTHETIC_BOARD)] = timestamps
+    return data
+
+
+class TestStreamSoak:
+    def test_gaps_are_tracked_across_chunks_and_wraparound(self):
+        soak = StreamSoak(None, SYNTHETIC_BOARD)
+        stats = IntervalStats(0.0)
+        soak.process(make_chunk([250, 251, 252], [0.0, 0.004, 0.008]), 0.1, stats)
+        # 253~255 丢失，跨块、跨回绕
+        soak.process(make_chunk([0, 1, 5], [0.024, 0.028, 0.044]), 0.2, stats)
+        assert stats.samples == 6
+        assert stats.lost == 6
+        assert stats.gaps == 2
+        assert stats.longest_gap == 3
+
+    def test_outages_longer_than_package_num_cycle(self):
+        # 包序号 0~255 回绕，跳变后的样本按正常节奏到达时按时间戳补回整圈
+        soak = StreamSoak(None, SYNTHETIC_BOARD)
+        stats = IntervalStats(0.0)
+        soak.process(make_chunk([0, 1, 2], [0.0, 0.004, 0.008]), 0.1, stats)
+        # 中断 300 个包：序号只差 45
+        packages = np.arange(303, 503)
+        soak.process(make_chunk(packages % 256, 0.008 + (packages - 2) / 250), 1.5, stats)
+        assert stats.lost == 300 and stats.longest_gap == 300
+        # 正好丢一整圈：序号看起来连续
+        packages = np.arange(759, 959)
+        soak.process(make_chunk(packages % 256, 0.008 + (packages - 2) / 250), 3.0, stats)
+        assert stats.lost == 556 and stats.gaps == 2 and stats.longest_gap == 300
+        # 积压后批量送达：时间戳跳变 0.9s 但没有丢包，积压的样本挤在一起
+        last = 0.008 + 956 / 250
+        soak.process(make_chunk(np.arange(959, 1200) % 256, last + 0.9 + np.arange(241) * 1e-4), 5.0, stats)
+        assert stats.lost == 556
+        assert soak.loss.flush().lost == 0
+
+    def test_stalls_from_empty_polls_and_timestamp_jumps(self):
+        soak = StreamSoak(None, SYNTHETIC_BOARD, stall_timeout=1.0)
+        stats = IntervalStats(0.0)
+        soak.process(make_chunk([0, 1], [10.0, 10.004]), 0.0, stats)
+        soak.process(make_chunk([], []), 0.5, stats)
+        soak.process(make_chunk([], []), 1.5, stats)
+        soak.process(make_chunk([], []), 2.0, stats)
+        assert stats.stalls == 1
+        assert stats.longest_stall == pytest.approx(2.0)
+        # 恢复后的时间戳跳变是同一次停滞
+        soak.process(make_chunk([2, 3], [13.0, 13.004]), 2.1, stats)
+        assert stats.stalls == 1
+        assert stats.longest_stall == pytest.approx(2.996)
+        # 没有空轮询的时间戳跳变单独计数
+        soak.process(make_chunk([4], [15.0]), 2.2, stats)
+        assert stats.stalls == 2
+
+    def test_synthetic_board_streams_without_loss(self):
+        params = brainflow.BrainFlowInputParams()
+        board_shim = BoardShim(SYNTHETIC_BOARD, params)
+        board_shim.prepare_session()
+        try:
+            soak = StreamSoak(board_shim, SYNTHETIC_BOARD, interval=0.5)
+            summary = soak.run(1.6)
+        finally:
+            board_shim.release_session()
+        assert summary['intervals'] >= 3
+        assert summary['lost'] == 0
+        assert summary['throughput'] == pytest.approx(250, rel=0.15)